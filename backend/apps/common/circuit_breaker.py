@@ -0,0 +1,108 @@
+"""Circuit breaker por processo para dependências externas.
+
+Fechado: as chamadas passam e falhas consecutivas são contadas. Depois de
+`failure_threshold` falhas seguidas o circuito abre e as chamadas falham na
+hora (`open_error`), sem pagar timeout de conexão. Passados `reset_seconds`
+ele fica meio-aberto: uma única chamada de teste passa (as demais continuam
+rejeitadas); sucesso fecha o circuito, falha reabre por mais `reset_seconds`.
+
+Só as exceções em `failure_types` contam como falha: um erro de resposta
+mostra que a dependência respondeu.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Tuple, Type
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_seconds: float,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+        open_error: Type[Exception] = CircuitOpenError,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failure_types = failure_types
+        self.open_error = open_error
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        # Chamar com o lock
+        self._state = state
+        metrics.increment("circuit_breaker_transitions_total", breaker=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log("circuit breaker %s -> %s failures=%s", self.name, state, self._failures)
+
+    def allow(self) -> bool:
+        """Se a próxima chamada pode seguir; no meio-aberto libera só uma chamada de teste."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self.clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = self.clock()
+                self._transition(OPEN)
+
+    def call(self, func: Callable, *args, **kwargs):
+        if not self.allow():
+            metrics.increment("circuit_breaker_rejected_total", breaker=self.name)
+            raise self.open_error(f"circuito {self.name} aberto")
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_success()
+            raise
+        self.record_success()
+        return result
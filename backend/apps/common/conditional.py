@@ -0,0 +1,56 @@
+"""GET condicional (`ETag` fraco / `Last-Modified`) para listas e detalhes.
+
+Listas usam uma impressão digital calculada no banco em uma única query
+(`MAX(updated_at)` + `COUNT(*)` do queryset filtrado, mais a query string),
+então um `If-None-Match` que confere recebe `304` sem paginar nem serializar.
+Clientes, produtos e pedidos têm índice em `updated_at`: o `MAX` lê a ponta do
+índice e o `COUNT(*)` (InnoDB) varre o menor índice secundário, não a tabela.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request, etag: str, last_modified=None):
+    """Resposta `304` quando `If-None-Match`/`If-Modified-Since` conferem; senão None."""
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag: str, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(timegm(last_modified.utctimetuple()))
+    return response
+
+
+class ConditionalListMixin:
+    """`list()` com ETag fraco; views com dados de outras tabelas estendem `list_fingerprint`."""
+
+    def list_fingerprint(self, queryset) -> dict:
+        return queryset.order_by().aggregate(last_updated=Max("updated_at"), total=Count("pk"))
+
+    def list(self, request, *args, **kwargs):
+        # Modo cursor existe para não varrer o conjunto filtrado (sem COUNT): fica sem ETag
+        use_cursor = getattr(self.paginator, "use_cursor", None)
+        if use_cursor and use_cursor(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        fingerprint = self.list_fingerprint(queryset)
+        etag = weak_etag(
+            request.get_full_path(),
+            *(f"{key}={value}" for key, value in sorted(fingerprint.items())),
+        )
+        response = not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag)
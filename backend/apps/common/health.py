@@ -1,6 +1,6 @@
 from django.http import JsonResponse
 from django.db import connection
-from .redis import get_redis
+from .redis import get_circuit_breaker, get_redis
 
 def health(request):
     db_ok = True
@@ -13,6 +13,7 @@ def health(request):
     except Exception:
         db_ok = False
 
+    # Com o circuito aberto o ping falha na hora; passado o tempo de reset ele é o comando de teste
     try:
         get_redis().ping()
     except Exception:
@@ -20,6 +21,11 @@ def health(request):
 
     ok = db_ok and redis_ok
     return JsonResponse(
-        {'status': 'ok' if ok else 'fail', 'database': db_ok, 'redis': redis_ok},
+        {
+            'status': 'ok' if ok else 'fail',
+            'database': db_ok,
+            'redis': redis_ok,
+            'redis_circuit': get_circuit_breaker().state,
+        },
         status=200 if ok else 500,
     )
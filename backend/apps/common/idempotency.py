@@ -0,0 +1,257 @@
+import base64
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.common.models import IdempotencyRecord
+from apps.common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL_SECONDS = 0.05
+
+
+def _fingerprint(request) -> str:
+    payload = json.dumps(request.data, sort_keys=True, default=str) if request.data else ""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Resposta final por chave: Redis como caminho rápido, `idempotency_records` como fallback durável.
+
+    O claim (quem processa a requisição) é um `SET NX` no Redis; com o Redis
+    fora, a unique constraint da tabela faz o mesmo papel. Enquanto o handler
+    roda, `keep_alive()` renova o claim a cada terço de
+    `IDEMPOTENCY_LOCK_TTL_SECONDS`, então um handler lento não perde a chave
+    para um retry. Registros valem por `IDEMPOTENCY_TTL_SECONDS`, como no
+    Redis; os vencidos são apagados por `manage.py purge_idempotency_records`.
+    """
+
+    def __init__(self, digest: str):
+        self.digest = digest
+        self.result_key = f"idem:resp:{digest}"
+        self.lock_key = f"idem:lock:{digest}"
+        self.redis = get_redis()
+        self.redis_ok = True
+        self.claimed_in_db = False
+        self.token = uuid.uuid4().hex
+        self._stop = threading.Event()
+
+    def _redis(self, method: str, *args, **kwargs):
+        if not self.redis_ok:
+            return None
+        try:
+            return getattr(self.redis, method)(*args, **kwargs)
+        except Exception:
+            self.redis_ok = False
+            logger.warning("idempotency redis unavailable, falling back to database")
+            return None
+
+    def cached(self) -> Optional[dict]:
+        raw = self._redis("get", self.result_key)
+        return json.loads(raw) if raw else None
+
+    @staticmethod
+    def expired_before():
+        return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def stored(self) -> Optional[dict]:
+        record = IdempotencyRecord.objects.filter(
+            key=self.digest, status_code__isnull=False, created_at__gte=self.expired_before()
+        ).first()
+        if not record:
+            return None
+        result = {
+            "fingerprint": record.request_fingerprint,
+            "status": record.status_code,
+            "content_type": record.content_type,
+            "body": base64.b64encode(bytes(record.body or b"")).decode("ascii"),
+        }
+        self._redis("setex", self.result_key, settings.IDEMPOTENCY_TTL_SECONDS, json.dumps(result))
+        return result
+
+    def claim(self, fingerprint: str) -> bool:
+        acquired = self._redis("set", self.lock_key, self.token, nx=True, ex=settings.IDEMPOTENCY_LOCK_TTL_SECONDS)
+        if self.redis_ok:
+            return bool(acquired)
+
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(key=self.digest, request_fingerprint=fingerprint)
+        except IntegrityError:
+            # Registro "em processamento" abandonado (processo morreu) ou resposta vencida: assume
+            stale_before = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL_SECONDS)
+            taken = (
+                IdempotencyRecord.objects.filter(key=self.digest)
+                .filter(Q(status_code__isnull=True, created_at__lt=stale_before) | Q(created_at__lt=self.expired_before()))
+                .update(created_at=timezone.now(), request_fingerprint=fingerprint, status_code=None, content_type="", body=None)
+            )
+            if not taken:
+                return False
+        self.claimed_in_db = True
+        return True
+
+    def save(self, fingerprint: str, response) -> None:
+        body = bytes(response.content)
+        content_type = response.get("Content-Type", "")
+        result = {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "content_type": content_type,
+            "body": base64.b64encode(body).decode("ascii"),
+        }
+        self._redis("setex", self.result_key, settings.IDEMPOTENCY_TTL_SECONDS, json.dumps(result))
+
+        fields = {
+            "request_fingerprint": fingerprint,
+            "status_code": response.status_code,
+            "content_type": content_type,
+            "body": body,
+        }
+        try:
+            if self.claimed_in_db:
+                IdempotencyRecord.objects.filter(key=self.digest).update(**fields)
+                self.claimed_in_db = False
+            else:
+                with transaction.atomic():
+                    IdempotencyRecord.objects.create(key=self.digest, **fields)
+        except IntegrityError:
+            # Só sobrescreve registro vencido (ainda não apagado pelo purge)
+            IdempotencyRecord.objects.filter(key=self.digest, created_at__lt=self.expired_before()).update(
+                created_at=timezone.now(), **fields
+            )
+
+    def _renew(self) -> None:
+        if self.claimed_in_db:
+            IdempotencyRecord.objects.filter(key=self.digest, status_code__isnull=True).update(created_at=timezone.now())
+        elif self._redis("get", self.lock_key) == self.token:
+            self._redis("expire", self.lock_key, settings.IDEMPOTENCY_LOCK_TTL_SECONDS)
+
+    def keep_alive(self) -> None:
+        """Renova o claim em segundo plano até `release()`."""
+
+        def loop():
+            try:
+                while not self._stop.wait(settings.IDEMPOTENCY_LOCK_TTL_SECONDS / 3):
+                    try:
+                        self._renew()
+                    except Exception:
+                        logger.warning("idempotency claim renewal failed key=%s", self.digest, exc_info=True)
+            finally:
+                connection.close()
+
+        threading.Thread(target=loop, name="idempotency-claim", daemon=True).start()
+
+    def release(self) -> None:
+        self._stop.set()
+        if self.claimed_in_db:
+            # Terminou sem resposta armazenável (5xx / exceção): libera para novo retry
+            IdempotencyRecord.objects.filter(key=self.digest, status_code__isnull=True).delete()
+            self.claimed_in_db = False
+        if self._redis("get", self.lock_key) == self.token:
+            self._redis("delete", self.lock_key)
+
+
+def purge_expired_records(batch_size: int = 1000) -> int:
+    """Apaga registros vencidos (`IDEMPOTENCY_TTL_SECONDS`) em lotes; retorna quantos."""
+    expired_before = IdempotencyStore.expired_before()
+    removed = 0
+    while True:
+        ids = list(
+            IdempotencyRecord.objects.filter(created_at__lt=expired_before).order_by("created_at").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += IdempotencyRecord.objects.filter(id__in=ids).delete()[0]
+
+
+def _replay(result: dict, fingerprint: str, replay_status: dict):
+    if result["fingerprint"] != fingerprint:
+        return Response(
+            {"detail": "Idempotency-Key já utilizada com outro payload"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    status_code = replay_status.get(result["status"], result["status"])
+    response = HttpResponse(base64.b64decode(result["body"]), status=status_code, content_type=result["content_type"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(handler):
+    """Torna um handler de escrita de uma view DRF idempotente via header `Idempotency-Key`.
+
+    Retries com a mesma chave (mesmo usuário, método e rota) recebem o status e
+    os bytes da primeira resposta sem executar o handler. Duplicatas que chegam
+    enquanto a primeira ainda está em processamento esperam o resultado dela.
+    Respostas 5xx não são armazenadas. A view pode mapear o status do replay
+    com `idempotency_replay_status` (ex.: `{201: 200}`).
+    """
+
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"Idempotency-Key deve ter no máximo {MAX_KEY_LENGTH} caracteres"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = f"{getattr(request.user, 'pk', None)}:{request.method}:{request.path}:{key}"
+        store = IdempotencyStore(hashlib.sha256(scope.encode("utf-8")).hexdigest())
+        fingerprint = _fingerprint(request)
+        replay_status = getattr(view, "idempotency_replay_status", {})
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        first_attempt = True
+        while True:
+            result = store.cached()
+            if result is None and (first_attempt or not store.redis_ok):
+                result = store.stored()
+            if result is not None:
+                return _replay(result, fingerprint, replay_status)
+            if store.claim(fingerprint):
+                # O dono anterior pode ter gravado e liberado entre a leitura e o claim
+                result = store.cached() if store.redis_ok else None
+                if result is not None:
+                    store.release()
+                    return _replay(result, fingerprint, replay_status)
+                store.keep_alive()
+                break
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": "requisição com a mesma Idempotency-Key ainda em processamento"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            first_attempt = False
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+        try:
+            response = handler(view, request, *args, **kwargs)
+            response = view.finalize_response(request, response, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            if response.status_code < 500:
+                store.save(fingerprint, response)
+        finally:
+            store.release()
+        return response
+
+    return wrapper
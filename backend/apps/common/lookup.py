@@ -0,0 +1,279 @@
+"""Índice de prefixo em memória, por processo, para autocomplete (`/lookup?q=`).
+
+Cada registro gera algumas chaves normalizadas (sem acento, minúsculas;
+documentos só com dígitos). A base é um par de listas ordenadas (chave, id)
+consultada por `bisect`; mudanças incrementais (por `updated_at`/`deleted_at`)
+entram em um overlay pequeno e em um conjunto de ids substituídos, e são
+fundidas na base quando o overlay cresce. Leitores usam a referência atual
+do snapshot, sem lock.
+
+Só a carga inicial roda na requisição. Depois, a consulta que encontra o
+snapshot velho (`LOOKUP_REFRESH_SECONDS`) dispara o refresh em uma thread e
+responde com o snapshot atual; delta, fusão com a base e releitura completa
+acontecem fora do caminho da requisição e terminam trocando a referência.
+
+O delta relê linhas com `updated_at` até `REFRESH_OVERLAP` antes da marca; um
+registro cujo commit chega depois disso escapa do delta e só entra na
+releitura completa, feita a cada `LOOKUP_FULL_RELOAD_SECONDS` (atraso máximo
+nesses casos).
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from array import array
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, serializers
+from rest_framework.response import Response
+
+from apps.common.text import digits, normalize
+
+logger = logging.getLogger(__name__)
+
+_DOCUMENT_LIKE = re.compile(r"^[\d.\-/\s]+$")
+# Linhas que commitam depois do refresh com `updated_at` anterior à marca
+REFRESH_OVERLAP = timedelta(seconds=5)
+LOAD_CHUNK_SIZE = 5000
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def query_keys(q: str) -> List[str]:
+    """Formas da consulta a procurar: texto normalizado e, se parecer documento/telefone, só os dígitos."""
+    keys = [normalize(q)]
+    if _DOCUMENT_LIKE.match(q or "") and digits(q) and digits(q) != keys[0]:
+        keys.append(digits(q))
+    return [key for key in keys if key]
+
+
+class PrefixIndex:
+    """Chaves ordenadas + ids paralelos; imutável depois de montado."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]]):
+        ordered = sorted(pairs)
+        self.keys = [key for key, _ in ordered]
+        self.ids = array("q", (pk for _, pk in ordered))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def scan(self, prefix: str):
+        """Ids cujas chaves começam com `prefix`, na ordem das chaves."""
+        pos = bisect.bisect_left(self.keys, prefix)
+        keys, ids = self.keys, self.ids
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            yield ids[pos]
+            pos += 1
+
+
+class LookupSnapshot:
+    """Base grande + overlay pequeno; o refresh só copia as estruturas do overlay."""
+
+    def __init__(
+        self,
+        base: PrefixIndex,
+        base_labels: Dict[int, str],
+        overlay: PrefixIndex = PrefixIndex(()),
+        overlay_labels: Optional[Dict[int, str]] = None,
+        replaced: frozenset = frozenset(),
+    ):
+        self.base = base
+        self.base_labels = base_labels
+        self.overlay = overlay
+        self.overlay_labels = overlay_labels or {}
+        # Ids cujas entradas na base estão desatualizadas (mudaram ou saíram)
+        self.replaced = replaced
+
+    def search(self, q: str, limit: int) -> List[dict]:
+        found = []
+        seen = set()
+        for prefix in query_keys(q):
+            for source, labels, skip in (
+                (self.overlay, self.overlay_labels, ()),
+                (self.base, self.base_labels, self.replaced),
+            ):
+                for pk in source.scan(prefix):
+                    if pk in seen or pk in skip:
+                        continue
+                    seen.add(pk)
+                    found.append({"id": pk, "label": labels[pk]})
+                    if len(found) >= limit:
+                        return found
+        return found
+
+
+class LookupIndex:
+    """Mantém o snapshot de um model: carga preguiçosa e refresh incremental periódico.
+
+    `keys(row)` devolve as chaves de um registro; `label(row)` o texto exibido.
+    `fields` são lidos com `values_list` e precisam incluir id, is_active,
+    deleted_at e updated_at (nessa ordem, no início).
+    """
+
+    def __init__(self, model, fields: Tuple[str, ...], keys: Callable, label: Callable):
+        self.model = model
+        self.fields = ("id", "is_active", "deleted_at", "updated_at") + tuple(fields)
+        self.keys = keys
+        self.label = label
+        self._snapshot: Optional[LookupSnapshot] = None
+        self._watermark = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+        # id -> (label, chaves) dos registros alterados desde a última fusão com a base
+        self._overlay: Dict[int, Tuple[str, List[Tuple[str, int]]]] = {}
+
+    def search(self, q: str, limit: int) -> List[dict]:
+        return self.snapshot().search(q, limit)
+
+    def reset(self) -> None:
+        with self._refresh_lock:
+            self._snapshot = None
+            self._watermark = None
+            self._overlay = {}
+
+    def snapshot(self) -> LookupSnapshot:
+        if self._snapshot is None:
+            with self._refresh_lock:
+                if self._snapshot is None:
+                    self._load()
+        elif time.monotonic() - self._checked_at > settings.LOOKUP_REFRESH_SECONDS:
+            # Outro refresh em andamento: nada a fazer, a consulta segue com o snapshot atual
+            if self._refresh_lock.acquire(blocking=False):
+                self._checked_at = time.monotonic()
+                threading.Thread(target=self._refresh_in_background, name="lookup-refresh", daemon=True).start()
+        return self._snapshot
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._update()
+        except Exception:
+            logger.exception("lookup index %s refresh failed", self.model._meta.db_table)
+        finally:
+            self._refresh_lock.release()
+            connection.close()
+
+    def refresh(self) -> None:
+        """Atualiza agora, na thread chamadora (delta, ou releitura completa se estiver na hora)."""
+        with self._refresh_lock:
+            self._update()
+
+    def _update(self) -> None:
+        if self._snapshot is None or time.monotonic() - self._loaded_at > settings.LOOKUP_FULL_RELOAD_SECONDS:
+            self._load()
+        else:
+            self._refresh()
+        self._checked_at = time.monotonic()
+
+    def _track(self, row) -> None:
+        marks = [mark for mark in (row[2], row[3]) if mark is not None]
+        if marks and (self._watermark is None or max(marks) > self._watermark):
+            self._watermark = max(marks)
+
+    def _pairs(self, row) -> List[Tuple[str, int]]:
+        return [(key, row[0]) for key in {k for k in self.keys(row) if k}]
+
+    def _load(self) -> None:
+        started = time.monotonic()
+        rows = self.model.objects.filter(is_active=True).values_list(*self.fields).iterator(
+            chunk_size=LOAD_CHUNK_SIZE
+        )
+        # Marca da própria leitura: uma releitura completa pode ser mais velha que
+        # o último delta, e o próximo delta reaplica o que mudou durante ela
+        previous, self._watermark = self._watermark, None
+        labels, pairs = {}, []
+        try:
+            for row in rows:
+                self._track(row)
+                labels[row[0]] = self.label(row)
+                pairs.extend(self._pairs(row))
+        except Exception:
+            self._watermark = previous
+            raise
+        if self._watermark is None:
+            self._watermark = timezone.now()
+        self._overlay = {}
+        self._snapshot = LookupSnapshot(PrefixIndex(pairs), labels)
+        self._loaded_at = started
+        self._checked_at = time.monotonic()
+        logger.info(
+            "lookup index %s loaded: %s records in %.2fs",
+            self.model._meta.db_table,
+            len(labels),
+            time.monotonic() - started,
+        )
+
+    def _refresh(self) -> None:
+        since = self._watermark - REFRESH_OVERLAP
+        rows = list(
+            self.model.all_objects.filter(Q(updated_at__gte=since) | Q(deleted_at__gte=since)).values_list(
+                *self.fields
+            )
+        )
+        if not rows:
+            return
+
+        current = self._snapshot
+        replaced = set(current.replaced)
+        for row in rows:
+            self._track(row)
+            pk, is_active, deleted_at = row[0], row[1], row[2]
+            replaced.add(pk)
+            if is_active and deleted_at is None:
+                self._overlay[pk] = (self.label(row), self._pairs(row))
+            else:
+                self._overlay.pop(pk, None)
+
+        if len(replaced) > settings.LOOKUP_OVERLAY_MAX:
+            self._merge(current, replaced)
+            return
+        self._snapshot = LookupSnapshot(
+            current.base,
+            current.base_labels,
+            PrefixIndex(pair for _, pairs in self._overlay.values() for pair in pairs),
+            {pk: label for pk, (label, _) in self._overlay.items()},
+            frozenset(replaced),
+        )
+
+    def _merge(self, current: LookupSnapshot, replaced: set) -> None:
+        base = current.base
+        pairs = [(key, pk) for key, pk in zip(base.keys, base.ids) if pk not in replaced]
+        labels = {pk: label for pk, label in current.base_labels.items() if pk not in replaced}
+        for pk, (label, overlay_pairs) in self._overlay.items():
+            labels[pk] = label
+            pairs.extend(overlay_pairs)
+        self._overlay = {}
+        self._snapshot = LookupSnapshot(PrefixIndex(pairs), labels)
+
+
+class LookupQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100, trim_whitespace=True)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT)
+
+
+class LookupResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    label = serializers.CharField()
+
+
+class LookupView(generics.GenericAPIView):
+    """`GET ?q=&limit=` -> `[{id, label}]` pelo índice em memória (subclasses definem `lookup_index`)."""
+
+    lookup_index: LookupIndex = None
+    pagination_class = None
+    serializer_class = LookupResultSerializer
+
+    @extend_schema(parameters=[LookupQuerySerializer], responses=LookupResultSerializer(many=True))
+    def get(self, request, *args, **kwargs):
+        params = LookupQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        results = self.lookup_index.search(params.validated_data["q"], params.validated_data["limit"])
+        return Response(results)
@@ -0,0 +1,102 @@
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.redis import get_blocking_redis
+from apps.common.streams import BatchStats, StreamConsumer, handlers_for
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Consome um Redis Stream de eventos em consumer group (rode N processos para escalar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stream", default="domain_events:orders", help="stream de eventos")
+        parser.add_argument("--group", default=settings.EVENT_CONSUMER_GROUP, help="consumer group")
+        parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}", help="nome deste consumidor no grupo")
+        parser.add_argument("--batch-size", type=int, default=settings.EVENT_CONSUMER_BATCH_SIZE, help="mensagens por leitura")
+        parser.add_argument("--block-ms", type=int, default=settings.EVENT_CONSUMER_BLOCK_MS, help="bloqueio do XREADGROUP")
+        parser.add_argument(
+            "--claim-idle-ms", type=int, default=settings.EVENT_CONSUMER_CLAIM_IDLE_MS, help="tempo ocioso para reassumir pendentes"
+        )
+        parser.add_argument(
+            "--max-deliveries", type=int, default=settings.EVENT_CONSUMER_MAX_DELIVERIES, help="entregas antes do dead letter"
+        )
+        parser.add_argument(
+            "--dedupe-seconds", type=int, default=settings.EVENT_CONSUMER_DEDUPE_SECONDS, help="validade da marca de evento processado (0 desliga)"
+        )
+        parser.add_argument("--report-seconds", type=float, default=60, help="intervalo do relatório de vazão e atraso")
+        parser.add_argument("--once", action="store_true", help="processa o que houver e termina")
+
+    def handle(self, *args, stream, group, consumer, batch_size, block_ms, claim_idle_ms, max_deliveries, dedupe_seconds, report_seconds, once, **kwargs):
+        if batch_size < 1:
+            raise CommandError("--batch-size deve ser maior que zero")
+        handlers = handlers_for(stream)
+        if not handlers:
+            raise CommandError(f"nenhum handler registrado para o stream {stream}")
+
+        worker = StreamConsumer(
+            get_blocking_redis(),
+            stream,
+            group,
+            consumer,
+            handlers,
+            batch_size=batch_size,
+            block_ms=block_ms,
+            claim_idle_ms=claim_idle_ms,
+            max_deliveries=max_deliveries,
+            dedupe_seconds=dedupe_seconds,
+        )
+        worker.ensure_group()
+        logger.info("stream consumer started stream=%s group=%s consumer=%s types=%s", stream, group, consumer, sorted(handlers))
+
+        window = BatchStats()
+        window_started = time.monotonic()
+        total = BatchStats()
+        while True:
+            try:
+                stats = worker.poll(block=not once)
+            except Exception:
+                if once:
+                    raise
+                logger.exception("stream consumer poll failed stream=%s", stream)
+                time.sleep(1)
+                continue
+            window.merge(stats)
+            total.merge(stats)
+
+            idle = not (stats.processed or stats.skipped or stats.duplicates or stats.failed)
+            elapsed = time.monotonic() - window_started
+            if elapsed >= report_seconds or (once and idle):
+                lag = worker.group_lag()
+                logger.info(
+                    "stream consumer report stream=%s group=%s consumer=%s processed=%s rate=%.1f/s duplicates=%s failed=%s "
+                    "dead=%s max_lag_ms=%s pending=%s lag=%s",
+                    stream,
+                    group,
+                    consumer,
+                    window.processed,
+                    window.processed / elapsed if elapsed else 0.0,
+                    window.duplicates,
+                    window.failed,
+                    window.dead,
+                    window.max_lag_ms,
+                    lag["pending"],
+                    lag["lag"],
+                )
+                window = BatchStats()
+                window_started = time.monotonic()
+            if once and idle:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Concluído: {total.processed} processados, {total.skipped} ignorados, "
+                f"{total.duplicates} duplicados, {total.failed} falhas, {total.dead} no dead letter."
+            )
+        )
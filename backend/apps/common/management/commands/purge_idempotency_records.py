@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.idempotency import purge_expired_records
+
+
+class Command(BaseCommand):
+    help = "Apaga registros de Idempotency-Key mais antigos que IDEMPOTENCY_TTL_SECONDS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="registros por DELETE")
+
+    def handle(self, *args, batch_size, **kwargs):
+        if batch_size < 1:
+            raise CommandError("--batch-size deve ser maior que zero")
+        removed = purge_expired_records(batch_size)
+        self.stdout.write(f"{removed} registro(s) removido(s) (retenção de {settings.IDEMPOTENCY_TTL_SECONDS}s)")
+        self.stdout.write(self.style.SUCCESS("Concluído."))
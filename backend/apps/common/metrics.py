@@ -0,0 +1,57 @@
+import hmac
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Contadores por processo (cada worker expõe os seus).
+_lock = threading.Lock()
+_counters = defaultdict(int)
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name: str, amount: int = 1, **labels) -> None:
+    with _lock:
+        _counters[_key(name, labels)] += amount
+
+
+def get(name: str, **labels) -> int:
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def snapshot() -> dict:
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+
+
+def render() -> str:
+    lines = []
+    for (name, labels), value in sorted(snapshot().items()):
+        label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+        lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _authorized(request) -> bool:
+    """IP em `METRICS_ALLOWED_IPS` ou `Authorization: Bearer <METRICS_TOKEN>`."""
+    if request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    return bool(token) and hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+
+
+def metrics(request):
+    if not _authorized(request):
+        return HttpResponseForbidden("forbidden", content_type="text/plain")
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
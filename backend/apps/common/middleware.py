@@ -1,24 +1,26 @@
 from django.conf import settings
 from django.http import JsonResponse
 
-from apps.common.redis import get_redis
+from apps.common.rate_limit import client_identity, limiter, load_rules, match_rule
 
 
 class RateLimitMiddleware:
+    """Token bucket por cliente e por regra de rota (`RATE_LIMIT_ROUTES`, primeira que casar)."""
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.rules = load_rules(settings.RATE_LIMIT_ROUTES)
 
     def __call__(self, request):
-        if request.path.startswith("/api/"):
-            ip = request.META.get("REMOTE_ADDR", "unknown")
-            key = f"rate_limit:{ip}"
+        rule = match_rule(self.rules, request.path, request.method)
+        if rule is not None:
             try:
-                client = get_redis()
-                count = client.incr(key)
-                if count == 1:
-                    client.expire(key, 60) # expire after 60 seconds
-                if count > settings.RATE_LIMIT_PER_MINUTE:
-                    return JsonResponse({"detail": "rate limit exceeded"}, status=429) # 429 Too Many Requests
+                decision = limiter.hit(rule, client_identity(request))
             except Exception:
-                pass
+                # Redis fora ou circuito aberto: libera a requisição (fail open)
+                decision = None
+            if decision is not None and not decision.allowed:
+                response = JsonResponse({"detail": "rate limit exceeded"}, status=429) # 429 Too Many Requests
+                response["Retry-After"] = str(decision.retry_after_seconds)
+                return response
         return self.get_response(request)
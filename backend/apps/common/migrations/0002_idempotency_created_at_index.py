@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idempotencyrecord',
+            index=models.Index(fields=['created_at'], name='idempotency_created_3fb3ea_idx'),
+        ),
+    ]
@@ -7,3 +7,20 @@ class TimeStampedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class IdempotencyRecord(models.Model):
+    """Resposta final de uma requisição com `Idempotency-Key` (fallback durável do Redis)."""
+
+    key = models.CharField(max_length=64, unique=True)
+    request_fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # null = em processamento
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "idempotency_records"
+        indexes = [
+            models.Index(fields=["created_at"]),  # retenção e purge
+        ]
@@ -1,5 +1,147 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class DefaultPagination(LimitOffsetPagination):
     default_limit = 20
     max_limit = 100
+
+
+class KeysetPagination(DefaultPagination):
+    """Paginação por cursor em `(created_at, id)`, do mais recente para o mais antigo.
+
+    Cada página é um `WHERE (created_at, id) < (c, i) ORDER BY created_at DESC, id DESC
+    LIMIT n+1`: custo constante em qualquer profundidade e sem `COUNT(*)`. O
+    cursor é opaco (base64 de `{"c", "i", "r"}`; `r` marca página anterior).
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Cursor inválido"
+
+    def _encode(self, obj, reverse: bool) -> str:
+        payload = json.dumps({"c": obj.created_at.isoformat(), "i": obj.pk, "r": reverse}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode(self, raw: str):
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            created_at = parse_datetime(data["c"])
+            if created_at is None:
+                raise ValueError
+            return created_at, int(data["i"]), bool(data.get("r"))
+        except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        raw = request.query_params.get(self.cursor_query_param)
+        cursor = self._decode(raw) if raw else None
+
+        if cursor is None:
+            reverse = False
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            created_at, pk, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by("created_at", "id")
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by("-created_at", "-id")
+
+        rows = list(queryset[: self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if reverse:
+            rows.reverse()
+
+        # Indo para trás, "mais itens" significa página anterior; a próxima sempre existe
+        self.has_next = (not reverse and has_more) or (reverse and bool(rows))
+        self.has_previous = (reverse and has_more) or (not reverse and cursor is not None and bool(rows))
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self._encode(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CursorOrOffsetPagination(DefaultPagination):
+    """Offset por padrão (compatível); `?pagination=cursor` ou `?cursor=` ativa o modo keyset."""
+
+    mode_query_param = "pagination"
+
+    def use_cursor(self, request) -> bool:
+        params = request.query_params
+        return params.get(self.mode_query_param) == "cursor" or KeysetPagination.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = KeysetPagination() if self.use_cursor(request) else None
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "`cursor` ativa a paginação por cursor (sem count).",
+                "schema": {"type": "string", "enum": ["offset", "cursor"]},
+            },
+            {
+                "name": KeysetPagination.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor opaco retornado em `next`/`previous`.",
+                "schema": {"type": "string"},
+            },
+        ]
@@ -0,0 +1,192 @@
+"""Rate limit por token bucket no Redis, um round trip por requisição.
+
+Cada cliente (usuário autenticado ou IP real por trás do load balancer) tem um
+bucket por regra de rota: `burst` fichas no máximo, repostas continuamente a
+`per_minute` por minuto. Sem janela fixa, não há rajada dupla na virada do
+minuto. Reposição e consumo rodam em um script Lua (EVALSHA), com o relógio do
+próprio Redis, então todos os workers enxergam o mesmo bucket.
+
+Pré-checagem local: quando o bucket está com mais da metade das fichas, o
+script entrega um lote (`RATE_LIMIT_LOCAL_BATCH`) de uma vez e o processo gasta
+as sobras sem ir ao Redis por até `RATE_LIMIT_LOCAL_LEASE_SECONDS`. As fichas do
+lote já saíram do bucket, então o limite global nunca é excedido; perto do
+limite o script volta a entregar uma ficha por vez.
+"""
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from apps.common import metrics
+from apps.common.redis import get_redis
+
+# KEYS[1] = bucket; ARGV = capacidade, fichas por segundo, tamanho do lote
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local batch = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+
+local granted = 0
+if tokens >= 1 then
+  granted = 1
+  if batch > 1 and tokens - batch >= capacity / 2 then
+    granted = batch
+  end
+  tokens = tokens - granted
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+
+local retry_ms = 0
+if granted == 0 then
+  retry_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+return {granted, math.floor(tokens), retry_ms}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    name: str
+    prefix: str
+    methods: Tuple[str, ...]
+    per_minute: int
+    burst: int
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_minute / 60
+
+    def matches(self, path: str, method: str) -> bool:
+        return path.startswith(self.prefix) and (not self.methods or method in self.methods)
+
+
+def load_rules(config: List[dict]) -> List[RateLimitRule]:
+    return [
+        RateLimitRule(
+            name=entry["name"],
+            prefix=entry["prefix"],
+            methods=tuple(method.upper() for method in entry.get("methods", ())),
+            per_minute=int(entry["per_minute"]),
+            burst=int(entry.get("burst") or entry["per_minute"]),
+        )
+        for entry in config
+    ]
+
+
+def match_rule(rules: List[RateLimitRule], path: str, method: str) -> Optional[RateLimitRule]:
+    return next((rule for rule in rules if rule.matches(path, method)), None)
+
+
+_jwt = JWTAuthentication()
+
+
+def client_ip(request) -> str:
+    """IP do cliente: com `RATE_LIMIT_TRUSTED_PROXIES` proxies na frente, a entrada que o mais externo deles anexou ao X-Forwarded-For."""
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "unknown")
+
+
+def client_identity(request) -> str:
+    """`user:<id>` para JWT válido ou sessão autenticada; senão `ip:<ip>`."""
+    header = _jwt.get_header(request)
+    if header is not None:
+        raw = _jwt.get_raw_token(header)
+        if raw is not None:
+            try:
+                token = _jwt.get_validated_token(raw)
+                return f"user:{token[jwt_settings.USER_ID_CLAIM]}"
+            except (InvalidToken, TokenError, KeyError):
+                pass
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    retry_after_seconds: int = 0
+
+
+class TokenBucketLimiter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # bucket -> [fichas locais, expira em (monotonic)]
+        self._leases: Dict[str, list] = {}
+        self._script = None
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._leases = {}
+
+    def _take_local(self, key: str, now: float) -> bool:
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                return False
+            if lease[1] <= now or lease[0] <= 0:
+                del self._leases[key]
+                return False
+            lease[0] -= 1
+            return True
+
+    def _store_lease(self, key: str, tokens: int, now: float) -> None:
+        with self._lock:
+            if len(self._leases) >= settings.RATE_LIMIT_LOCAL_MAX_KEYS:
+                self._leases = {k: lease for k, lease in self._leases.items() if lease[1] > now}
+                if len(self._leases) >= settings.RATE_LIMIT_LOCAL_MAX_KEYS:
+                    return
+            self._leases[key] = [tokens, now + settings.RATE_LIMIT_LOCAL_LEASE_SECONDS]
+
+    def acquire(self, key: str, capacity: int, refill_per_second: float, batch: int) -> Tuple[int, int, int]:
+        """Roda o script: `(fichas entregues, fichas restantes, retry em ms)`."""
+        client = get_redis()
+        if self._script is None:
+            self._script = client.register_script(TOKEN_BUCKET_LUA)
+        granted, remaining, retry_ms = self._script(keys=[key], args=[capacity, refill_per_second, batch], client=client)
+        return int(granted), int(remaining), int(retry_ms)
+
+    def hit(self, rule: RateLimitRule, identity: str) -> Decision:
+        key = f"rate_limit:{rule.name}:{identity}"
+        now = time.monotonic()
+        if self._take_local(key, now):
+            metrics.increment("rate_limit_checks_total", source="local")
+            return Decision(True)
+
+        # Lote limitado a 10% do burst: em limites baixos cada requisição vai ao Redis
+        batch = max(1, min(settings.RATE_LIMIT_LOCAL_BATCH, rule.burst // 10))
+        granted, _, retry_ms = self.acquire(key, rule.burst, rule.refill_per_second, batch)
+        metrics.increment("rate_limit_checks_total", source="redis")
+        if granted == 0:
+            metrics.increment("rate_limit_rejected_total", rule=rule.name)
+            return Decision(False, max(1, math.ceil(retry_ms / 1000)))
+        if granted > 1:
+            self._store_lease(key, granted - 1, now)
+        return Decision(True)
+
+
+limiter = TokenBucketLimiter()
+
+# Fichas locais herdadas seriam gastas em dobro por pai e filho
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=limiter.reset)
@@ -1,9 +1,144 @@
+"""Clientes Redis do processo sobre `ConnectionPool`s compartilhados.
+
+`get_redis()` devolve clientes leves sobre um único pool por processo: as
+conexões TCP são reaproveitadas entre requisições e threads (até
+`REDIS_MAX_CONNECTIONS`), com timeouts curtos para o caminho da requisição e
+health check das conexões ociosas. Leituras bloqueantes (pub/sub, XREADGROUP)
+usam `get_blocking_redis()`, de outro pool, sem timeout de leitura.
+
+Os comandos de `get_redis()` (inclusive pipelines) passam por um circuit
+breaker: depois de `REDIS_CIRCUIT_FAILURE_THRESHOLD` erros de conexão/timeout
+seguidos, falham na hora com `RedisUnavailable` (subclasse de
+`redis.ConnectionError`) por `REDIS_CIRCUIT_RESET_SECONDS`, e então um único
+comando testa o Redis de novo. Cada ponto de uso decide o modo degradado no
+seu `except`. O cliente bloqueante fica fora do circuito: quem o usa são
+workers com laço de retry próprio.
+
+Depois de um fork o filho descarta os pools (as conexões pertencem ao pai) e
+o estado do circuito, e cria os seus no primeiro uso.
+"""
+import os
+import threading
+from typing import Optional
+
 import redis
 from django.conf import settings
+from redis.client import Pipeline
 
-def get_redis() -> redis.Redis:
-    return redis.Redis(
+from apps.common.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+_pool: Optional[redis.ConnectionPool] = None
+_blocking_pool: Optional[redis.ConnectionPool] = None
+_breaker: Optional[CircuitBreaker] = None
+_pool_lock = threading.Lock()
+
+
+class RedisUnavailable(CircuitOpenError, redis.ConnectionError):
+    """Circuito aberto: o comando nem chegou a ser enviado."""
+
+
+def _new_pool(socket_timeout: Optional[float]) -> redis.ConnectionPool:
+    return redis.ConnectionPool(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
         decode_responses=True,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_timeout=socket_timeout,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
     )
+
+
+def get_pool() -> redis.ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _new_pool(settings.REDIS_SOCKET_TIMEOUT)
+    return _pool
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _pool_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    "redis",
+                    failure_threshold=settings.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+                    reset_seconds=settings.REDIS_CIRCUIT_RESET_SECONDS,
+                    failure_types=(redis.ConnectionError, redis.TimeoutError),
+                    open_error=RedisUnavailable,
+                )
+    return _breaker
+
+
+class GuardedPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        return get_circuit_breaker().call(super().execute, raise_on_error)
+
+
+class GuardedRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        return get_circuit_breaker().call(super().execute_command, *args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> GuardedPipeline:
+        return GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def get_redis() -> redis.Redis:
+    return GuardedRedis(connection_pool=get_pool())
+
+
+def get_blocking_redis() -> redis.Redis:
+    """Cliente para leituras que esperam indefinidamente (pub/sub, XREADGROUP com BLOCK)."""
+    global _blocking_pool
+    if _blocking_pool is None:
+        with _pool_lock:
+            if _blocking_pool is None:
+                _blocking_pool = _new_pool(None)
+    return redis.Redis(connection_pool=_blocking_pool)
+
+
+class RedisBatch:
+    """Comandos enfileirados em um pipeline e enviados em um único round trip ao sair do `with`.
+
+    Sem MULTI/EXEC por padrão; com exceção dentro do bloco nada é enviado.
+    """
+
+    def __init__(self, client: redis.Redis, transaction: bool):
+        self.pipe = client.pipeline(transaction=transaction)
+        self.results: list = []
+
+    def __getattr__(self, command):
+        return getattr(self.pipe, command)
+
+    def __enter__(self) -> "RedisBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.results = self.pipe.execute()
+        else:
+            self.pipe.reset()
+        return False
+
+
+def pipelined(client: Optional[redis.Redis] = None, transaction: bool = False) -> RedisBatch:
+    """`with pipelined() as batch: batch.incr(k); batch.expire(k, 60)`; respostas em `batch.results`."""
+    return RedisBatch(client or get_redis(), transaction)
+
+
+def reset_pools() -> None:
+    """Esquece os pools e o circuito (sem fechar: no filho de um fork os sockets ainda são do pai)."""
+    global _pool, _blocking_pool, _breaker, _pool_lock
+    _pool = None
+    _blocking_pool = None
+    _breaker = None
+    # O lock pode ter sido herdado travado por outra thread do pai
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_pools)
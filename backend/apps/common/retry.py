@@ -0,0 +1,50 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+# MySQL/InnoDB: 1213 = deadlock, 1205 = lock wait timeout
+MYSQL_LOCK_ERRORS = {1213, 1205}
+
+
+def is_lock_conflict(exc: OperationalError) -> bool:
+    code = exc.args[0] if exc.args else None
+    if code in MYSQL_LOCK_ERRORS:
+        return True
+    return "database is locked" in str(exc)
+
+
+def retry_on_lock_conflict(func):
+    """Reexecuta a transação em deadlock / lock wait timeout com backoff exponencial e jitter.
+
+    Deve envolver o `transaction.atomic` (decorator externo): cada tentativa é
+    uma transação nova. Dentro de um atomic externo não há retry, pois o banco
+    já descartou a transação inteira.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.DB_LOCK_RETRY_ATTEMPTS
+        base_delay = settings.DB_LOCK_RETRY_BASE_DELAY_MS / 1000
+        for attempt in range(1, attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_lock_conflict(exc) or connection.in_atomic_block:
+                    raise
+                if attempt == attempts:
+                    metrics.increment("db_lock_retry_exhausted_total", operation=func.__name__)
+                    raise
+                metrics.increment("db_lock_retries_total", operation=func.__name__)
+                delay = base_delay * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                logger.warning("lock_conflict_retry op=%s attempt=%s delay_ms=%.0f", func.__name__, attempt, delay * 1000)
+                time.sleep(delay)
+
+    return wrapper
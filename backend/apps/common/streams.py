@@ -0,0 +1,246 @@
+"""Consumidores de Redis Streams com consumer group (`manage.py consume_events`).
+
+Eventos entram no stream com XADD (campos `event_id`, `event_type` e
+`payload` em JSON). Cada processo consumidor entra no mesmo grupo com um nome
+próprio: o Redis distribui as mensagens entre eles, então escalar é subir mais
+processos. Por ciclo o consumidor:
+
+* lê até `batch_size` mensagens novas com XREADGROUP (bloqueando até
+  `block_ms` quando não há nada);
+* descarta eventos cujo `event_id` o grupo já processou (marca no Redis com
+  validade `dedupe_seconds`, gravada antes do XACK);
+* chama o handler registrado para o `event_type` com um `StreamEvent`
+  (`event_id`, id da mensagem, tipo e payload) e confirma as processadas em
+  um único XACK por lote;
+* de tempos em tempos reassume com XAUTOCLAIM mensagens pendentes há mais de
+  `claim_idle_ms` (consumidor que morreu ou handler que falhou). Depois de
+  `max_deliveries` entregas com falha a mensagem vai para `<stream>:dead`.
+
+Entrega é pelo menos uma vez: a marca por `event_id` cobre republicações
+dentro da validade, mas um handler que falhe depois de um efeito parcial é
+reexecutado, então efeitos externos devem ser idempotentes (`event.event_id`).
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import redis
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    event_id: str
+    message_id: str
+    event_type: str
+    payload: dict
+
+
+Handler = Callable[[StreamEvent], None]
+
+_handlers: Dict[str, Dict[str, Handler]] = defaultdict(dict)
+
+
+def stream_handler(stream: str, event_type: str):
+    """Registra `func(event)` para os eventos `event_type` do stream."""
+
+    def register(func: Handler) -> Handler:
+        _handlers[stream][event_type] = func
+        return func
+
+    return register
+
+
+def handlers_for(stream: str) -> Dict[str, Handler]:
+    return dict(_handlers.get(stream, {}))
+
+
+def dead_letter_stream(stream: str) -> str:
+    return f"{stream}:dead"
+
+
+def _id_ms(message_id: str) -> int:
+    return int(message_id.split("-", 1)[0])
+
+
+@dataclass
+class BatchStats:
+    processed: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    dead: int = 0
+    max_lag_ms: int = 0
+
+    def merge(self, other: "BatchStats") -> None:
+        self.processed += other.processed
+        self.skipped += other.skipped
+        self.duplicates += other.duplicates
+        self.failed += other.failed
+        self.dead += other.dead
+        self.max_lag_ms = max(self.max_lag_ms, other.max_lag_ms)
+
+
+class StreamConsumer:
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str,
+        group: str,
+        consumer: str,
+        handlers: Dict[str, Handler],
+        batch_size: int = 100,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+        dedupe_seconds: int = 86400,
+    ):
+        self.redis = client
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dedupe_seconds = dedupe_seconds
+        self._claim_cursor = "0-0"
+        self._next_claim = 0.0
+
+    def ensure_group(self) -> None:
+        """Cria o grupo (e o stream) lendo desde o início; grupo já existente não é erro."""
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def poll(self, block: bool = True) -> BatchStats:
+        """Um ciclo: reassume pendentes vencidas (se for a hora), lê novas, processa e confirma."""
+        messages = self._reclaim()
+        reclaimed = {message_id for message_id, _ in messages}
+        if len(messages) < self.batch_size:
+            response = self.redis.xreadgroup(
+                self.group,
+                self.consumer,
+                {self.stream: ">"},
+                count=self.batch_size - len(messages),
+                block=self.block_ms if block and not messages else None,
+            )
+            for _, entries in response or []:
+                messages.extend(entries)
+        return self._process(messages, reclaimed)
+
+    def _reclaim(self) -> List[Tuple[str, Optional[dict]]]:
+        if time.monotonic() < self._next_claim:
+            return []
+        next_cursor, messages, *_ = self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=self.claim_idle_ms,
+            start_id=self._claim_cursor,
+            count=self.batch_size,
+        )
+        self._claim_cursor = next_cursor
+        if next_cursor in ("0-0", b"0-0"):
+            # Varredura completa da lista de pendentes: próxima só depois do tempo ocioso
+            self._next_claim = time.monotonic() + self.claim_idle_ms / 1000
+        return list(messages)
+
+    def _exhausted(self, message_id: str) -> bool:
+        pending = self.redis.xpending_range(self.stream, self.group, min=message_id, max=message_id, count=1)
+        return bool(pending) and pending[0]["times_delivered"] >= self.max_deliveries
+
+    def _done_key(self, event_id: str) -> str:
+        return f"{self.stream}:{self.group}:done:{event_id}"
+
+    def _already_done(self, messages: List[Tuple[str, Optional[dict]]]) -> Set[str]:
+        """`event_id`s do lote que o grupo já processou (um MGET por lote)."""
+        if not self.dedupe_seconds:
+            return set()
+        event_ids = list({str(fields["event_id"]) for _, fields in messages if fields and "event_id" in fields})
+        if not event_ids:
+            return set()
+        flags = self.redis.mget([self._done_key(event_id) for event_id in event_ids])
+        return {event_id for event_id, flag in zip(event_ids, flags) if flag is not None}
+
+    def _process(self, messages: List[Tuple[str, Optional[dict]]], reclaimed: Set[str]) -> BatchStats:
+        stats = BatchStats()
+        acks = []
+        done = self._already_done(messages)
+        handled = []
+        now_ms = int(time.time() * 1000)
+        for message_id, fields in messages:
+            if not fields:
+                # Entrada removida pelo MAXLEN enquanto pendente
+                acks.append(message_id)
+                continue
+
+            handler = self.handlers.get(fields.get("event_type"))
+            if handler is None:
+                stats.skipped += 1
+                acks.append(message_id)
+                continue
+
+            event_id = str(fields.get("event_id", ""))
+            if event_id and event_id in done:
+                # Republicação (relay reenviou o lote) ou reentrega de um evento já processado
+                stats.duplicates += 1
+                logger.info("stream event duplicate stream=%s id=%s event_id=%s", self.stream, message_id, event_id)
+                acks.append(message_id)
+                continue
+
+            event = StreamEvent(event_id, message_id, fields["event_type"], json.loads(fields["payload"]))
+            try:
+                handler(event)
+            except Exception:
+                stats.failed += 1
+                logger.exception("stream handler failed stream=%s id=%s type=%s", self.stream, message_id, fields.get("event_type"))
+                if message_id in reclaimed and self._exhausted(message_id):
+                    self.redis.xadd(dead_letter_stream(self.stream), {**fields, "source_id": message_id, "group": self.group})
+                    stats.dead += 1
+                    acks.append(message_id)
+                continue
+
+            stats.processed += 1
+            stats.max_lag_ms = max(stats.max_lag_ms, now_ms - _id_ms(message_id))
+            acks.append(message_id)
+            if event_id:
+                done.add(event_id)
+                handled.append(event_id)
+
+        if handled and self.dedupe_seconds:
+            # Marca antes do XACK: uma queda entre os dois vira duplicata descartada, não reprocessamento
+            pipe = self.redis.pipeline(transaction=False)
+            for event_id in handled:
+                pipe.set(self._done_key(event_id), 1, ex=self.dedupe_seconds)
+            pipe.execute()
+        if acks:
+            self.redis.xack(self.stream, self.group, *acks)
+
+        labels = {"stream": self.stream, "group": self.group}
+        for name, value in (
+            ("stream_events_processed_total", stats.processed),
+            ("stream_events_duplicate_total", stats.duplicates),
+            ("stream_events_failed_total", stats.failed),
+            ("stream_events_dead_lettered_total", stats.dead),
+        ):
+            if value:
+                metrics.increment(name, value, **labels)
+        return stats
+
+    def group_lag(self) -> dict:
+        """Pendentes (entregues e não confirmadas) e atraso (ainda não entregues) do grupo."""
+        for info in self.redis.xinfo_groups(self.stream):
+            if info["name"] == self.group:
+                return {"pending": info["pending"], "lag": info.get("lag")}
+        return {"pending": 0, "lag": None}
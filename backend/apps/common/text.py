@@ -0,0 +1,14 @@
+"""Normalização de texto para chaves de busca (sem acento, minúsculas, só dígitos)."""
+import re
+import unicodedata
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().strip()
+
+
+def digits(text: str) -> str:
+    return _NON_DIGITS.sub("", text or "")
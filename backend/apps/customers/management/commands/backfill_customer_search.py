@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.customers.models import SEARCH_SOURCES, Customer
+
+
+class Command(BaseCommand):
+    help = "Preenche as colunas de busca normalizadas (documento, email, telefone) dos clientes existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="clientes por lote")
+
+    def handle(self, *args, batch_size, **kwargs):
+        if batch_size < 1:
+            raise CommandError("--batch-size deve ser maior que zero")
+
+        fields = ("id", *SEARCH_SOURCES.values(), *SEARCH_SOURCES)
+        scanned = updated = 0
+        last_id = 0
+        while True:
+            # Lotes por faixa de id (inclui removidos): sem OFFSET e sem tocar `updated_at`
+            batch = list(Customer.all_objects.filter(id__gt=last_id).order_by("id").only(*fields)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            changed = [customer for customer in batch if customer.normalize_search_fields()]
+            if changed:
+                Customer.all_objects.bulk_update(changed, list(SEARCH_SOURCES))
+            scanned += len(batch)
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {updated} de {scanned} clientes atualizados."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+# Linhas existentes ficam com as colunas vazias até rodar
+# `python manage.py backfill_customer_search` (em lotes, idempotente).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='cpf_cnpj_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='email_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['cpf_cnpj_digits'], name='customers_cpf_cnp_f846c3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['email_normalized'], name='customers_email_n_c5946a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_digits'], name='customers_phone_d_e271b2_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_customer_search_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at'], name='customers_updated_a69b42_idx'),
+        ),
+    ]
@@ -1,5 +1,14 @@
 from django.db import models
 from apps.common.soft_delete import SoftDeleteModel
+from apps.common.text import digits
+
+# Colunas de busca derivadas dos campos digitados (ver `Customer.normalize_search_fields`)
+SEARCH_SOURCES = {
+    'cpf_cnpj_digits': 'cpf_cnpj',
+    'email_normalized': 'email',
+    'phone_digits': 'phone',
+}
+
 
 class Customer(SoftDeleteModel):
     name = models.CharField(max_length=255)
@@ -9,6 +18,11 @@ class Customer(SoftDeleteModel):
     address = models.TextField(blank=True, default='')
     is_active = models.BooleanField(default=True)
 
+    # Sombras normalizadas para busca indexada por igualdade/prefixo
+    cpf_cnpj_digits = models.CharField(max_length=20, blank=True, default='', editable=False)
+    email_normalized = models.CharField(max_length=254, blank=True, default='', editable=False)
+    phone_digits = models.CharField(max_length=50, blank=True, default='', editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -18,7 +32,32 @@ class Customer(SoftDeleteModel):
             models.Index(fields=['cpf_cnpj']),
             models.Index(fields=['email']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['created_at', 'id']),  # paginação por cursor
+            models.Index(fields=['updated_at']),  # MAX(updated_at) do ETag das listas
+            models.Index(fields=['cpf_cnpj_digits']),
+            models.Index(fields=['email_normalized']),
+            models.Index(fields=['phone_digits']),
         ]
 
     def __str__(self) -> str:
         return f'{self.name} ({self.cpf_cnpj})'
+
+    def normalize_search_fields(self) -> list:
+        """Recalcula as colunas de busca; devolve as que mudaram."""
+        values = {
+            'cpf_cnpj_digits': digits(self.cpf_cnpj),
+            'email_normalized': (self.email or '').strip().lower(),
+            'phone_digits': digits(self.phone),
+        }
+        changed = [field for field, value in values.items() if getattr(self, field) != value]
+        for field in changed:
+            setattr(self, field, values[field])
+        return changed
+
+    def save(self, *args, **kwargs):
+        self.normalize_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            shadows = [shadow for shadow, source in SEARCH_SOURCES.items() if source in update_fields]
+            kwargs['update_fields'] = list(update_fields) + shadows
+        super().save(*args, **kwargs)
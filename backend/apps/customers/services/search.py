@@ -0,0 +1,87 @@
+"""Busca de clientes (`?search=`) roteada pelo formato do termo.
+
+* email (tem `@`): igualdade em `email_normalized` quando completo, senão prefixo.
+* documento (dígitos com `.`/`/`): igualdade em `cpf_cnpj_digits` com 14
+  dígitos (CNPJ completo), senão prefixo; 11 dígitos podem ser um CPF completo
+  ou um CNPJ pela metade, e o intervalo do prefixo cobre os dois.
+* telefone (dígitos com `(`, `)`, `+` ou espaço): prefixo em `phone_digits`.
+* só dígitos (ou com `-`): prefixo em documento ou telefone.
+* demais termos: `icontains` no nome, palavra a palavra.
+
+Prefixos de dígitos viram intervalo (`>= p AND < p+1`), que usa o índice em
+qualquer banco/collation; prefixo de email é `LIKE 'p%'`.
+"""
+import re
+
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from apps.common.text import digits
+
+SEARCH_PARAM = "search"
+CNPJ_LENGTH = 14
+_FULL_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_NUMERIC = re.compile(r"^[\d\s()+.\-/]+$")
+
+
+def _digit_prefix(field: str, prefix: str) -> Q:
+    stripped = prefix.rstrip("9")
+    if not stripped:
+        return Q(**{f"{field}__gte": prefix})
+    upper = stripped[:-1] + str(int(stripped[-1]) + 1)
+    return Q(**{f"{field}__gte": prefix, f"{field}__lt": upper})
+
+
+def _document(number: str) -> Q:
+    if len(number) == CNPJ_LENGTH:
+        return Q(cpf_cnpj_digits=number)
+    return _digit_prefix("cpf_cnpj_digits", number)
+
+
+def route(term: str):
+    """(tipo, condição) para o termo: tipo em email | document | phone | number | name."""
+    term = (term or "").strip()
+    if "@" in term:
+        email = term.lower()
+        if _FULL_EMAIL.match(email):
+            return "email", Q(email_normalized=email)
+        return "email", Q(email_normalized__startswith=email)
+
+    number = digits(term)
+    if number and _NUMERIC.match(term):
+        if any(ch in term for ch in "./"):
+            return "document", _document(number)
+        if any(ch in term for ch in "()+ "):
+            return "phone", _digit_prefix("phone_digits", number)
+        return "number", _document(number) | _digit_prefix("phone_digits", number)
+
+    condition = Q()
+    for word in term.split():
+        condition &= Q(name__icontains=word)
+    return "name", condition
+
+
+def search_customers(queryset, term: str):
+    _, condition = route(term)
+    return queryset.filter(condition)
+
+
+class CustomerSearchFilter(BaseFilterBackend):
+    """`?search=` por documento, email ou telefone (colunas normalizadas e indexadas) ou nome."""
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(SEARCH_PARAM, "").strip()
+        if not term:
+            return queryset
+        return search_customers(queryset, term)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": SEARCH_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "CPF/CNPJ, email ou telefone (com ou sem pontuação, por prefixo) ou parte do nome.",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import CustomerListCreateView, CustomerRetrieveView
+from .views import CustomerLookupView, CustomerListCreateView, CustomerRetrieveView
 
 urlpatterns = [
     path('customers', CustomerListCreateView.as_view(), name='customers-list-create'),
+    path('customers/lookup', CustomerLookupView.as_view(), name='customers-lookup'),
     path('customers/<int:pk>', CustomerRetrieveView.as_view(), name='customers-detail'),
 ]
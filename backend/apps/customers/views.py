@@ -1,19 +1,25 @@
 from rest_framework import filters, generics
+from rest_framework.response import Response
 
+from apps.common.conditional import ConditionalListMixin, not_modified, set_validators, weak_etag
+from apps.common.lookup import LookupIndex, LookupView
+from apps.common.pagination import CursorOrOffsetPagination
 from apps.common.permissions import ProfilePermission
+from apps.common.text import digits, normalize
 from .models import Customer
 from .serializers import CustomerCreateSerializer, CustomerDetailSerializer
+from .services.search import CustomerSearchFilter
 
 
-class CustomerListCreateView(generics.ListCreateAPIView):
+class CustomerListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = CustomerCreateSerializer
     permission_classes = [ProfilePermission]
+    pagination_class = CursorOrOffsetPagination
     allowed_profiles_by_method = {
         "GET": ["admin", "manager", "operator", "viewer"],
         "POST": ["admin", "manager"],
     }
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["name", "cpf_cnpj", "email", "phone"]
+    filter_backends = [CustomerSearchFilter, filters.OrderingFilter]
     ordering_fields = ["created_at", "name", "email"]
     ordering = ["-created_at"]
 
@@ -32,3 +38,34 @@ class CustomerRetrieveView(generics.RetrieveAPIView):
     allowed_profiles_by_method = {
         "GET": ["admin", "manager", "operator", "viewer"],
     }
+
+    def retrieve(self, request, *args, **kwargs):
+        customer = self.get_object()
+        etag = weak_etag("customer", customer.pk, customer.updated_at.isoformat())
+        response = not_modified(request, etag, customer.updated_at)
+        if response is None:
+            response = Response(self.get_serializer(customer).data)
+        return set_validators(response, etag, customer.updated_at)
+
+
+def _customer_keys(row):
+    _, _, _, _, name, cpf_cnpj, email = row
+    words = normalize(name).split()
+    return [normalize(name), *words[1:], digits(cpf_cnpj), normalize(email)]
+
+
+customer_lookup_index = LookupIndex(
+    Customer,
+    fields=("name", "cpf_cnpj", "email"),
+    keys=_customer_keys,
+    label=lambda row: f"{row[4]} ({row[5]})",
+)
+
+
+class CustomerLookupView(LookupView):
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "GET": ["admin", "manager", "operator", "viewer"],
+    }
+    lookup_index = customer_lookup_index
+
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.orders'
+
+    def ready(self):
+        # Registra os handlers de stream (manage.py consume_events)
+        from apps.orders.domain import events  # noqa: F401
@@ -1,13 +1,38 @@
+"""Eventos de domínio de pedidos via outbox transacional.
+
+A escrita do pedido grava o evento em `order_domain_events` na mesma transação
+(um INSERT, nada de Redis no caminho da requisição): se a transação for
+desfeita o evento some junto, e se o processo morrer depois do commit o evento
+continua lá. O worker `manage.py relay_events` lê os pendentes em lote,
+grava no stream `domain_events:orders` (XADD em um pipeline do Redis) e marca
+o lote como enviado com um UPDATE. Os handlers abaixo rodam nos processos de
+`manage.py consume_events` (consumer group, ver `apps/common/streams.py`).
+
+Entrega é pelo menos uma vez: uma queda entre o XADD e o commit do lote
+republica os mesmos eventos. O consumidor descarta `event_id` já processado
+pelo grupo; handlers com efeitos externos recebem `event.event_id` para
+deduplicar também do lado de lá.
+"""
 import json
 import logging
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 
 from apps.common.redis import get_redis
+from apps.common.streams import StreamEvent, stream_handler
 from apps.orders.models import Order, OrderDomainEvent
 
 logger = logging.getLogger(__name__)
 
+ORDER_STATUS_CHANGED = "ORDER_STATUS_CHANGED"
+STREAM = "domain_events:orders"
+
 
-def publish_order_status_changed(order: Order, from_status: str, to_status: str, note: str = "") -> None:
+def publish_order_status_changed(order: Order, from_status: str, to_status: str, note: str = "") -> OrderDomainEvent:
+    """Grava o evento no outbox; chamar dentro da transação da mudança de status."""
     payload = {
         "order_id": order.id,
         "number": order.number,
@@ -15,14 +40,46 @@ def publish_order_status_changed(order: Order, from_status: str, to_status: str,
         "to_status": to_status,
         "note": note,
     }
-    OrderDomainEvent.objects.create(event_type="ORDER_STATUS_CHANGED", order=order, payload=payload)
-    try:
-        get_redis().publish("domain_events:orders", json.dumps(payload))
-    except Exception:
-        logger.warning("failed to publish domain event to redis")
+    return OrderDomainEvent.objects.create(event_type=ORDER_STATUS_CHANGED, order=order, payload=payload)
+
+
+def relay_pending_events(batch_size: int) -> int:
+    """Grava no stream até `batch_size` eventos pendentes (em ordem de id); retorna quantos foram enviados.
+
+    O lote fica travado com SKIP LOCKED até o UPDATE final, então vários
+    workers podem rodar em paralelo sem publicar o mesmo evento. Falha no Redis
+    desfaz a transação e o lote volta a ficar pendente.
+    """
+    with transaction.atomic():
+        events: List[OrderDomainEvent] = list(
+            OrderDomainEvent.objects.select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                STREAM,
+                {"event_id": event.id, "event_type": event.event_type, "payload": json.dumps(event.payload)},
+                maxlen=settings.EVENT_STREAM_MAXLEN,
+                approximate=True,
+            )
+        pipe.execute()
 
-    consume_order_status_changed(payload)
+        OrderDomainEvent.objects.filter(id__in=[event.id for event in events]).update(sent_at=timezone.now())
+    return len(events)
 
 
-def consume_order_status_changed(payload: dict) -> None:
-    logger.info("order_status_changed_consumed order=%s from=%s to=%s", payload["order_id"], payload["from_status"], payload["to_status"])
+@stream_handler(STREAM, ORDER_STATUS_CHANGED)
+def consume_order_status_changed(event: StreamEvent) -> None:
+    payload = event.payload
+    logger.info(
+        "order_status_changed_consumed event=%s order=%s from=%s to=%s",
+        event.event_id,
+        payload["order_id"],
+        payload["from_status"],
+        payload["to_status"],
+    )
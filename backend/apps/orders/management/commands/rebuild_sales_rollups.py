@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.orders.services.sales_rollup import rebuild_day
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os agregados diários de vendas a partir dos pedidos "
+        "(um dia por transação, com as linhas do dia travadas; pode rodar com tráfego)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="day_from", type=date.fromisoformat, help="AAAA-MM-DD (padrão: dia do primeiro pedido)")
+        parser.add_argument("--to", dest="day_to", type=date.fromisoformat, help="AAAA-MM-DD, inclusive (padrão: hoje)")
+
+    def handle(self, *args, day_from, day_to, **kwargs):
+        day_to = day_to or timezone.localdate()
+        if day_from is None:
+            first = Order.all_objects.aggregate(first=Min("created_at"))["first"]
+            if first is None:
+                self.stdout.write("Nenhum pedido: nada a recalcular.")
+                return
+            day_from = timezone.localdate(first)
+        if day_from > day_to:
+            raise CommandError("--from deve ser menor ou igual a --to")
+
+        days = rows = 0
+        day = day_from
+        while day <= day_to:
+            rows += rebuild_day(day)
+            days += 1
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {days} dias recalculados ({rows} linhas)."))
@@ -0,0 +1,44 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.orders.domain.events import relay_pending_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publica no Redis os eventos de domínio pendentes do outbox (worker contínuo)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_RELAY_BATCH_SIZE, help="eventos por lote")
+        parser.add_argument(
+            "--idle", type=float, default=settings.OUTBOX_RELAY_IDLE_SECONDS, help="espera (s) quando não há pendentes"
+        )
+        parser.add_argument("--once", action="store_true", help="esvazia o outbox e termina")
+
+    def handle(self, *args, batch_size, idle, once, **kwargs):
+        if batch_size < 1:
+            raise CommandError("--batch-size deve ser maior que zero")
+
+        total = 0
+        while True:
+            try:
+                sent = relay_pending_events(batch_size)
+            except Exception:
+                # Lote continua pendente; tenta de novo após a espera
+                logger.exception("outbox relay failed")
+                if once:
+                    raise
+                time.sleep(idle)
+                continue
+
+            total += sent
+            if sent < batch_size:
+                if once:
+                    break
+                time.sleep(idle)
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {total} eventos publicados."))
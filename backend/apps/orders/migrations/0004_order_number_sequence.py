@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_orderitem_order_items_order_i_26ad88_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'order_number_sequences',
+            },
+        ),
+    ]
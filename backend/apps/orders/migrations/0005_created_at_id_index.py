@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_created_at_id_index'),
+        ('orders', '0004_order_number_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='orders_created_f67d2c_idx'),
+        ),
+    ]
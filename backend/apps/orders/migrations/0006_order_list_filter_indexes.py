@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_created_at_id_index'),
+        ('orders', '0005_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='orders_status_11db6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['total', 'created_at'], name='orders_total_5a020d_idx'),
+        ),
+    ]
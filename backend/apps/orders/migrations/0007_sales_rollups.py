@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_customer_search_columns'),
+        ('orders', '0006_order_list_filter_indexes'),
+        ('products', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesDailyStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('qty', models.BigIntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('PENDENTE', 'PENDENTE'), ('CONFIRMADO', 'CONFIRMADO'), ('SEPARADO', 'SEPARADO'), ('ENVIADO', 'ENVIADO'), ('ENTREGUE', 'ENTREGUE'), ('CANCELADO', 'CANCELADO')], max_length=16)),
+                ('slot', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sales_daily_status',
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'slot'), name='uq_sales_daily_status')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesDailyCustomer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('qty', models.BigIntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='customers.customer')),
+            ],
+            options={
+                'db_table': 'sales_daily_customer',
+                'indexes': [models.Index(fields=['customer', 'day'], name='sales_daily_custome_1c190c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'customer'), name='uq_sales_daily_customer')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesDailyProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('qty', models.BigIntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='products.product')),
+            ],
+            options={
+                'db_table': 'sales_daily_product',
+                'indexes': [models.Index(fields=['product', 'day'], name='sales_daily_product_e98297_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='uq_sales_daily_product')],
+            },
+        ),
+    ]
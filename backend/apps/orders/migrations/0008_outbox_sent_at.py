@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_sent(apps, schema_editor):
+    # Eventos anteriores ao outbox já foram publicados pelo hook de commit
+    OrderDomainEvent = apps.get_model("orders", "OrderDomainEvent")
+    OrderDomainEvent.objects.filter(sent_at__isnull=True).update(sent_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderdomainevent',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_sent, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='orderdomainevent',
+            index=models.Index(fields=['sent_at', 'id'], name='order_domai_sent_at_4006e8_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 07:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_outbox_sent_at'),
+        ('products', '0004_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesdailyproduct',
+            name='slot',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='salesdailyproduct',
+            constraint=models.UniqueConstraint(fields=('day', 'product', 'slot'), name='uq_sales_daily_product_slot'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='salesdailyproduct',
+            name='uq_sales_daily_product',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_updated_at_index'),
+        ('orders', '0009_sales_daily_product_slots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='orders_updated_1bd457_idx'),
+        ),
+    ]
@@ -23,7 +23,14 @@ class Order(SoftDeleteModel):
         constraints = [
             models.UniqueConstraint(fields=["customer", "idempotency_key"], name="uq_order_customer_idempotency"), # garante que o mesmo cliente não crie múltiplas ordens com a mesma chave de idempotência
         ]
-        indexes = [models.Index(fields=["customer", "created_at"]), models.Index(fields=["status"])] # índices para consultas frequentes por cliente, data de criação e status
+        indexes = [
+            models.Index(fields=["customer", "created_at"]),
+            models.Index(fields=["status"]),
+            models.Index(fields=["created_at", "id"]),  # paginação por cursor
+            models.Index(fields=["updated_at"]),  # MAX(updated_at) do ETag das listas
+            models.Index(fields=["status", "created_at"]),  # filtros da listagem
+            models.Index(fields=["total", "created_at"]),
+        ] # índices para consultas frequentes por cliente, data de criação e status
 
 
 class OrderItem(models.Model):
@@ -57,10 +64,91 @@ class OrderStatusHistory(models.Model):
 
 
 class OrderDomainEvent(models.Model):
+    """Outbox: gravado na transação da escrita, publicado depois por `manage.py relay_events`."""
+
     event_type = models.CharField(max_length=64)
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="domain_events")
     payload = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         db_table = "order_domain_events"
+        indexes = [
+            models.Index(fields=["sent_at", "id"]),  # pendentes em ordem de id
+        ]
+
+
+class OrderNumberSequence(models.Model):
+    """Contador hi/lo: cada processo reserva um bloco de números de pedido por vez."""
+
+    name = models.CharField(max_length=32, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = "order_number_sequences"
+
+
+class SalesRollup(models.Model):
+    """Agregado diário de vendas, mantido na mesma transação das escritas de pedido (`services/sales_rollup.py`)."""
+
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    qty = models.BigIntegerField(default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class SalesDailyProduct(SalesRollup):
+    """Vendas por produto e dia (pedidos cancelados não entram), em slots.
+
+    Como no agregado por status, cada escrita soma em um slot aleatório: pedidos
+    concorrentes do mesmo SKU quente não disputam uma única linha (o lock dela
+    dura até o commit do pedido). A leitura soma os slots.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="+")
+    slot = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = "sales_daily_product"
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product", "slot"], name="uq_sales_daily_product_slot"),
+        ]
+        indexes = [
+            models.Index(fields=["product", "day"]),
+        ]
+
+
+class SalesDailyCustomer(SalesRollup):
+    """Vendas por cliente e dia (pedidos cancelados não entram)."""
+
+    customer = models.ForeignKey(Customer, on_delete=models.PROTECT, related_name="+")
+
+    class Meta:
+        db_table = "sales_daily_customer"
+        constraints = [
+            models.UniqueConstraint(fields=["day", "customer"], name="uq_sales_daily_customer"),
+        ]
+        indexes = [
+            models.Index(fields=["customer", "day"]),
+        ]
+
+
+class SalesDailyStatus(SalesRollup):
+    """Pedidos por status atual e dia, em slots (toda criação soma na mesma linha do dia).
+
+    Cada escrita soma em um slot aleatório; a leitura soma os slots. Um slot
+    isolado pode ficar negativo (a saída de um status cai em outro slot).
+    """
+
+    status = models.CharField(max_length=16, choices=OrderStatus.choices)
+    slot = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = "sales_daily_status"
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status", "slot"], name="uq_sales_daily_status"),
+        ]
@@ -1,3 +1,7 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.orders.domain.enums import OrderStatus
@@ -16,6 +20,93 @@ class OrderCreateSerializer(serializers.Serializer):
     items = OrderCreateItemSerializer(many=True)
 
 
+class OrderPreviewSerializer(serializers.Serializer):
+    items = OrderCreateItemSerializer(many=True)
+
+
+class OrderPreviewLineOutSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    sku = serializers.CharField()
+    name = serializers.CharField()
+    qty = serializers.IntegerField()
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    subtotal = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class OrderPreviewOutSerializer(serializers.Serializer):
+    items = OrderPreviewLineOutSerializer(many=True)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class OrderListFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=OrderStatus.choices, required=False)
+    customer_id = serializers.IntegerField(min_value=1, required=False)
+    created_from = serializers.DateTimeField(required=False)
+    created_to = serializers.DateTimeField(required=False)
+    total_min = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    total_max = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    number = serializers.CharField(max_length=32, required=False, help_text="prefixo do número")
+
+
+class OrderExportParamsSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    rows = serializers.ChoiceField(
+        choices=["orders", "items"], default="orders", help_text="uma linha por pedido ou por item"
+    )
+    status = serializers.ChoiceField(choices=OrderStatus.choices, required=False)
+
+    def get_fields(self):
+        # `from`/`to` são palavras reservadas: declarados aqui em vez de atributos de classe
+        fields = super().get_fields()
+        fields["from"] = serializers.DateTimeField(required=False, help_text="created_at >= from")
+        fields["to"] = serializers.DateTimeField(required=False, help_text="created_at <= to")
+        return fields
+
+
+# group_by -> filtro da própria dimensão
+SALES_REPORT_FILTERS = {"product": "product_id", "customer": "customer_id", "status": "status"}
+
+
+class SalesReportParamsSerializer(serializers.Serializer):
+    group_by = serializers.ChoiceField(choices=list(SALES_REPORT_FILTERS), default="status")
+    period = serializers.ChoiceField(
+        choices=["day", "total"], default="day", help_text="uma linha por dia ou o total do período"
+    )
+    product_id = serializers.IntegerField(min_value=1, required=False)
+    customer_id = serializers.IntegerField(min_value=1, required=False)
+    status = serializers.ChoiceField(choices=OrderStatus.choices, required=False)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField(required=False, help_text="dia inicial (padrão: 30 dias atrás)")
+        fields["to"] = serializers.DateField(required=False, help_text="dia final, inclusive (padrão: hoje)")
+        return fields
+
+    def validate(self, attrs):
+        day_to = attrs.get("to") or timezone.localdate()
+        day_from = attrs.get("from") or day_to - timedelta(days=29)
+        if day_from > day_to:
+            raise serializers.ValidationError({"from": "deve ser menor ou igual a to"})
+        if (day_to - day_from).days >= settings.SALES_REPORT_MAX_DAYS:
+            raise serializers.ValidationError({"from": f"período máximo de {settings.SALES_REPORT_MAX_DAYS} dias"})
+
+        key_field = SALES_REPORT_FILTERS[attrs["group_by"]]
+        for group, field in SALES_REPORT_FILTERS.items():
+            if field in attrs and field != key_field:
+                raise serializers.ValidationError({field: f"disponível apenas com group_by={group}"})
+        return {**attrs, "from": day_from, "to": day_to, "key": attrs.get(key_field)}
+
+
+class SalesReportRowSerializer(serializers.Serializer):
+    day = serializers.DateField(required=False)
+    product_id = serializers.IntegerField(required=False)
+    customer_id = serializers.IntegerField(required=False)
+    status = serializers.CharField(required=False)
+    revenue = serializers.DecimalField(max_digits=16, decimal_places=2)
+    qty = serializers.IntegerField()
+    order_count = serializers.IntegerField()
+
+
 class OrderItemOutSerializer(serializers.ModelSerializer):
     product_id = serializers.IntegerField(source="product.id")
     product_name = serializers.CharField(source="product.name", read_only=True)
@@ -0,0 +1,151 @@
+"""Cache read-through do payload de `GET /orders/<pk>` (OrderDetailSerializer).
+
+Cada pedido tem um contador de versão no Redis, incrementado no commit de
+toda escrita (criação, mudança de status, cancelamento). O payload guardado
+carrega a versão lida *antes* de consultar o banco; só é servido se ainda for
+igual à versão atual, então um payload montado antes de um commit nunca é
+servido depois dele. Versão e payload são lidos em um único MGET.
+
+O bump também apaga o payload. Se ele falhar (Redis fora, circuito aberto), o
+pedido entra em uma lista local de invalidações pendentes: enquanto ela não
+for reaplicada, este processo lê esse pedido direto do banco, e cada leitura
+tenta reaplicar as pendentes. Passado o TTL do payload a pendência expira
+sozinha (o payload antigo já saiu do Redis). Outros processos com Redis
+acessível podem servir o payload antigo até o reenvio ou o TTL; a falha é
+registrada em log e em `order_detail_cache_invalidation_failures_total`.
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.common import metrics
+from apps.common.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Acima disso, em vez de lembrar pedido a pedido, o cache inteiro fica de lado até o TTL
+MAX_PENDING_INVALIDATIONS = 10000
+
+_pending_lock = threading.Lock()
+# order_id -> instante (monotonic) em que o payload antigo certamente expirou
+_pending: Dict[int, float] = {}
+_bypass_until = 0.0
+
+
+def _version_key(order_id: int) -> str:
+    return f"order:detail:ver:{order_id}"
+
+
+def _payload_key(order_id: int) -> str:
+    return f"order:detail:{order_id}"
+
+
+def reset_pending_invalidations() -> None:
+    global _bypass_until
+    with _pending_lock:
+        _pending.clear()
+        _bypass_until = 0.0
+
+
+def _remember_failed(order_ids: List[int]) -> None:
+    global _bypass_until
+    expires = time.monotonic() + settings.ORDER_DETAIL_CACHE_TTL_SECONDS
+    with _pending_lock:
+        for order_id in order_ids:
+            _pending[order_id] = expires
+        if len(_pending) > MAX_PENDING_INVALIDATIONS:
+            _bypass_until = expires
+            _pending.clear()
+
+
+def _must_bypass(order_id: int) -> bool:
+    """Reaplica os bumps pendentes; True se o payload deste pedido ainda pode estar velho."""
+    now = time.monotonic()
+    with _pending_lock:
+        for pending_id in [pid for pid, expires in _pending.items() if expires <= now]:
+            del _pending[pending_id]
+        retry = list(_pending)
+        bypass_all = _bypass_until > now
+    if retry:
+        try:
+            _bump(retry)
+        except Exception:
+            pass
+        else:
+            with _pending_lock:
+                for pending_id in retry:
+                    _pending.pop(pending_id, None)
+    with _pending_lock:
+        return bypass_all or order_id in _pending
+
+
+def get_order_detail(order_id: int, load: Callable[[], Tuple[dict, datetime]]) -> Tuple[dict, datetime]:
+    """`(payload, updated_at)` do pedido, do cache quando a versão confere; senão `load()` e grava."""
+    ttl = settings.ORDER_DETAIL_CACHE_TTL_SECONDS
+    if _must_bypass(order_id):
+        metrics.increment("order_detail_cache_misses_total")
+        return load()
+    try:
+        client = get_redis()
+        version, raw = client.mget(_version_key(order_id), _payload_key(order_id))
+    except Exception:
+        logger.warning("order detail cache unavailable, reading from database")
+        metrics.increment("order_detail_cache_misses_total")
+        return load()
+
+    version = int(version or 0)
+    if raw:
+        cached = json.loads(raw)
+        if cached["v"] == version:
+            metrics.increment("order_detail_cache_hits_total")
+            return cached["data"], parse_datetime(cached["updated_at"])
+
+    metrics.increment("order_detail_cache_misses_total")
+    payload, updated_at = load()
+    try:
+        pipe = client.pipeline(transaction=False)
+        # A versão vive mais que qualquer payload que a referencia: se expirasse
+        # antes, o contador recomeçaria e uma versão antiga poderia voltar a valer
+        pipe.set(_version_key(order_id), 0, nx=True, ex=ttl * 2)
+        pipe.expire(_version_key(order_id), ttl * 2)
+        pipe.set(_payload_key(order_id), json.dumps({"v": version, "data": payload, "updated_at": updated_at.isoformat()}, cls=JSONEncoder), ex=ttl)
+        pipe.execute()
+    except Exception:
+        logger.warning("order detail cache write failed for order %s", order_id)
+    return payload, updated_at
+
+
+def _bump(order_ids: List[int]) -> None:
+    ttl = settings.ORDER_DETAIL_CACHE_TTL_SECONDS
+    pipe = get_redis().pipeline(transaction=False)
+    for order_id in order_ids:
+        pipe.incr(_version_key(order_id))
+        pipe.expire(_version_key(order_id), ttl * 2)
+        pipe.delete(_payload_key(order_id))
+    pipe.execute()
+
+
+def bump_order_detail_versions(order_ids: Iterable[int]) -> None:
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    try:
+        _bump(order_ids)
+    except Exception:
+        # Sem o bump, o payload antigo ainda valeria até o TTL: este processo deixa de ler o cache desses pedidos
+        logger.warning("order detail cache invalidation failed for orders %s", order_ids, exc_info=True)
+        metrics.increment("order_detail_cache_invalidation_failures_total")
+        _remember_failed(order_ids)
+
+
+def invalidate_order_detail_on_commit(*order_ids: int) -> None:
+    """Agenda o incremento de versão para depois do commit da transação corrente."""
+    transaction.on_commit(lambda: bump_order_detail_versions(order_ids))
@@ -0,0 +1,283 @@
+"""Geração de números de pedido sem colisão entre processos e hosts.
+
+Modos (`ORDER_NUMBER_GENERATOR`):
+
+* ``sequence`` (padrão): cada processo reserva no banco um bloco de
+  `ORDER_NUMBER_BLOCK_SIZE` números (hi/lo) e os distribui em memória; só há
+  round trip a cada bloco.
+* ``snowflake``: tempo (ms) + worker id (10 bits) + sequência (12 bits), sem
+  round trip algum. Cada processo precisa de um worker id único
+  (`ORDER_NUMBER_WORKER_ID`; se vazio, é arrendado no Redis com `SET NX` e TTL
+  e renovado em segundo plano). Sem Redis, ou com o arrendamento perdido, a
+  geração falha em vez de arriscar um id repetido.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from apps.common.redis import get_redis
+from apps.orders.models import OrderNumberSequence
+
+logger = logging.getLogger(__name__)
+
+GENERATOR_SEQUENCE = "sequence"
+GENERATOR_SNOWFLAKE = "snowflake"
+
+
+class WorkerIdLeaseLost(RuntimeError):
+    pass
+
+
+class WorkerIdLease:
+    """Worker id exclusivo: chave `order_numbers:worker:<id>` com TTL, renovada por uma thread.
+
+    Enquanto a chave existe ninguém mais consegue o id (`SET NX`), então
+    renovar com `EXPIRE` é seguro. Localmente o id só vale até metade do TTL
+    depois da última renovação bem-sucedida: passado isso a chave pode ter
+    expirado no Redis e outro processo pode estar com o mesmo id.
+    """
+
+    KEY = "order_numbers:worker:{}"
+
+    def __init__(self, worker_id: int, token: str, ttl: int):
+        self.worker_id = worker_id
+        self.token = token
+        self.ttl = ttl
+        self.valid_until = 0.0
+        self._stop = threading.Event()
+
+    @classmethod
+    def acquire(cls, ttl: int) -> "WorkerIdLease":
+        client = get_redis()
+        token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        size = SnowflakeNumberGenerator.MAX_WORKER_ID + 1
+        # Cursor só espalha as tentativas; a exclusividade vem do SET NX
+        start = client.incr("order_numbers:worker_cursor")
+        for offset in range(size):
+            worker_id = (start + offset) % size
+            started = time.monotonic()
+            if client.set(cls.KEY.format(worker_id), token, nx=True, ex=ttl):
+                lease = cls(worker_id, token, ttl)
+                lease.valid_until = started + ttl / 2
+                return lease
+        raise WorkerIdLeaseLost(f"todos os {size} worker ids estão arrendados")
+
+    def renew(self) -> bool:
+        started = time.monotonic()
+        if started >= self.valid_until:
+            return False
+        try:
+            renewed = get_redis().expire(self.KEY.format(self.worker_id), self.ttl)
+        except Exception:
+            logger.warning("order number worker id %s lease renewal failed", self.worker_id)
+            return False
+        if renewed:
+            self.valid_until = started + self.ttl / 2
+        else:
+            # Chave sumiu (removida à mão): não há como saber se o id foi reutilizado
+            self.valid_until = 0.0
+        return bool(renewed)
+
+    def check(self) -> None:
+        if time.monotonic() >= self.valid_until:
+            raise WorkerIdLeaseLost(f"arrendamento do worker id {self.worker_id} expirou")
+
+    def start_renewal(self) -> None:
+        def loop():
+            while not self._stop.wait(self.ttl / 3):
+                self.renew()
+
+        threading.Thread(target=loop, name="order-number-worker-lease", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class SnowflakeNumberGenerator:
+    EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+    MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+    def __init__(self, worker_id: int, lease: Optional[WorkerIdLease] = None):
+        if not 0 <= worker_id <= self.MAX_WORKER_ID:
+            raise ImproperlyConfigured(f"ORDER_NUMBER_WORKER_ID deve estar entre 0 e {self.MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _next_value(self) -> int:
+        now = int(time.time() * 1000)
+        if now < self._last_ms:
+            # Relógio voltou: espera alcançar o último instante usado
+            time.sleep((self._last_ms - now) / 1000)
+            now = self._last_ms
+        if now == self._last_ms:
+            self._sequence = (self._sequence + 1) & self.MAX_SEQUENCE
+            if self._sequence == 0:
+                while now <= self._last_ms:
+                    now = int(time.time() * 1000)
+        else:
+            self._sequence = 0
+        self._last_ms = now
+        return (
+            ((now - self.EPOCH_MS) << (self.WORKER_BITS + self.SEQUENCE_BITS))
+            | (self.worker_id << self.SEQUENCE_BITS)
+            | self._sequence
+        )
+
+    def next_numbers(self, count: int) -> List[str]:
+        if self.lease is not None:
+            self.lease.check()
+        with self._lock:
+            return [str(self._next_value()) for _ in range(count)]
+
+    def next_number(self) -> str:
+        return self.next_numbers(1)[0]
+
+
+class SequenceBlockNumberGenerator:
+    NAME = "orders"
+
+    def __init__(self, block_size: int):
+        if block_size < 1:
+            raise ImproperlyConfigured("ORDER_NUMBER_BLOCK_SIZE deve ser maior que zero")
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _reserve(self, size: int) -> int:
+        """Avança a linha do contador em `size` e devolve o novo `next_value` (fim exclusivo da faixa)."""
+        # Conexão própria: o bloco é reservado mesmo que a transação do pedido
+        # faça rollback, e o lock da linha dura só o UPDATE + SELECT, que rodam
+        # na mesma transação (em autocommit, dois processos poderiam ler o mesmo
+        # valor final e receber o mesmo bloco). SQLite (modo local/testes) tem
+        # um único escritor: uma segunda conexão travaria contra a transação
+        # corrente, então usa a própria conexão.
+        shared = connections[DEFAULT_DB_ALIAS]
+        if shared.vendor == "sqlite":
+            with transaction.atomic(using=shared.alias):
+                return self._reserve_on(shared, size)
+
+        conn = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            conn.set_autocommit(False)
+            try:
+                end = self._reserve_on(conn, size)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return end
+        finally:
+            conn.close()
+
+    def _reserve_on(self, conn, size: int) -> int:
+        table = OrderNumberSequence._meta.db_table
+        with conn.cursor() as cursor:
+            cursor.execute(f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s", [size, self.NAME])
+            if not cursor.rowcount:
+                # Primeira reserva: corrida no INSERT cai na unique de `name` e refaz o UPDATE
+                try:
+                    with transaction.atomic(using=conn.alias) if conn is connections[conn.alias] else nullcontext():
+                        cursor.execute(f"INSERT INTO {table} (name, next_value) VALUES (%s, %s)", [self.NAME, 1 + size])
+                    return 1 + size
+                except IntegrityError:
+                    cursor.execute(f"UPDATE {table} SET next_value = next_value + %s WHERE name = %s", [size, self.NAME])
+            cursor.execute(f"SELECT next_value FROM {table} WHERE name = %s", [self.NAME])
+            return cursor.fetchone()[0]
+
+    def next_numbers(self, count: int) -> List[str]:
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    connection = connections[DEFAULT_DB_ALIAS]
+                    if connection.vendor == "sqlite" and connection.in_atomic_block:
+                        # A reserva entra na transação do pedido: se ela for desfeita a
+                        # linha volta, então nada fica em memória, só o necessário agora
+                        needed = count - len(numbers)
+                        end = self._reserve(needed)
+                        numbers.extend(f"{value:012d}" for value in range(end - needed, end))
+                        break
+                    end = self._reserve(self.block_size)
+                    self._next, self._end = end - self.block_size, end
+                numbers.append(f"{self._next:012d}")
+                self._next += 1
+        return numbers
+
+    def next_number(self) -> str:
+        return self.next_numbers(1)[0]
+
+
+def _snowflake_generator() -> SnowflakeNumberGenerator:
+    configured = settings.ORDER_NUMBER_WORKER_ID
+    if configured is not None:
+        return SnowflakeNumberGenerator(int(configured))
+    # Sem Redis a exceção sobe: um id sorteado poderia colidir com outro processo vivo
+    lease = WorkerIdLease.acquire(settings.ORDER_NUMBER_WORKER_LEASE_SECONDS)
+    lease.start_renewal()
+    logger.info("order number worker id %s leased", lease.worker_id)
+    return SnowflakeNumberGenerator(lease.worker_id, lease=lease)
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_order_number_generator():
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                mode = settings.ORDER_NUMBER_GENERATOR
+                if mode == GENERATOR_SNOWFLAKE:
+                    _generator = _snowflake_generator()
+                elif mode == GENERATOR_SEQUENCE:
+                    _generator = SequenceBlockNumberGenerator(settings.ORDER_NUMBER_BLOCK_SIZE)
+                else:
+                    raise ImproperlyConfigured(f"ORDER_NUMBER_GENERATOR inválido: {mode}")
+    return _generator
+
+
+def reset_order_number_generator() -> None:
+    global _generator
+    lease = getattr(_generator, "lease", None)
+    if lease is not None:
+        # Só para a renovação; no filho de um fork a chave continua sendo do pai
+        lease.stop()
+    _generator = None
+
+
+def next_order_numbers(count: int) -> List[str]:
+    return get_order_number_generator().next_numbers(count)
+
+
+def next_order_number() -> str:
+    return get_order_number_generator().next_number()
+
+
+# Processo filho (fork de gunicorn etc.) não pode herdar sequência/bloco/worker id do pai
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_order_number_generator)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting: Optional[str] = None, **kwargs) -> None:
+    if setting and setting.startswith("ORDER_NUMBER_"):
+        reset_order_number_generator()
@@ -2,18 +2,30 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+from django.conf import settings
 from django.db import IntegrityError, transaction
-from django.utils import timezone
 
-from apps.common.redis import get_redis
+from apps.common.retry import retry_on_lock_conflict
 from apps.customers.models import Customer
 from apps.orders.domain.enums import OrderStatus
 from apps.orders.domain.events import publish_order_status_changed
 from apps.orders.domain.transitions import can_transition
 from apps.orders.models import Order, OrderItem, OrderStatusHistory
+from apps.orders.services.order_cache import invalidate_order_detail_on_commit
+from apps.orders.services.order_numbers import next_order_number, next_order_numbers
+from apps.orders.services.sales_rollup import record_orders_created, record_status_change
 from apps.products.models import Product
+from apps.products.services.catalog import get_catalog
+from apps.products.services.stock_service import (
+    RESERVATION_OPTIMISTIC,
+    aggregate_quantities,
+    apply_stock_deltas,
+    load_products,
+    release_to_shards,
+    reserve_from_shards,
+)
 
 
 @dataclass(frozen=True)
@@ -30,6 +42,11 @@ class CreateOrderInput:
     items: List[CreateOrderItemInput]
 
 
+BATCH_CREATED = "created"
+BATCH_REPLAYED = "replayed"
+BATCH_FAILED = "failed"
+
+
 class BusinessError(Exception):
     status_code = 400
 
@@ -42,8 +59,48 @@ class ConflictError(BusinessError):
     status_code = 409
 
 
-def _generate_order_number() -> str:
-    return timezone.now().strftime("%Y%m%d%H%M%S%f")
+@dataclass
+class BatchOrderResult:
+    status: str
+    order: Optional[Order] = None
+    error: Optional[BusinessError] = None
+
+
+@dataclass(frozen=True)
+class OrderPreviewLine:
+    product_id: int
+    sku: str
+    name: str
+    qty: int
+    unit_price: Decimal
+    subtotal: Decimal
+
+
+@dataclass(frozen=True)
+class OrderPreview:
+    items: List[OrderPreviewLine]
+    total: Decimal
+
+
+def _attach_related(order: Order, items: List[OrderItem], history: List[OrderStatusHistory]) -> Order:
+    """Anexa itens e histórico já em memória, como um prefetch, para a serialização não consultar o banco."""
+    cache = getattr(order, "_prefetched_objects_cache", None)
+    if cache is None:
+        cache = order._prefetched_objects_cache = {}
+    for name, objects in (("items", items), ("status_history", history)):
+        queryset = getattr(order, name).all()
+        queryset._result_cache = list(objects)
+        queryset._prefetch_done = True
+        cache[name] = queryset
+    return order
+
+
+def _load_related(order: Order) -> tuple:
+    items = list(OrderItem.objects.filter(order_id=order.id).select_related("product"))
+    history = list(
+        OrderStatusHistory.objects.filter(order_id=order.id).select_related("changed_by").order_by("changed_at", "id")
+    )
+    return items, history
 
 
 def _order_qs():
@@ -53,10 +110,74 @@ def _order_qs():
     )
 
 
+def _reserve_stock(qty_by_product: Dict[int, int], products_by_id: Dict[int, Product], optimistic: bool) -> None:
+    deltas = {}
+    # Slots de produtos diferentes também travam em ordem de PK
+    for product_id, qty in sorted(qty_by_product.items()):
+        product = products_by_id[product_id]
+        if not product.stock_shard_count:
+            deltas[product_id] = -qty
+        elif not reserve_from_shards(product, qty):
+            raise ConflictError(f"estoque insuficiente para SKU {product.sku}")
+
+    if not optimistic:
+        # Linhas já travadas e validadas: o guard do UPDATE nunca deveria falhar.
+        if apply_stock_deltas(deltas) != len(deltas):
+            raise ConflictError("estoque insuficiente para um ou mais SKUs")
+        return
+
+    # Sem lock prévio, o número de linhas afetadas é a verificação real de saldo.
+    # O savepoint desfaz a baixa parcial para identificar o SKU sem estoque.
+    sid = transaction.savepoint()
+    if apply_stock_deltas(deltas) == len(deltas):
+        transaction.savepoint_commit(sid)
+        return
+
+    transaction.savepoint_rollback(sid)
+    current = dict(Product.objects.filter(id__in=deltas.keys()).values_list("id", "stock_qty"))
+    for product_id in deltas:
+        if current.get(product_id, 0) < qty_by_product[product_id]:
+            raise ConflictError(f"estoque insuficiente para SKU {products_by_id[product_id].sku}")
+    raise ConflictError("estoque insuficiente para um ou mais SKUs")
+
+
 class OrderService:
     @staticmethod
-    @transaction.atomic
+    def preview_order(items: List[CreateOrderItemInput]) -> OrderPreview:
+        """Preços e total pelo snapshot do catálogo, sem lock nem reserva (não valida estoque)."""
+        if not items:
+            raise BusinessError("items não pode ser vazio")
+
+        catalog = get_catalog()
+        lines = []
+        for it in items:
+            entry = catalog.get(it.product_id)
+            if not entry:
+                raise NotFoundError("um ou mais produtos não foram encontrados")
+            if not entry.is_active:
+                raise ConflictError(f"produto {entry.id} inativo")
+            lines.append(
+                OrderPreviewLine(
+                    product_id=entry.id,
+                    sku=entry.sku,
+                    name=entry.name,
+                    qty=int(it.qty),
+                    unit_price=entry.price,
+                    subtotal=entry.price * Decimal(int(it.qty)),
+                )
+            )
+        return OrderPreview(items=lines, total=sum((line.subtotal for line in lines), Decimal("0.00")))
+
+    @staticmethod
     def create_order(data: CreateOrderInput) -> Order:
+        order, _ = OrderService.create_or_replay_order(data)
+        return order
+
+    @staticmethod
+    @retry_on_lock_conflict
+    @transaction.atomic
+    def create_or_replay_order(data: CreateOrderInput) -> Tuple[Order, bool]:
+        """Cria o pedido; retorna `(pedido, True)` ou `(pedido existente, False)` em retry idempotente."""
         if not data.items:
             raise BusinessError("items não pode ser vazio")
 
@@ -69,96 +190,93 @@ class OrderService:
         if not customer.is_active:
             raise ConflictError("cliente inativo")
 
-        # Idempotência: Redis (best-effort)
-        redis = get_redis()
-        redis_key = f"idem:order:{customer.id}:{data.idempotency_key}"
-        try:
-            existing_id = redis.get(redis_key)
-            if existing_id:
-                return _order_qs().get(id=int(existing_id))
-        except Exception:
-            pass
-
-        # Idempotência: banco (fonte de verdade)
+        # Idempotência do pedido: banco (fonte de verdade). Retries com o
+        # header Idempotency-Key são respondidos antes, pela camada HTTP.
         existing = _order_qs().filter(customer=customer, idempotency_key=data.idempotency_key).first()
         if existing:
-            return existing
+            return existing, False
 
         product_ids = [it.product_id for it in data.items]
 
-        # Lock pessimista dos produtos
-        products = list(Product.objects.select_for_update().filter(id__in=product_ids))
+        # Pessimista: lock dos produtos antes de validar.
+        # Otimista: leitura sem lock; a baixa condicional decide no final.
+        optimistic = settings.STOCK_RESERVATION_MODE == RESERVATION_OPTIMISTIC
+        products = load_products(product_ids, lock=not optimistic)
         if len(products) != len(set(product_ids)):
             raise NotFoundError("um ou mais produtos não foram encontrados")
 
         products_by_id = {p.id: p for p in products}
+        qty_by_product = aggregate_quantities(data.items)
 
         # Valida ativo + estoque suficiente (tudo ou nada)
         for it in data.items:
             product = products_by_id[it.product_id]
             if not product.is_active:
                 raise ConflictError(f"produto {product.id} inativo")
-            if product.stock_qty < it.qty:
+            # SKUs fragmentados são validados na própria reserva dos slots.
+            if not product.stock_shard_count and product.stock_qty < qty_by_product[product.id]:
                 raise ConflictError(f"estoque insuficiente para SKU {product.sku}")
 
-        # Criar pedido (race-safe via unique constraint)
+        # Linhas e total calculados em memória: o número de round trips dentro
+        # da seção com lock não depende da quantidade de itens.
+        lines = []
+        total = Decimal("0.00")
+        for it in data.items:
+            unit_price = Decimal(products_by_id[it.product_id].price)
+            subtotal = unit_price * Decimal(int(it.qty))
+            lines.append((it, unit_price, subtotal))
+            total += subtotal
+
+        # Criar pedido já com o total final (race-safe via unique constraint)
         try:
             order = Order.objects.create(
                 customer=customer,
-                number=_generate_order_number(),
+                number=next_order_number(),
                 status=OrderStatus.PENDENTE,
                 observations=data.observations or "",
                 idempotency_key=data.idempotency_key,
-                total=Decimal("0.00"),
+                total=total,
             )
         except IntegrityError:
-            return _order_qs().get(customer=customer, idempotency_key=data.idempotency_key)
-
-        total = Decimal("0.00")
-
-        for it in data.items:
-            product = products_by_id[it.product_id]
-            unit_price = Decimal(product.price)
-            subtotal = unit_price * Decimal(int(it.qty))
-
-            product.stock_qty -= int(it.qty)
-            product.save(update_fields=["stock_qty", "updated_at"])
-
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                qty=int(it.qty),
-                unit_price=unit_price,
-                subtotal=subtotal,
-            )
-            total += subtotal
+            existing = _order_qs().filter(customer=customer, idempotency_key=data.idempotency_key).first()
+            if not existing:
+                raise
+            return existing, False
+
+        items = OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product=products_by_id[it.product_id],
+                    qty=int(it.qty),
+                    unit_price=unit_price,
+                    subtotal=subtotal,
+                )
+                for it, unit_price, subtotal in lines
+            ]
+        )
 
-        order.total = total
-        order.save(update_fields=["total", "updated_at"])
+        # Baixa de estoque de todos os SKUs em um único UPDATE condicional
+        _reserve_stock(qty_by_product, products_by_id, optimistic=optimistic)
 
-        OrderStatusHistory.objects.create(
+        history = OrderStatusHistory.objects.create(
             order=order,
             from_status=OrderStatus.PENDENTE,
             to_status=OrderStatus.PENDENTE,
             changed_by=None,
             note="pedido criado",
         )
+        record_orders_created([(order, items)])
+        invalidate_order_detail_on_commit(order.id)
 
-        # Redis pós-commit (não afeta transação)
-        def _after_commit():
-            try:
-                redis.setex(redis_key, 60 * 60 * 24, order.id)
-            except Exception:
-                pass
-
-        transaction.on_commit(_after_commit)
-
-        return _order_qs().get(id=order.id)
+        # Agregado montado com o que acabou de ser gravado (sem re-consulta)
+        return _attach_related(order, items, [history]), True
 
     @staticmethod
+    @retry_on_lock_conflict
     @transaction.atomic
     def change_status(order_id: int, new_status: str, user=None, note: str = "") -> Order:
-        order = Order.objects.select_for_update().filter(id=order_id).first()
+        order = Order.objects.select_for_update().select_related("customer").filter(id=order_id).first()
         if not order:
             raise NotFoundError("pedido não encontrado")
 
@@ -169,60 +287,242 @@ class OrderService:
         order.status = new_status
         order.save(update_fields=["status", "updated_at"])
 
-        OrderStatusHistory.objects.create(
-            order=order,
-            from_status=old,
-            to_status=new_status,
-            changed_by=user,
-            note=note or "",
+        items, history = _load_related(order)
+        history.append(
+            OrderStatusHistory.objects.create(
+                order=order,
+                from_status=old,
+                to_status=new_status,
+                changed_by=user,
+                note=note or "",
+            )
         )
+        record_status_change(order, items, old, new_status)
+        publish_order_status_changed(order, old, new_status, note or "")
+        invalidate_order_detail_on_commit(order.id)
 
-        def _after_commit():
-            try:
-                publish_order_status_changed(order, old, new_status, note or "")
-            except Exception:
-                pass
-
-        transaction.on_commit(_after_commit)
-
-        return _order_qs().get(id=order.id)
+        return _attach_related(order, items, history)
 
     @staticmethod
+    @retry_on_lock_conflict
     @transaction.atomic
     def cancel_order(order_id: int, user=None, note: str = "") -> Order:
-        order = Order.objects.select_for_update().filter(id=order_id).first()
+        order = Order.objects.select_for_update().select_related("customer").filter(id=order_id).first()
         if not order:
             raise NotFoundError("pedido não encontrado")
 
         if order.status not in [OrderStatus.PENDENTE, OrderStatus.CONFIRMADO]:
             raise ConflictError("pedido não pode ser cancelado no status atual")
 
-        items = list(order.items.select_related("product").all())
+        items, history = _load_related(order)
+        qty_by_product = aggregate_quantities(items)
+        products_by_id = {item.product_id: item.product for item in items}
 
-        for item in items:
-            product = Product.objects.select_for_update().get(id=item.product_id)
-            product.stock_qty += item.qty
-            product.save(update_fields=["stock_qty", "updated_at"])
+        # Mesmo protocolo de lock da criação: uma query, ordem crescente de PK
+        load_products(qty_by_product.keys(), lock=True)
+
+        deltas = {}
+        for product_id, qty in qty_by_product.items():
+            if products_by_id[product_id].stock_shard_count:
+                release_to_shards(products_by_id[product_id], qty)
+            else:
+                deltas[product_id] = qty
+        apply_stock_deltas(deltas)
 
         old = order.status
         order.status = OrderStatus.CANCELADO
         order.save(update_fields=["status", "updated_at"])
 
-        OrderStatusHistory.objects.create(
-            order=order,
-            from_status=old,
-            to_status=OrderStatus.CANCELADO,
-            changed_by=user,
-            note=note or "pedido cancelado",
+        history.append(
+            OrderStatusHistory.objects.create(
+                order=order,
+                from_status=old,
+                to_status=OrderStatus.CANCELADO,
+                changed_by=user,
+                note=note or "pedido cancelado",
+            )
         )
+        record_status_change(order, items, old, OrderStatus.CANCELADO)
+        publish_order_status_changed(order, old, OrderStatus.CANCELADO, note or "")
+        invalidate_order_detail_on_commit(order.id)
 
-        def _after_commit():
-            try:
-                publish_order_status_changed(order, old, OrderStatus.CANCELADO, note or "")
-            except Exception:
-                pass
+        # IMPORTANTE: não deletar o pedido (auditoria / histórico)
+        return _attach_related(order, items, history)
 
-        transaction.on_commit(_after_commit)
+    @staticmethod
+    def create_orders_batch(inputs: List[CreateOrderInput]) -> List[BatchOrderResult]:
+        """Cria vários pedidos em uma transação, com resultado independente por pedido.
 
-        # IMPORTANTE: não deletar o pedido (auditoria / histórico)
-        return _order_qs().get(id=order.id)
+        Um pedido inválido (cliente, produto, estoque) falha sozinho. Se um
+        pedido concorrente gravar a mesma chave de idempotência durante o lote,
+        o lote é refeito uma vez e esse pedido passa a ser `replayed`.
+        """
+        try:
+            return _create_orders_batch(inputs)
+        except IntegrityError:
+            return _create_orders_batch(inputs)
+
+
+@retry_on_lock_conflict
+@transaction.atomic
+def _create_orders_batch(inputs: List[CreateOrderInput]) -> List[BatchOrderResult]:
+    results: List[Optional[BatchOrderResult]] = [None] * len(inputs)
+
+    def fail(index: int, error: BusinessError) -> None:
+        results[index] = BatchOrderResult(BATCH_FAILED, error=error)
+
+    pending = []
+    for index, data in enumerate(inputs):
+        if not data.items:
+            fail(index, BusinessError("items não pode ser vazio"))
+        elif any(it.qty <= 0 for it in data.items):
+            fail(index, BusinessError("qty deve ser maior que zero"))
+        else:
+            pending.append(index)
+
+    # Clientes e idempotência: uma query cada para o lote inteiro
+    customers = Customer.objects.in_bulk({inputs[i].customer_id for i in pending})
+    keys = {(inputs[i].customer_id, inputs[i].idempotency_key) for i in pending}
+    existing = {}
+    for o in Order.objects.filter(
+        customer_id__in={customer_id for customer_id, _ in keys},
+        idempotency_key__in={key for _, key in keys},
+    ).only("id", "customer_id", "idempotency_key"):
+        if (o.customer_id, o.idempotency_key) in keys:
+            existing[(o.customer_id, o.idempotency_key)] = o.id
+
+    replays: Dict[int, tuple] = {}
+    first_by_key: Dict[tuple, int] = {}
+    to_create = []
+    for index in pending:
+        data = inputs[index]
+        customer = customers.get(data.customer_id)
+        key = (data.customer_id, data.idempotency_key)
+        if not customer:
+            fail(index, NotFoundError("cliente não encontrado"))
+        elif not customer.is_active:
+            fail(index, ConflictError("cliente inativo"))
+        elif key in existing or key in first_by_key:
+            replays[index] = key
+        else:
+            first_by_key[key] = index
+            to_create.append(index)
+
+    # Lock único da união dos SKUs, em ordem de PK
+    product_ids = {it.product_id for i in to_create for it in inputs[i].items}
+    products_by_id = {p.id: p for p in load_products(product_ids, lock=True)}
+    available = {p.id: p.stock_qty for p in products_by_id.values() if not p.stock_shard_count}
+
+    accepted = []
+    deltas: Dict[int, int] = {}
+    for index in to_create:
+        data = inputs[index]
+        qty_by_product = aggregate_quantities(data.items)
+        if any(product_id not in products_by_id for product_id in qty_by_product):
+            fail(index, NotFoundError("um ou mais produtos não foram encontrados"))
+            continue
+
+        error = None
+        for it in data.items:
+            product = products_by_id[it.product_id]
+            if not product.is_active:
+                error = ConflictError(f"produto {product.id} inativo")
+            elif not product.stock_shard_count and available[product.id] < qty_by_product[product.id]:
+                error = ConflictError(f"estoque insuficiente para SKU {product.sku}")
+            if error:
+                break
+        if not error:
+            sharded = [(products_by_id[pid], qty) for pid, qty in sorted(qty_by_product.items()) if products_by_id[pid].stock_shard_count]
+            if sharded:
+                sid = transaction.savepoint()
+                failed = next((product for product, qty in sharded if not reserve_from_shards(product, qty)), None)
+                if failed:
+                    transaction.savepoint_rollback(sid)
+                    error = ConflictError(f"estoque insuficiente para SKU {failed.sku}")
+                else:
+                    transaction.savepoint_commit(sid)
+        if error:
+            fail(index, error)
+            continue
+
+        for product_id, qty in qty_by_product.items():
+            if product_id in available:
+                available[product_id] -= qty
+                deltas[product_id] = deltas.get(product_id, 0) - qty
+        accepted.append(index)
+
+    # Inserts em massa: pedidos, itens, histórico e uma única baixa de estoque
+    orders = []
+    for index, number in zip(accepted, next_order_numbers(len(accepted))):
+        data = inputs[index]
+        total = sum(
+            (Decimal(products_by_id[it.product_id].price) * Decimal(int(it.qty)) for it in data.items),
+            Decimal("0.00"),
+        )
+        orders.append(
+            Order(
+                customer=customers[data.customer_id],
+                number=number,
+                status=OrderStatus.PENDENTE,
+                observations=data.observations or "",
+                idempotency_key=data.idempotency_key,
+                total=total,
+            )
+        )
+    Order.objects.bulk_create(orders)
+    if orders and orders[0].pk is None:
+        # MySQL não retorna PKs no bulk insert
+        ids = dict(Order.objects.filter(number__in=[o.number for o in orders]).values_list("number", "id"))
+        for order in orders:
+            order.pk = ids[order.number]
+    invalidate_order_detail_on_commit(*(order.pk for order in orders))
+
+    items = []
+    for index, order in zip(accepted, orders):
+        for it in inputs[index].items:
+            unit_price = Decimal(products_by_id[it.product_id].price)
+            items.append(
+                OrderItem(
+                    order=order,
+                    product=products_by_id[it.product_id],
+                    qty=int(it.qty),
+                    unit_price=unit_price,
+                    subtotal=unit_price * Decimal(int(it.qty)),
+                )
+            )
+    OrderItem.objects.bulk_create(items)
+    history = OrderStatusHistory.objects.bulk_create(
+        [
+            OrderStatusHistory(
+                order=order,
+                from_status=OrderStatus.PENDENTE,
+                to_status=OrderStatus.PENDENTE,
+                changed_by=None,
+                note="pedido criado",
+            )
+            for order in orders
+        ]
+    )
+    if apply_stock_deltas(deltas) != len(deltas):
+        raise ConflictError("estoque insuficiente para um ou mais SKUs")
+
+    items_by_order: Dict[int, List[OrderItem]] = {}
+    for item in items:
+        items_by_order.setdefault(item.order.pk, []).append(item)
+    record_orders_created((order, items_by_order[order.pk]) for order in orders)
+    for index, order, entry in zip(accepted, orders, history):
+        _attach_related(order, items_by_order[order.pk], [entry])
+        results[index] = BatchOrderResult(BATCH_CREATED, order=order)
+
+    created_ids = {(o.customer_id, o.idempotency_key): o.id for o in orders}
+    loaded = {o.id: o for o in orders}
+    loaded.update(_order_qs().in_bulk({existing[key] for key in replays.values() if key in existing}))
+    for index, key in replays.items():
+        order_id = existing.get(key) or created_ids.get(key)
+        if order_id:
+            results[index] = BatchOrderResult(BATCH_REPLAYED, order=loaded[order_id])
+        else:
+            # A primeira ocorrência da chave neste lote falhou: a repetição falha igual
+            results[index] = results[first_by_key[key]]
+
+    return results
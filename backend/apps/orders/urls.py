@@ -1,9 +1,20 @@
 from django.urls import path
 
-from .views import OrderDetailCancelView, OrderListCreateView, OrderStatusPatchView
+from .views import (
+    OrderBatchCreateView,
+    OrderDetailCancelView,
+    OrderExportView,
+    OrderListCreateView,
+    OrderPreviewView,
+    OrderStatusPatchView,
+    SalesReportView,
+)
 
 urlpatterns = [
     path("orders", OrderListCreateView.as_view(), name="orders-list-create"),
+    path("orders/batch", OrderBatchCreateView.as_view(), name="orders-batch-create"),
+    path("orders/export", OrderExportView.as_view(), name="orders-export"),
+    path("orders/preview", OrderPreviewView.as_view(), name="orders-preview"),
     path("orders/<int:pk>", OrderDetailCancelView.as_view(), name="orders-detail-cancel"),
     path("orders/<int:pk>/status", OrderStatusPatchView.as_view(), name="orders-status"),
     # Alias para compatibilidade com contrato documentado `:id`.
@@ -12,4 +23,5 @@ urlpatterns = [
         OrderStatusPatchView.as_view(lookup_url_kwarg="id"),
         name="orders-status-id",
     ),
+    path("reports/sales", SalesReportView.as_view(), name="reports-sales"),
 ]
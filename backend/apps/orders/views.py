@@ -1,15 +1,35 @@
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import generics, status
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.response import Response
 
+from apps.common.conditional import ConditionalListMixin, not_modified, set_validators, weak_etag
+from apps.common.idempotency import idempotent
+from apps.common.pagination import CursorOrOffsetPagination
 from apps.common.permissions import ProfilePermission
+from apps.customers.models import Customer
 from apps.orders.models import Order
+from apps.orders.services.order_cache import get_order_detail
+from apps.orders.services.order_export import CONTENT_TYPES, export_orders
+from apps.orders.services.sales_rollup import sales_report
 from apps.orders.serializers import (
     OrderCreateSerializer,
     OrderDetailSerializer,
+    OrderExportParamsSerializer,
+    OrderListFilterSerializer,
     OrderListSerializer,
+    OrderPreviewOutSerializer,
+    OrderPreviewSerializer,
     OrderStatusPatchSerializer,
+    SalesReportParamsSerializer,
+    SalesReportRowSerializer,
 )
 from apps.orders.services.order_service import (
+    BATCH_FAILED,
     OrderService,
     CreateOrderInput,
     CreateOrderItemInput,
@@ -19,41 +39,81 @@ from apps.orders.services.order_service import (
 )
 
 
-class OrderListCreateView(generics.ListCreateAPIView):
+def _create_order_input(data: dict) -> CreateOrderInput:
+    return CreateOrderInput(
+        customer_id=data["customer_id"],
+        idempotency_key=data["idempotency_key"],
+        observations=data.get("observations", ""),
+        items=[CreateOrderItemInput(**item) for item in data["items"]],
+    )
+
+
+class OrderListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Order.objects.select_related("customer").all().order_by("-created_at")
     serializer_class = OrderListSerializer
     permission_classes = [ProfilePermission]
+    pagination_class = CursorOrOffsetPagination
     allowed_profiles_by_method = {
         "GET": ["admin", "manager", "operator", "viewer"],
         "POST": ["admin", "manager", "operator"],
     }
 
+    # Contrato: primeira criação => 201, retries idempotentes => 200
+    idempotency_replay_status = {status.HTTP_201_CREATED: status.HTTP_200_OK}
+
     def get_serializer_class(self):
         if self.request.method == "POST":
             return OrderCreateSerializer
         return OrderListSerializer
 
+    @extend_schema(parameters=[OrderListFilterSerializer])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def list_fingerprint(self, queryset) -> dict:
+        fingerprint = queryset.order_by().aggregate(last_updated=Max("updated_at"), total=Count("pk"))
+        # customer_name vem do cliente: MAX separado na ponta do índice de
+        # customers.updated_at, sem JOIN sobre o conjunto filtrado de pedidos
+        fingerprint["customers_updated"] = Customer.all_objects.aggregate(last=Max("updated_at"))["last"]
+        return fingerprint
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != "GET":
+            return queryset
+
+        # Cada filtro tem índice próprio: (status, created_at), (customer, created_at),
+        # (created_at, id), (total, created_at) e o unique de `number`
+        params = OrderListFilterSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        if "status" in filters:
+            queryset = queryset.filter(status=filters["status"])
+        if "customer_id" in filters:
+            queryset = queryset.filter(customer_id=filters["customer_id"])
+        if "created_from" in filters:
+            queryset = queryset.filter(created_at__gte=filters["created_from"])
+        if "created_to" in filters:
+            queryset = queryset.filter(created_at__lte=filters["created_to"])
+        if "total_min" in filters:
+            queryset = queryset.filter(total__gte=filters["total_min"])
+        if "total_max" in filters:
+            queryset = queryset.filter(total__lte=filters["total_max"])
+        if filters.get("number"):
+            # Prefixo como intervalo [p, p+1): usa o índice em qualquer banco (LIKE ... ESCAPE não usa no SQLite)
+            prefix = filters["number"]
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            queryset = queryset.filter(number__gte=prefix, number__lt=upper)
+        return queryset
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = OrderCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
-        # Para cumprir o contrato dos testes:
-        # primeira criação => 201, retries idempotentes => 200
-        existed = Order.objects.filter(
-            customer_id=data["customer_id"],
-            idempotency_key=data["idempotency_key"],
-        ).exists()
-
         try:
-            order = OrderService.create_order(
-                CreateOrderInput(
-                    customer_id=data["customer_id"],
-                    idempotency_key=data["idempotency_key"],
-                    observations=data.get("observations", ""),
-                    items=[CreateOrderItemInput(**item) for item in data["items"]],
-                )
-            )
+            order, created = OrderService.create_or_replay_order(_create_order_input(data))
         except NotFoundError as e:
             return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except ConflictError as e:
@@ -63,7 +123,124 @@ class OrderListCreateView(generics.ListCreateAPIView):
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         payload = OrderDetailSerializer(order).data
-        return Response(payload, status=status.HTTP_200_OK if existed else status.HTTP_201_CREATED)
+        return Response(payload, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+class OrderBatchCreateView(generics.GenericAPIView):
+    serializer_class = OrderCreateSerializer
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "POST": ["admin", "manager", "operator"],
+    }
+
+    def post(self, request, *args, **kwargs):
+        payloads = request.data
+        if not isinstance(payloads, list) or not payloads:
+            return Response({"detail": "envie uma lista de pedidos"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(payloads) > settings.ORDER_BATCH_MAX_SIZE:
+            return Response(
+                {"detail": f"lote excede o máximo de {settings.ORDER_BATCH_MAX_SIZE} pedidos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Payload inválido falha só o próprio pedido
+        results = [None] * len(payloads)
+        valid = []
+        for index, payload in enumerate(payloads):
+            serializer = OrderCreateSerializer(data=payload)
+            if serializer.is_valid():
+                valid.append((index, _create_order_input(serializer.validated_data)))
+            else:
+                results[index] = {
+                    "index": index,
+                    "status": BATCH_FAILED,
+                    "status_code": status.HTTP_400_BAD_REQUEST,
+                    "detail": serializer.errors,
+                }
+
+        outcomes = OrderService.create_orders_batch([data for _, data in valid])
+        for (index, _), outcome in zip(valid, outcomes):
+            if outcome.status == BATCH_FAILED:
+                results[index] = {
+                    "index": index,
+                    "status": outcome.status,
+                    "status_code": outcome.error.status_code,
+                    "detail": str(outcome.error),
+                }
+            else:
+                results[index] = {
+                    "index": index,
+                    "status": outcome.status,
+                    "order": OrderDetailSerializer(outcome.order).data,
+                }
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class _ExportNegotiation(DefaultContentNegotiation):
+    """`?format=` aqui é o formato do arquivo, não o override de renderer do DRF (erros saem em JSON)."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class OrderExportView(generics.GenericAPIView):
+    queryset = Order.objects.all()
+    permission_classes = [ProfilePermission]
+    content_negotiation_class = _ExportNegotiation
+    allowed_profiles_by_method = {
+        "GET": ["admin", "manager", "operator", "viewer"],
+    }
+
+    @extend_schema(
+        parameters=[OrderExportParamsSerializer],
+        responses={(200, "text/csv"): OpenApiResponse(description="CSV ou NDJSON em stream")},
+    )
+    def get(self, request, *args, **kwargs):
+        params = OrderExportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+
+        queryset = self.get_queryset()
+        if "status" in options:
+            queryset = queryset.filter(status=options["status"])
+        if "from" in options:
+            queryset = queryset.filter(created_at__gte=options["from"])
+        if "to" in options:
+            queryset = queryset.filter(created_at__lte=options["to"])
+
+        fmt = options["format"]
+        response = StreamingHttpResponse(
+            export_orders(queryset, fmt, options["rows"], settings.ORDER_EXPORT_CHUNK_SIZE),
+            content_type=CONTENT_TYPES[fmt],
+        )
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        # Proxy não deve acumular a resposta antes de repassar
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class OrderPreviewView(generics.GenericAPIView):
+    serializer_class = OrderPreviewSerializer
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "POST": ["admin", "manager", "operator", "viewer"],
+    }
+
+    @extend_schema(responses=OrderPreviewOutSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = OrderPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            preview = OrderService.preview_order(
+                [CreateOrderItemInput(**item) for item in serializer.validated_data["items"]]
+            )
+        except BusinessError as e:
+            return Response({"detail": str(e)}, status=e.status_code)
+
+        return Response(OrderPreviewOutSerializer(preview).data, status=status.HTTP_200_OK)
 
 
 class OrderDetailCancelView(generics.RetrieveDestroyAPIView):
@@ -77,14 +254,28 @@ class OrderDetailCancelView(generics.RetrieveDestroyAPIView):
         "DELETE": ["admin", "manager"],
     }
 
-    def delete(self, request, *args, **kwargs):
+    def _load_detail(self):
         order = self.get_object()
+        return self.get_serializer(order).data, order.updated_at
+
+    def retrieve(self, request, *args, **kwargs):
+        # Cache versionado: hit não toca o banco; 404 nunca é cacheado
+        payload, updated_at = get_order_detail(self.kwargs["pk"], self._load_detail)
+        etag = weak_etag("order", self.kwargs["pk"], updated_at.isoformat())
+        response = not_modified(request, etag, updated_at) or Response(payload)
+        return set_validators(response, etag, updated_at)
+
+    @idempotent
+    def delete(self, request, *args, **kwargs):
+        # Sem get_object(): o serviço já trava e carrega o pedido (404 via NotFoundError)
         note = ""
         if isinstance(request.data, dict):
             note = request.data.get("note", "") or ""
 
         try:
-            order = OrderService.cancel_order(order_id=order.id, user=None, note=note)
+            order = OrderService.cancel_order(order_id=self.kwargs["pk"], user=None, note=note)
+        except NotFoundError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except ConflictError as e:
             return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
         except BusinessError as e:
@@ -103,8 +294,10 @@ class OrderStatusPatchView(generics.GenericAPIView):
         "PATCH": ["admin", "manager", "operator"],
     }
 
+    @idempotent
     def patch(self, request, *args, **kwargs):
-        order = self.get_object()
+        # Sem get_object(): o serviço já trava e carrega o pedido (404 via NotFoundError)
+        order_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
 
         serializer = OrderStatusPatchSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -113,10 +306,38 @@ class OrderStatusPatchView(generics.GenericAPIView):
         note = serializer.validated_data.get("note", "") or ""
 
         try:
-            order = OrderService.change_status(order_id=order.id, new_status=new_status, user=None, note=note)
+            order = OrderService.change_status(order_id=order_id, new_status=new_status, user=None, note=note)
+        except NotFoundError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except ConflictError as e:
             return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
         except BusinessError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(OrderDetailSerializer(order).data, status=status.HTTP_200_OK)
+
+
+class SalesReportView(generics.GenericAPIView):
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "GET": ["admin", "manager", "operator", "viewer"],
+    }
+
+    @extend_schema(parameters=[SalesReportParamsSerializer], responses=SalesReportRowSerializer(many=True))
+    def get(self, request, *args, **kwargs):
+        params = SalesReportParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        options = params.validated_data
+
+        # Lê só os agregados diários (nunca pedidos/itens)
+        rows = sales_report(
+            options["group_by"], options["from"], options["to"], by_day=options["period"] == "day", key=options["key"]
+        )
+        return Response(
+            {
+                "group_by": options["group_by"],
+                "from": options["from"],
+                "to": options["to"],
+                "results": SalesReportRowSerializer(rows, many=True).data,
+            }
+        )
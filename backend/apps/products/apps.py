@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.products'
+
+    def ready(self):
+        from apps.products.services.stock_service import check_reservation_mode
+
+        check_reservation_mode()
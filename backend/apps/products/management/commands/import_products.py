@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.services.product_import import (
+    FORMAT_CSV,
+    FORMAT_NDJSON,
+    ImportFormatError,
+    detect_format,
+    import_products,
+)
+
+
+class Command(BaseCommand):
+    help = "Importa produtos de um arquivo CSV ou NDJSON (upsert por SKU, em lotes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="arquivo .csv, .ndjson ou .jsonl")
+        parser.add_argument("--format", choices=[FORMAT_CSV, FORMAT_NDJSON], dest="file_format", help="padrão: pela extensão")
+        parser.add_argument("--errors", help="arquivo de resultado com as linhas rejeitadas (padrão: <path>.errors.csv)")
+        parser.add_argument("--chunk-size", type=int, default=settings.PRODUCT_IMPORT_CHUNK_SIZE, help="linhas por upsert")
+
+    def handle(self, *args, path, file_format, errors, chunk_size, **kwargs):
+        source = Path(path)
+        if not source.is_file():
+            raise CommandError(f"arquivo não encontrado: {source}")
+        file_format = file_format or detect_format(source.name)
+        if not file_format:
+            raise CommandError("formato não reconhecido pela extensão: use --format csv|ndjson")
+        if chunk_size < 1:
+            raise CommandError("--chunk-size deve ser maior que zero")
+
+        errors_path = Path(errors) if errors else source.with_name(source.name + ".errors.csv")
+        with source.open("rb") as stream, errors_path.open("w", encoding="utf-8", newline="") as result:
+            try:
+                summary = import_products(stream, file_format, result, chunk_size)
+            except ImportFormatError as exc:
+                raise CommandError(str(exc)) from exc
+
+        self.stdout.write(f"{summary.rows} linhas: {summary.upserted} importadas, {summary.failed} rejeitadas")
+        if summary.failed:
+            self.stdout.write(self.style.WARNING(f"Linhas rejeitadas em {errors_path}"))
+        self.stdout.write(self.style.SUCCESS("Concluído."))
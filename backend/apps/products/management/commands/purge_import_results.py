@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.services.product_import import purge_import_results
+
+
+class Command(BaseCommand):
+    help = "Apaga os arquivos de resultado de importação de produtos mais antigos que o prazo de retenção"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=float,
+            default=settings.PRODUCT_IMPORT_RESULTS_RETENTION_HOURS,
+            help="idade mínima (h) para apagar (padrão: PRODUCT_IMPORT_RESULTS_RETENTION_HOURS)",
+        )
+
+    def handle(self, *args, hours, **kwargs):
+        if hours < 0:
+            raise CommandError("--hours não pode ser negativo")
+        removed = purge_import_results(settings.PRODUCT_IMPORT_RESULTS_DIR, hours * 3600)
+        self.stdout.write(f"{removed} arquivo(s) removido(s) de {settings.PRODUCT_IMPORT_RESULTS_DIR}")
+        self.stdout.write(self.style.SUCCESS("Concluído."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.models import Product
+from apps.products.services.stock_service import enable_sharding, merge_shards, rebalance_shards
+
+
+class Command(BaseCommand):
+    help = "Gerencia estoque fragmentado de SKUs quentes (enable | rebalance | merge)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["enable", "rebalance", "merge"])
+        parser.add_argument("--sku", action="append", dest="skus", help="SKU alvo (pode repetir)")
+        parser.add_argument("--all", action="store_true", dest="all_products", help="todos os produtos fragmentados (rebalance/merge)")
+        parser.add_argument("--slots", type=int, default=8, help="quantidade de slots (enable)")
+
+    def handle(self, *args, action, skus, all_products, slots, **kwargs):
+        if action == "enable" and slots < 1:
+            raise CommandError("--slots deve ser maior que zero")
+
+        if skus:
+            products = list(Product.objects.filter(sku__in=skus))
+            missing = set(skus) - {p.sku for p in products}
+            if missing:
+                raise CommandError(f"SKU(s) não encontrado(s): {', '.join(sorted(missing))}")
+        elif all_products and action != "enable":
+            products = list(Product.objects.filter(stock_shard_count__gt=0))
+        else:
+            raise CommandError("informe --sku (ou --all para rebalance/merge)")
+
+        for product in products:
+            if action == "enable":
+                enable_sharding(product, slots)
+                self.stdout.write(f"{product.sku}: fragmentado em {slots} slots")
+                continue
+
+            if not product.stock_shard_count:
+                self.stdout.write(self.style.WARNING(f"{product.sku}: não está fragmentado, ignorado"))
+                continue
+
+            if action == "rebalance":
+                total = rebalance_shards(product)
+                self.stdout.write(f"{product.sku}: {total} unidades redistribuídas em {product.stock_shard_count} slots")
+            else:
+                total = merge_shards(product)
+                self.stdout.write(f"{product.sku}: slots consolidados ({total} unidades)")
+
+        self.stdout.write(self.style.SUCCESS("Concluído."))
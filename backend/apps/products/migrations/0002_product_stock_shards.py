@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 06:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProductStockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('qty', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='products.product')),
+            ],
+            options={
+                'db_table': 'product_stock_shards',
+                'constraints': [models.UniqueConstraint(fields=('product', 'slot'), name='uq_product_stock_shard_slot')],
+            },
+        ),
+    ]
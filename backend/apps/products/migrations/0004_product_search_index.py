@@ -0,0 +1,68 @@
+from django.db import migrations
+
+# Índice de busca textual por banco (ver apps/products/services/search.py).
+# MySQL: FULLTEXT nativo do InnoDB, mantido pelo próprio banco.
+# SQLite: tabela FTS5 de conteúdo externo, sincronizada por triggers (só
+# quando sku/name/description mudam: baixa de estoque não reindexa).
+# Migrações que recriem `products` no SQLite (_remake_table) derrubam os
+# triggers: precisam recriá-los.
+
+MYSQL_FORWARD = ["ALTER TABLE products ADD FULLTEXT INDEX products_search_ft (sku, name, description)"]
+MYSQL_REVERSE = ["ALTER TABLE products DROP INDEX products_search_ft"]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        sku, name, description, content='products', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, sku, name, description)
+        VALUES (new.id, new.sku, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, sku, name, description)
+        VALUES ('delete', old.id, old.sku, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_au AFTER UPDATE OF sku, name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, sku, name, description)
+        VALUES ('delete', old.id, old.sku, old.name, old.description);
+        INSERT INTO products_fts(rowid, sku, name, description)
+        VALUES (new.id, new.sku, new.name, new.description);
+    END
+    """,
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS products_fts_au",
+    "DROP TRIGGER IF EXISTS products_fts_ad",
+    "DROP TRIGGER IF EXISTS products_fts_ai",
+    "DROP TABLE IF EXISTS products_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_created_at_id_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"mysql": MYSQL_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"mysql": MYSQL_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
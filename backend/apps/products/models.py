@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Sum
 from apps.common.soft_delete import SoftDeleteModel
 
 class Product(SoftDeleteModel):
@@ -8,6 +9,8 @@ class Product(SoftDeleteModel):
     price = models.DecimalField(max_digits=12, decimal_places=2)
     stock_qty = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    # 0 = estoque em `stock_qty`; N > 0 = estoque distribuído em N ProductStockShard
+    stock_shard_count = models.PositiveSmallIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -17,7 +20,32 @@ class Product(SoftDeleteModel):
         indexes = [
             models.Index(fields=['sku']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['created_at', 'id']),  # paginação por cursor
+            models.Index(fields=['updated_at']),  # MAX(updated_at) do ETag das listas
         ]
 
     def __str__(self) -> str:
         return f'{self.sku} - {self.name}'
+
+    @property
+    def available_stock(self) -> int:
+        if not self.stock_shard_count:
+            return self.stock_qty
+        annotated = getattr(self, 'sharded_stock_qty', None)
+        if annotated is not None:
+            return annotated
+        return self.stock_shards.aggregate(total=Sum('qty'))['total'] or 0
+
+
+class ProductStockShard(models.Model):
+    """Slot de estoque de um SKU quente; o saldo disponível é a soma dos slots."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_shards')
+    slot = models.PositiveSmallIntegerField()
+    qty = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'product_stock_shards'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'slot'], name='uq_product_stock_shard_slot'),
+        ]
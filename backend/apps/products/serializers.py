@@ -1,15 +1,59 @@
 from rest_framework import serializers
 from .models import Product
 
+
+class AvailableStockField(serializers.IntegerField):
+    """`stock_qty` de saída: soma dos slots quando o produto é fragmentado."""
+
+    def get_attribute(self, instance):
+        return instance.available_stock
+
+
 class ProductCreateSerializer(serializers.ModelSerializer):
+    stock_qty = AvailableStockField(min_value=0, required=False)
+
     class Meta:
         model = Product
         fields = ['id', 'sku', 'name', 'description', 'price', 'stock_qty', 'is_active', 'created_at']
 
 class ProductDetailSerializer(serializers.ModelSerializer):
+    stock_qty = AvailableStockField(read_only=True)
+
     class Meta:
         model = Product
         fields = ['id', 'sku', 'name', 'description', 'price', 'stock_qty', 'is_active', 'created_at', 'updated_at']
 
 class ProductStockPatchSerializer(serializers.Serializer):
-    stock_qty = serializers.IntegerField(min_value=0)
+    """Saldo absoluto (`stock_qty`) ou ajuste relativo (`delta`), exatamente um dos dois."""
+
+    stock_qty = serializers.IntegerField(min_value=0, required=False)
+    delta = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if ("stock_qty" in attrs) == ("delta" in attrs):
+            raise serializers.ValidationError("informe exatamente um entre stock_qty e delta")
+        return attrs
+
+
+class StockAdjustmentSerializer(ProductStockPatchSerializer):
+    sku = serializers.CharField(max_length=64)
+
+
+class StockAdjustmentResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField(required=False)
+    sku = serializers.CharField()
+    status = serializers.CharField()
+    stock_qty = serializers.IntegerField(allow_null=True)
+    detail = serializers.JSONField(required=False)
+
+
+class ProductImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], required=False)
+
+
+class ProductImportResultSerializer(serializers.Serializer):
+    rows = serializers.IntegerField()
+    upserted = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    errors_url = serializers.CharField(allow_null=True)
@@ -0,0 +1,241 @@
+"""Snapshot do catálogo de produtos em memória, por processo (somente leitura).
+
+Para validações que não precisam de lock (produto existe / está ativo,
+prévia de preço). Estoque não faz parte do snapshot: continua vindo do banco.
+
+* Carga preguiçosa no primeiro uso; depois, refresh incremental pelos
+  produtos com `updated_at`/`deleted_at` a partir da última marca vista menos
+  `REFRESH_OVERLAP`. Uma linha cujo commit chega mais de `REFRESH_OVERLAP`
+  depois do seu `updated_at` (chunk longo de importação, transação lenta,
+  relógio do app adiantado em relação ao banco) escapa do incremental; por
+  isso o catálogo inteiro é relido em segundo plano a cada
+  `CATALOG_FULL_RELOAD_SECONDS`, que é o atraso máximo nesses casos.
+* Escritas no catálogo publicam no canal Redis `catalog:invalidate` (após o
+  commit); cada processo escuta o canal em uma thread e marca o snapshot como
+  sujo. Sem Redis, o snapshot é revalidado a cada
+  `CATALOG_MAX_STALENESS_SECONDS`.
+* Snapshots são imutáveis: o refresh monta um novo e troca a referência, então
+  leitores nunca esperam lock.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.common.redis import get_blocking_redis, get_redis
+from apps.products.models import Product
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "catalog:invalidate"
+# Linhas que commitam depois do refresh com `updated_at` anterior à marca
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: int
+    sku: str
+    name: str
+    price: Decimal
+    is_active: bool
+
+
+class CatalogSnapshot:
+    def __init__(self, entries: Dict[int, CatalogEntry]):
+        self.by_id = entries
+        self.by_sku = {entry.sku: entry for entry in entries.values()}
+        # Arrays paralelos ordenados por id: preço em centavos e flag de ativo
+        self.ids = array("q", sorted(entries))
+        self.price_cents = array("q", (int(entries[pid].price * 100) for pid in self.ids))
+        self.active = bytearray(entries[pid].is_active for pid in self.ids)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, product_id: int) -> Optional[CatalogEntry]:
+        return self.by_id.get(product_id)
+
+    def get_by_sku(self, sku: str) -> Optional[CatalogEntry]:
+        return self.by_sku.get(sku)
+
+    def _position(self, product_id: int) -> int:
+        pos = bisect.bisect_left(self.ids, product_id)
+        if pos == len(self.ids) or self.ids[pos] != product_id:
+            raise KeyError(product_id)
+        return pos
+
+    def price(self, product_id: int) -> Decimal:
+        return Decimal(self.price_cents[self._position(product_id)]) / 100
+
+    def is_active(self, product_id: int) -> bool:
+        return bool(self.active[self._position(product_id)])
+
+
+def _entry(row) -> CatalogEntry:
+    product_id, sku, name, price, is_active = row[:5]
+    return CatalogEntry(id=product_id, sku=sku, name=name, price=price, is_active=is_active)
+
+
+class ProductCatalog:
+    FIELDS = ("id", "sku", "name", "price", "is_active", "deleted_at", "updated_at")
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._watermark = None
+        self._dirty = False
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CatalogSnapshot:
+        now = time.monotonic()
+        stale = now - self._checked_at > settings.CATALOG_MAX_STALENESS_SECONDS
+        if self._snapshot is None or self._dirty or stale:
+            self.refresh()
+        elif not self._reloading and now - self._loaded_at > settings.CATALOG_FULL_RELOAD_SECONDS:
+            self._start_reload()
+        return self._snapshot
+
+    def _start_reload(self) -> None:
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("catalog full reload failed")
+            finally:
+                self._reloading = False
+                connection.close()
+
+        threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+
+    def _read_all(self):
+        started = time.monotonic()
+        entries, watermark = {}, None
+        for row in Product.objects.values_list(*self.FIELDS).iterator(chunk_size=5000):
+            entries[row[0]] = _entry(row)
+            marks = [mark for mark in (row[5], row[6]) if mark is not None]
+            if watermark is None or max(marks) > watermark:
+                watermark = max(marks)
+        return CatalogSnapshot(entries), watermark, started
+
+    def reload(self) -> None:
+        """Relê o catálogo inteiro (fora do lock) e troca o snapshot."""
+        snapshot, watermark, started = self._read_all()
+        with self._lock:
+            self._snapshot = snapshot
+            # Mudanças feitas durante a leitura entram pelo próximo incremental
+            self._watermark = watermark or timezone.now()
+            self._loaded_at = started
+            self._dirty = True
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._dirty = False
+            if self._snapshot is None:
+                self._snapshot, self._watermark, self._loaded_at = self._read_all()
+                if self._watermark is None:
+                    # Catálogo vazio: qualquer produto criado daqui em diante entra no delta
+                    self._watermark = timezone.now()
+                self._checked_at = time.monotonic()
+                return
+
+            since = self._watermark - REFRESH_OVERLAP
+            rows = Product.all_objects.filter(Q(updated_at__gte=since) | Q(deleted_at__gte=since)).values_list(
+                *self.FIELDS
+            )
+            changed = {}
+            for row in rows:
+                changed[row[0]] = row
+                marks = [mark for mark in (row[5], row[6]) if mark is not None]
+                if max(marks) > self._watermark:
+                    self._watermark = max(marks)
+
+            if changed:
+                entries = dict(self._snapshot.by_id)
+                for pid, row in changed.items():
+                    if row[5] is None:
+                        entries[pid] = _entry(row)
+                    else:
+                        entries.pop(pid, None)
+                self._snapshot = CatalogSnapshot(entries)
+            self._checked_at = time.monotonic()
+
+
+def _listen(catalog: ProductCatalog) -> None:
+    delay = 1.0
+    while True:
+        try:
+            pubsub = get_blocking_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Mensagens perdidas enquanto desconectado
+            catalog.invalidate()
+            delay = 1.0
+            for _ in pubsub.listen():
+                catalog.invalidate()
+        except Exception:
+            logger.warning("catalog invalidation channel unavailable, retrying in %.0fs", delay)
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+_catalog: Optional[ProductCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogSnapshot:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = ProductCatalog()
+                if settings.CATALOG_INVALIDATION_LISTENER:
+                    threading.Thread(target=_listen, args=(_catalog,), name="catalog-invalidation", daemon=True).start()
+    return _catalog.snapshot()
+
+
+def reset_catalog() -> None:
+    global _catalog
+    _catalog = None
+
+
+def publish_catalog_change(product_ids: Iterable[int] = ()) -> None:
+    """Invalida o snapshot deste processo e, após o commit, o dos demais."""
+    product_ids = list(product_ids)
+    if _catalog is not None:
+        _catalog.invalidate()
+
+    def _publish():
+        if _catalog is not None:
+            _catalog.invalidate()
+        try:
+            get_redis().publish(INVALIDATION_CHANNEL, ",".join(str(pid) for pid in product_ids))
+        except Exception:
+            logger.warning("catalog invalidation publish failed; other workers refresh within the staleness window")
+
+    transaction.on_commit(_publish)
+
+
+# A thread de escuta não sobrevive ao fork: o filho cria a sua no primeiro uso
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_catalog)
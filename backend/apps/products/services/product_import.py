@@ -0,0 +1,205 @@
+"""Importação em massa de produtos (CSV / NDJSON) com upsert por `sku`.
+
+O arquivo é lido como stream, em lotes de `chunk_size` linhas: memória
+limitada ao lote, qualquer que seja o tamanho do arquivo. Cada linha passa por
+um validador simples (sem `ModelSerializer` por linha); as válidas do lote
+viram um único `bulk_create(update_conflicts=True)` e as inválidas vão para o
+arquivo de resultado (CSV `line,sku,errors`) assim que são vistas.
+
+* SKU existente: atualiza nome, descrição, preço e `is_active` (e reativa
+  produto removido). `stock_qty` só vale na criação: saldo de produto existente
+  muda por `PATCH /products/<pk>/stock` ou `/products/stock/bulk`, que não
+  competem com as baixas dos pedidos.
+* SKU repetido no arquivo: vale a última linha. `upserted` conta SKUs
+  distintos por lote (um SKU repetido em lotes diferentes conta uma vez em cada).
+* Cada lote é uma transação; lotes já gravados não são desfeitos se o arquivo
+  falhar depois (ex.: encoding inválido).
+* Arquivos de resultado do endpoint ficam em `PRODUCT_IMPORT_RESULTS_DIR` e são
+  apagados por `purge_import_results` depois do prazo de retenção.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.db import connection
+
+from apps.products.models import Product
+from apps.products.services.catalog import publish_catalog_change
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+FORMATS_BY_EXTENSION = {".csv": FORMAT_CSV, ".ndjson": FORMAT_NDJSON, ".jsonl": FORMAT_NDJSON}
+RESULT_HEADER = ["line", "sku", "errors"]
+UPSERT_FIELDS = ["name", "description", "price", "is_active", "deleted_at", "updated_at"]
+
+MAX_PRICE = Decimal("9999999999.99")  # max_digits=12, decimal_places=2
+TRUE_VALUES = {"1", "true", "t", "sim", "s", "yes", "y"}
+FALSE_VALUES = {"0", "false", "f", "nao", "não", "n", "no"}
+
+
+class ImportFormatError(ValueError):
+    """Arquivo ilegível como um todo (formato/encoding), não uma linha inválida."""
+
+
+@dataclass
+class ImportSummary:
+    rows: int = 0
+    upserted: int = 0
+    failed: int = 0
+
+
+def detect_format(filename: str) -> Optional[str]:
+    name = (filename or "").lower()
+    for extension, fmt in FORMATS_BY_EXTENSION.items():
+        if name.endswith(extension):
+            return fmt
+    return None
+
+
+def _text(stream) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def _csv_rows(stream) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(_text(stream))
+    for raw in reader:
+        yield reader.line_num, raw
+
+
+def _ndjson_rows(stream) -> Iterator[Tuple[int, object]]:
+    for line_number, line in enumerate(_text(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def iter_rows(stream, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(número da linha, registro bruto) sem carregar o arquivo inteiro."""
+    rows = _csv_rows(stream) if fmt == FORMAT_CSV else _ndjson_rows(stream)
+    try:
+        yield from rows
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError("arquivo deve estar em UTF-8") from exc
+    except csv.Error as exc:
+        raise ImportFormatError(f"CSV inválido: {exc}") from exc
+
+
+def _str(raw: dict, field: str) -> str:
+    value = raw.get(field)
+    return "" if value is None else str(value).strip()
+
+
+def clean_row(raw) -> Tuple[Dict[str, object], Dict[str, str]]:
+    """Valida e converte um registro; devolve (valores, erros por campo)."""
+    if not isinstance(raw, dict):
+        return {}, {"row": "registro inválido (esperado objeto JSON)"}
+
+    values: Dict[str, object] = {}
+    errors: Dict[str, str] = {}
+
+    for field, max_length in (("sku", 64), ("name", 255)):
+        value = _str(raw, field)
+        if not value:
+            errors[field] = "obrigatório"
+        elif len(value) > max_length:
+            errors[field] = f"máximo de {max_length} caracteres"
+        values[field] = value
+    values["description"] = _str(raw, "description")
+
+    try:
+        price = Decimal(_str(raw, "price"))
+        if not price.is_finite() or price < 0 or price > MAX_PRICE or price != price.quantize(Decimal("0.01")):
+            raise InvalidOperation
+        values["price"] = price
+    except InvalidOperation:
+        errors["price"] = "decimal entre 0 e 9999999999.99, com até 2 casas"
+
+    stock = _str(raw, "stock_qty")
+    try:
+        values["stock_qty"] = int(stock) if stock else 0
+        if values["stock_qty"] < 0:
+            raise ValueError
+    except ValueError:
+        errors["stock_qty"] = "inteiro não negativo"
+
+    active = _str(raw, "is_active").lower()
+    if not active or active in TRUE_VALUES:
+        values["is_active"] = True
+    elif active in FALSE_VALUES:
+        values["is_active"] = False
+    else:
+        errors["is_active"] = "booleano (true/false)"
+
+    return values, errors
+
+
+def upsert_products(rows: List[Dict[str, object]]) -> int:
+    """Upsert do lote; retorna quantos SKUs distintos foram gravados."""
+    by_sku = {row["sku"]: row for row in rows}
+    options = {"update_conflicts": True, "update_fields": UPSERT_FIELDS}
+    # MySQL não aceita alvo explícito (ON DUPLICATE KEY vale para qualquer unique)
+    if connection.features.supports_update_conflicts_with_target:
+        options["unique_fields"] = ["sku"]
+    Product.all_objects.bulk_create([Product(**row) for row in by_sku.values()], **options)
+    return len(by_sku)
+
+
+def import_products(stream, fmt: str, result, chunk_size: int) -> ImportSummary:
+    """Importa `stream` (binário) e escreve as linhas rejeitadas em `result` (texto)."""
+    if fmt not in (FORMAT_CSV, FORMAT_NDJSON):
+        raise ImportFormatError("formato deve ser csv ou ndjson")
+
+    summary = ImportSummary()
+    writer = csv.writer(result)
+    writer.writerow(RESULT_HEADER)
+    chunk: List[Dict[str, object]] = []
+
+    def flush():
+        if chunk:
+            summary.upserted += upsert_products(chunk)
+            chunk.clear()
+
+    try:
+        for line_number, raw in iter_rows(stream, fmt):
+            summary.rows += 1
+            values, errors = clean_row(raw) if raw is not None else ({}, {"row": "JSON inválido"})
+            if errors:
+                summary.failed += 1
+                sku = values.get("sku", "")
+                writer.writerow([line_number, sku, "; ".join(f"{field}: {msg}" for field, msg in errors.items())])
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    finally:
+        if summary.upserted:
+            publish_catalog_change()
+    return summary
+
+
+def purge_import_results(directory: Path, max_age_seconds: float) -> int:
+    """Apaga os arquivos de resultado (`*.csv`) mais antigos que `max_age_seconds`; retorna quantos."""
+    if not directory.is_dir():
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in directory.glob("*.csv"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # Outro worker apagou antes
+            continue
+    return removed
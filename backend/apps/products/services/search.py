@@ -0,0 +1,104 @@
+"""Busca textual de produtos (`?search=`) com índice, por banco.
+
+* ``mysql``: `MATCH(sku, name, description) AGAINST` em modo booleano sobre o
+  índice FULLTEXT (o InnoDB o mantém nas escritas).
+* ``sqlite``: tabela FTS5 `products_fts`, mantida por triggers.
+* ``like``: `icontains` em sku/name (bancos sem índice textual).
+
+`PRODUCT_SEARCH_BACKEND=auto` escolhe pelo banco da conexão. Cada termo vira
+prefixo (`term*`) e todos precisam casar; o resultado vem ordenado por
+relevância (`search_rank`, maior = melhor).
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_PARAM = "search"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(term: str) -> list:
+    return _TOKEN.findall(term or "")
+
+
+class MySQLFulltextBackend:
+    name = "mysql"
+
+    def search(self, queryset, tokens):
+        query = " ".join(f"+{token}*" for token in tokens)
+        rank = RawSQL(
+            "MATCH(products.sku, products.name, products.description) AGAINST (%s IN BOOLEAN MODE)",
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+
+
+class SQLiteFTS5Backend:
+    name = "sqlite"
+
+    def search(self, queryset, tokens):
+        query = " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+        # bm25 é negativo e menor = mais relevante: inverte para manter "maior = melhor"
+        rank = RawSQL(
+            "SELECT -bm25(products_fts) FROM products_fts WHERE products_fts MATCH %s AND rowid = products.id",
+            [query],
+            output_field=FloatField(),
+        )
+        matches = RawSQL("SELECT rowid FROM products_fts WHERE products_fts MATCH %s", [query])
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+class LikeBackend:
+    name = "like"
+
+    def search(self, queryset, tokens):
+        for token in tokens:
+            queryset = queryset.filter(Q(sku__icontains=token) | Q(name__icontains=token))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+BACKENDS = {backend.name: backend for backend in (MySQLFulltextBackend, SQLiteFTS5Backend, LikeBackend)}
+
+
+def get_search_backend():
+    name = settings.PRODUCT_SEARCH_BACKEND
+    if name == "auto":
+        name = connection.vendor if connection.vendor in BACKENDS else LikeBackend.name
+    return BACKENDS[name]()
+
+
+def search_products(queryset, term: str):
+    """Filtra por `term` e anota `search_rank`; termo sem palavras devolve o queryset intacto."""
+    tokens = _tokens(term)
+    if not tokens:
+        return queryset
+    return get_search_backend().search(queryset, tokens)
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """`?search=` via índice textual; sem `?ordering=` explícito, ordena por relevância."""
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(SEARCH_PARAM, "")
+        if not _tokens(term):
+            return queryset
+        queryset = search_products(queryset, term)
+        if not request.query_params.get("ordering"):
+            queryset = queryset.order_by(F("search_rank").desc(), "-created_at", "-id")
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": SEARCH_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Busca textual em sku, nome e descrição (ordenada por relevância).",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.products.models import Product, ProductStockShard
+
+RESERVATION_PESSIMISTIC = "pessimistic"
+RESERVATION_OPTIMISTIC = "optimistic"
+RESERVATION_MODES = (RESERVATION_PESSIMISTIC, RESERVATION_OPTIMISTIC)
+
+STOCK_UPDATED = "updated"
+STOCK_NOT_FOUND = "not_found"
+STOCK_FAILED = "failed"
+
+
+def check_reservation_mode() -> None:
+    """Falha na subida com `STOCK_RESERVATION_MODE` desconhecido (um erro de digitação mudaria o lock em silêncio)."""
+    if settings.STOCK_RESERVATION_MODE not in RESERVATION_MODES:
+        raise ImproperlyConfigured(
+            f"STOCK_RESERVATION_MODE inválido: {settings.STOCK_RESERVATION_MODE!r} (use {' ou '.join(RESERVATION_MODES)})"
+        )
+
+
+@dataclass(frozen=True)
+class StockAdjustment:
+    """Ajuste por SKU: `stock_qty` absoluto ou `delta` relativo (exatamente um dos dois)."""
+
+    sku: str
+    stock_qty: Optional[int] = None
+    delta: Optional[int] = None
+
+
+@dataclass
+class StockAdjustmentResult:
+    sku: str
+    status: str
+    stock_qty: Optional[int] = None
+    detail: str = ""
+
+
+def load_products(product_ids, lock: bool = True) -> List[Product]:
+    """Produtos para reserva; com `lock=True` as linhas ficam travadas até o commit.
+
+    Os locks são tomados em uma única query, em ordem crescente de PK, para que
+    transações concorrentes (criação e cancelamento) nunca travem em ordens
+    diferentes. Produtos fragmentados nunca travam a linha do produto: a
+    reserva deles é feita nos slots (`reserve_from_shards`).
+    """
+    if not lock:
+        return list(Product.objects.filter(id__in=product_ids))
+
+    products = list(
+        Product.objects.select_for_update().filter(id__in=product_ids, stock_shard_count=0).order_by("id")
+    )
+    missing = set(product_ids) - {p.id for p in products}
+    if missing:
+        products += list(Product.objects.filter(id__in=missing))
+    return products
+
+
+def aggregate_quantities(lines) -> Dict[int, int]:
+    """Soma as quantidades por produto (linhas repetidas do mesmo SKU viram uma só)."""
+    totals: Dict[int, int] = {}
+    for line in lines:
+        totals[line.product_id] = totals.get(line.product_id, 0) + int(line.qty)
+    return totals
+
+
+def apply_stock_deltas(deltas: Dict[int, int]) -> int:
+    """Aplica todos os ajustes de estoque em um único UPDATE condicional.
+
+    `deltas` mapeia product_id -> variação (negativa para baixa, positiva para
+    devolução). Baixas só são aplicadas quando há saldo (`stock_qty >= n`), então
+    o chamador deve comparar o retorno (linhas afetadas) com `len(deltas)`.
+    """
+    deltas = {pid: d for pid, d in deltas.items() if d}
+    if not deltas:
+        return 0
+
+    guard = Q()
+    whens = []
+    for product_id, delta in deltas.items():
+        if delta < 0:
+            guard |= Q(id=product_id, stock_qty__gte=-delta)
+        else:
+            guard |= Q(id=product_id)
+        whens.append(
+            When(id=product_id, then=ExpressionWrapper(F("stock_qty") + delta, output_field=IntegerField()))
+        )
+
+    return Product.objects.filter(guard).update(
+        stock_qty=Case(*whens, default=F("stock_qty"), output_field=IntegerField()),
+        updated_at=timezone.now(),
+    )
+
+
+def adjust_stock(product: Product, delta: int) -> bool:
+    """Soma `delta` ao saldo sem ler-modificar-gravar; False se a baixa não cabe no saldo."""
+    if product.stock_shard_count:
+        with transaction.atomic():
+            if delta < 0 and not reserve_from_shards(product, -delta):
+                return False
+            if delta > 0:
+                release_to_shards(product, delta)
+            Product.objects.filter(id=product.id).update(updated_at=timezone.now())
+        return True
+    if not delta:
+        return True
+    return apply_stock_deltas({product.id: delta}) == 1
+
+
+def _target_qty(adjustment: StockAdjustment, current: int) -> int:
+    if adjustment.delta is None:
+        return adjustment.stock_qty
+    return current + adjustment.delta
+
+
+def _adjust_chunk(chunk: List[StockAdjustment], results: Dict[str, StockAdjustmentResult]) -> List[int]:
+    """Um SELECT ... FOR UPDATE e um UPDATE com CASE para o lote; retorna os ids alterados.
+
+    Produtos fragmentados não travam a linha do produto (como em `load_products`):
+    são ajustados nos slots, dentro da mesma transação do lote.
+    """
+    by_sku = {adjustment.sku: adjustment for adjustment in chunk}
+    with transaction.atomic():
+        rows = list(
+            Product.objects.select_for_update()
+            .filter(sku__in=by_sku, stock_shard_count=0)
+            .order_by("id")
+            .values_list("id", "sku", "stock_qty")
+        )
+        targets: Dict[int, int] = {}
+        for product_id, sku, current in rows:
+            target = _target_qty(by_sku[sku], current)
+            if target < 0:
+                results[sku] = StockAdjustmentResult(
+                    sku, STOCK_FAILED, current, f"estoque insuficiente para SKU {sku}"
+                )
+                continue
+            targets[product_id] = target
+            results[sku] = StockAdjustmentResult(sku, STOCK_UPDATED, target)
+
+        if targets:
+            Product.objects.filter(id__in=targets).update(
+                stock_qty=Case(
+                    *(When(id=product_id, then=Value(qty)) for product_id, qty in targets.items()),
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+
+        # Produtos fragmentados (raros) seguem o caminho dos slots, um a um
+        changed = list(targets)
+        sharded = Product.objects.filter(sku__in=by_sku, stock_shard_count__gt=0).order_by("id")
+        for product in sharded:
+            adjustment = by_sku[product.sku]
+            if adjustment.delta is None:
+                set_sharded_stock(product, adjustment.stock_qty)
+            elif not adjust_stock(product, adjustment.delta):
+                results[product.sku] = StockAdjustmentResult(
+                    product.sku, STOCK_FAILED, product.available_stock, f"estoque insuficiente para SKU {product.sku}"
+                )
+                continue
+            changed.append(product.id)
+            results[product.sku] = StockAdjustmentResult(product.sku, STOCK_UPDATED, product.available_stock)
+    return changed
+
+
+def bulk_adjust_stock(adjustments: List[StockAdjustment], chunk_size: int) -> Tuple[List[StockAdjustmentResult], List[int]]:
+    """Aplica ajustes por SKU em lotes; retorna o resultado por SKU (na ordem de entrada) e os ids alterados.
+
+    Cada lote, incluindo os SKUs fragmentados, é uma transação própria (locks
+    em ordem de PK, como em `load_products`): uma falha de saldo só afeta o
+    próprio SKU, um erro de banco desfaz o lote inteiro, e lotes já gravados
+    não são desfeitos se um posterior falhar.
+    """
+    results: Dict[str, StockAdjustmentResult] = {}
+    changed: List[int] = []
+    for start in range(0, len(adjustments), chunk_size):
+        chunk = adjustments[start : start + chunk_size]
+        changed += _adjust_chunk(chunk, results)
+    ordered = [
+        results.get(adjustment.sku)
+        or StockAdjustmentResult(adjustment.sku, STOCK_NOT_FOUND, detail=f"SKU {adjustment.sku} não encontrado")
+        for adjustment in adjustments
+    ]
+    return ordered, changed
+
+
+# ---------- Estoque fragmentado (SKUs quentes) ----------
+
+
+def with_available_stock(queryset):
+    """Anota `sharded_stock_qty` para que `Product.available_stock` não gere N+1 em listas."""
+    shard_sum = (
+        ProductStockShard.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(total=Sum("qty"))
+        .values("total")
+    )
+    return queryset.annotate(sharded_stock_qty=Coalesce(Subquery(shard_sum), 0))
+
+
+def _split_evenly(total: int, slots: int) -> List[int]:
+    base, extra = divmod(total, slots)
+    return [base + (1 if slot < extra else 0) for slot in range(slots)]
+
+
+def reserve_from_shards(product: Product, qty: int) -> bool:
+    """Baixa `qty` de um slot sorteado entre os que cobrem a quantidade.
+
+    Caminho rápido: uma leitura sem lock escolhe, ao acaso, um slot com saldo
+    e só esse slot recebe o UPDATE com guard (um único lock de linha). Sem
+    candidato, ou se outro pedido esvaziou o slot entre a leitura e o UPDATE,
+    trava todos os slots do produto em ordem de `slot` e consolida. O único
+    cruzamento de locks possível é esse slot isolado que perdeu a corrida
+    (InnoDB mantém o lock mesmo sem casar o guard) contra o caminho ordenado
+    de outra transação; o deadlock resultante é raro e, nos pedidos, coberto
+    pelo retry do `OrderService`. Retorna False quando a soma dos slots é insuficiente.
+    """
+    candidates = list(
+        ProductStockShard.objects.filter(product_id=product.id, qty__gte=qty).values_list("slot", flat=True)
+    )
+    if candidates:
+        slot = random.choice(candidates)
+        updated = ProductStockShard.objects.filter(product_id=product.id, slot=slot, qty__gte=qty).update(
+            qty=F("qty") - qty
+        )
+        if updated:
+            return True
+
+    shards = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id).order_by("slot"))
+    if sum(shard.qty for shard in shards) < qty:
+        return False
+
+    remaining = qty
+    for shard in shards:
+        take = min(shard.qty, remaining)
+        shard.qty -= take
+        remaining -= take
+    ProductStockShard.objects.bulk_update(shards, ["qty"])
+    return True
+
+
+def release_to_shards(product: Product, qty: int) -> None:
+    """Devolve estoque a um slot aleatório (sem guard: devolução sempre cabe)."""
+    slot = random.randrange(product.stock_shard_count)
+    ProductStockShard.objects.filter(product_id=product.id, slot=slot).update(qty=F("qty") + qty)
+
+
+def _redistribute(product: Product, total=None) -> int:
+    shards = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id).order_by("slot"))
+    if total is None:
+        total = sum(shard.qty for shard in shards)
+    for shard, qty in zip(shards, _split_evenly(total, len(shards))):
+        shard.qty = qty
+    ProductStockShard.objects.bulk_update(shards, ["qty"])
+    Product.objects.filter(id=product.id).update(updated_at=timezone.now())
+    return total
+
+
+@transaction.atomic
+def set_sharded_stock(product: Product, total: int) -> None:
+    """Define o saldo absoluto de um produto fragmentado, redistribuindo entre os slots."""
+    _redistribute(product, total)
+
+
+@transaction.atomic
+def rebalance_shards(product: Product) -> int:
+    """Nivela os slots (o saldo total não muda); retorna o saldo."""
+    return _redistribute(product)
+
+
+@transaction.atomic
+def enable_sharding(product: Product, slots: int) -> None:
+    """Move `stock_qty` para `slots` slots (ou altera a quantidade de slots, preservando o saldo)."""
+    product = Product.objects.select_for_update().get(id=product.id)
+    if product.stock_shard_count:
+        shards = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id))
+        total = sum(shard.qty for shard in shards)
+        ProductStockShard.objects.filter(product_id=product.id).delete()
+    else:
+        total = product.stock_qty
+
+    ProductStockShard.objects.bulk_create(
+        [
+            ProductStockShard(product_id=product.id, slot=slot, qty=qty)
+            for slot, qty in enumerate(_split_evenly(total, slots))
+        ]
+    )
+    product.stock_qty = 0
+    product.stock_shard_count = slots
+    product.save(update_fields=["stock_qty", "stock_shard_count", "updated_at"])
+
+
+@transaction.atomic
+def merge_shards(product: Product) -> int:
+    """Desfaz a fragmentação: soma os slots de volta em `stock_qty`."""
+    product = Product.objects.select_for_update().get(id=product.id)
+    shards = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id))
+    total = sum(shard.qty for shard in shards)
+    ProductStockShard.objects.filter(product_id=product.id).delete()
+    product.stock_qty += total
+    product.stock_shard_count = 0
+    product.save(update_fields=["stock_qty", "stock_shard_count", "updated_at"])
+    return total
@@ -1,7 +1,18 @@
 from django.urls import path
-from .views import ProductListCreateView, ProductStockUpdateView
+from .views import (
+    ProductImportErrorsView,
+    ProductImportView,
+    ProductListCreateView,
+    ProductLookupView,
+    ProductStockBulkView,
+    ProductStockUpdateView,
+)
 
 urlpatterns = [
     path('products', ProductListCreateView.as_view(), name='products-list-create'),
+    path('products/import', ProductImportView.as_view(), name='products-import'),
+    path('products/import/<uuid:token>/errors', ProductImportErrorsView.as_view(), name='products-import-errors'),
+    path('products/lookup', ProductLookupView.as_view(), name='products-lookup'),
+    path('products/stock/bulk', ProductStockBulkView.as_view(), name='products-stock-bulk'),
     path('products/<int:pk>/stock', ProductStockUpdateView.as_view(), name='products-stock'),
 ]
@@ -1,27 +1,69 @@
+import uuid
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
 from rest_framework import generics, filters, status
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
+from apps.common.conditional import ConditionalListMixin
+from apps.common.idempotency import idempotent
+from apps.common.lookup import LookupIndex, LookupView
+from apps.common.pagination import CursorOrOffsetPagination
 from apps.common.permissions import ProfilePermission
+from apps.common.text import normalize
 from .models import Product
+from .services.catalog import publish_catalog_change
+from .services.product_import import ImportFormatError, detect_format, import_products, purge_import_results
+from .services.search import ProductSearchFilter
+from .services.stock_service import (
+    STOCK_FAILED,
+    StockAdjustment,
+    adjust_stock,
+    bulk_adjust_stock,
+    set_sharded_stock,
+    with_available_stock,
+)
 from .serializers import (
     ProductCreateSerializer,
     ProductDetailSerializer,
+    ProductImportResultSerializer,
+    ProductImportSerializer,
     ProductStockPatchSerializer,
+    StockAdjustmentResultSerializer,
+    StockAdjustmentSerializer,
 )
 
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.all()
+class ProductListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
+    queryset = with_available_stock(Product.objects.all())
     serializer_class = ProductCreateSerializer
     permission_classes = [ProfilePermission]
+    pagination_class = CursorOrOffsetPagination
     allowed_profiles_by_method = {
         "GET": ["admin", "manager", "operator", "viewer"],
         "POST": ["admin", "manager"],
     }
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["sku", "name", "description"]
+    # Ordenação antes da busca: sem ?ordering explícito a busca ordena por relevância
+    filter_backends = [filters.OrderingFilter, ProductSearchFilter]
     ordering_fields = ["created_at", "name", "price", "stock_qty"]
     ordering = ["-created_at"]
 
+    def perform_create(self, serializer):
+        product = serializer.save()
+        publish_catalog_change([product.id])
+
+    def list_fingerprint(self, queryset) -> dict:
+        # Reservas em slots não tocam o produto: o saldo dos slots entra na impressão digital
+        return queryset.order_by().aggregate(
+            last_updated=Max("updated_at"),
+            total=Count("pk"),
+            sharded_stock=Sum("sharded_stock_qty"),
+        )
+
 
 class ProductStockUpdateView(generics.GenericAPIView):
     queryset = Product.objects.all()
@@ -31,14 +73,159 @@ class ProductStockUpdateView(generics.GenericAPIView):
         "PATCH": ["admin", "manager", "operator"],
     }
 
+    @idempotent
     def patch(self, request, pk: int, *args, **kwargs):
         product = self.get_object()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # exemplo típico: setar/ajustar estoque conforme seu serializer
-        stock_qty = serializer.validated_data["stock_qty"]
-        product.stock_qty = stock_qty
-        product.save(update_fields=["stock_qty", "updated_at"])
+        delta = serializer.validated_data.get("delta")
+        if delta is not None:
+            # Ajuste relativo: UPDATE atômico com F(), sem corrida com as baixas de pedidos
+            if not adjust_stock(product, delta):
+                return Response(
+                    {"detail": f"estoque insuficiente para SKU {product.sku}"}, status=status.HTTP_409_CONFLICT
+                )
+        elif product.stock_shard_count:
+            set_sharded_stock(product, serializer.validated_data["stock_qty"])
+        else:
+            # Valor absoluto direto no UPDATE: sem ler-modificar-gravar sobre a linha lida por get_object()
+            Product.objects.filter(pk=product.pk).update(
+                stock_qty=serializer.validated_data["stock_qty"], updated_at=timezone.now()
+            )
+        publish_catalog_change([product.id])
 
+        # Releitura com a soma dos slots: `updated_at` e saldo como ficaram após a escrita
+        product = with_available_stock(Product.objects.filter(pk=product.pk)).get()
         return Response(ProductDetailSerializer(product).data, status=status.HTTP_200_OK)
+
+
+class ProductStockBulkView(generics.GenericAPIView):
+    serializer_class = StockAdjustmentSerializer
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "POST": ["admin", "manager", "operator"],
+    }
+
+    @extend_schema(request=StockAdjustmentSerializer(many=True), responses=StockAdjustmentResultSerializer(many=True))
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        payloads = request.data
+        if not isinstance(payloads, list) or not payloads:
+            return Response({"detail": "envie uma lista de ajustes de estoque"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(payloads) > settings.STOCK_BULK_MAX_SIZE:
+            return Response(
+                {"detail": f"lote excede o máximo de {settings.STOCK_BULK_MAX_SIZE} SKUs"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Item inválido (ou SKU repetido) falha só o próprio item
+        results = [None] * len(payloads)
+        valid, seen = [], set()
+        for index, payload in enumerate(payloads):
+            serializer = StockAdjustmentSerializer(data=payload)
+            if not serializer.is_valid():
+                detail = serializer.errors
+            elif serializer.validated_data["sku"] in seen:
+                detail = "SKU repetido no lote"
+            else:
+                seen.add(serializer.validated_data["sku"])
+                valid.append((index, StockAdjustment(**serializer.validated_data)))
+                continue
+            sku = payload.get("sku") if isinstance(payload, dict) else None
+            results[index] = {"index": index, "sku": sku, "status": STOCK_FAILED, "stock_qty": None, "detail": detail}
+
+        outcomes, changed = bulk_adjust_stock([adjustment for _, adjustment in valid], settings.STOCK_BULK_CHUNK_SIZE)
+        for (index, _), outcome in zip(valid, outcomes):
+            results[index] = {"index": index, **StockAdjustmentResultSerializer(outcome).data}
+        if changed:
+            publish_catalog_change(changed)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+def _import_result_path(token):
+    return settings.PRODUCT_IMPORT_RESULTS_DIR / f"{token}.csv"
+
+
+class ProductImportView(generics.GenericAPIView):
+    serializer_class = ProductImportSerializer
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "POST": ["admin", "manager"],
+    }
+
+    @extend_schema(responses=ProductImportResultSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get("file_format") or detect_format(upload.name)
+        if not file_format:
+            return Response(
+                {"detail": "formato não reconhecido: envie .csv/.ndjson ou informe file_format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Upload grande já está em arquivo temporário (FILE_UPLOAD_MAX_MEMORY_SIZE): lido em stream
+        token = str(uuid.uuid4())
+        result_path = _import_result_path(token)
+        settings.PRODUCT_IMPORT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        # Varredura barata a cada importação; `manage.py purge_import_results` cobre períodos sem importação
+        purge_import_results(settings.PRODUCT_IMPORT_RESULTS_DIR, settings.PRODUCT_IMPORT_RESULTS_RETENTION_HOURS * 3600)
+        with result_path.open("w", encoding="utf-8", newline="") as result:
+            try:
+                summary = import_products(upload, file_format, result, settings.PRODUCT_IMPORT_CHUNK_SIZE)
+            except ImportFormatError as exc:
+                summary, error = None, str(exc)
+        if summary is None:
+            result_path.unlink(missing_ok=True)
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors_url = None
+        if summary.failed:
+            errors_url = request.build_absolute_uri(reverse("products-import-errors", args=[token]))
+        else:
+            result_path.unlink(missing_ok=True)
+        data = {"rows": summary.rows, "upserted": summary.upserted, "failed": summary.failed, "errors_url": errors_url}
+        return Response(ProductImportResultSerializer(data).data, status=status.HTTP_200_OK)
+
+
+class ProductImportErrorsView(generics.GenericAPIView):
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "GET": ["admin", "manager"],
+    }
+
+    @extend_schema(responses={(200, "text/csv"): bytes})
+    def get(self, request, token, *args, **kwargs):
+        path = _import_result_path(token)
+        if not path.is_file():
+            raise Http404
+        return FileResponse(
+            path.open("rb"), content_type="text/csv", as_attachment=True, filename=f"import-{token}-errors.csv"
+        )
+
+
+def _product_keys(row):
+    _, _, _, _, sku, name = row
+    words = normalize(name).split()
+    return [normalize(sku), normalize(name), *words[1:]]
+
+
+product_lookup_index = LookupIndex(
+    Product,
+    fields=("sku", "name"),
+    keys=_product_keys,
+    label=lambda row: f"{row[4]} - {row[5]}",
+)
+
+
+class ProductLookupView(LookupView):
+    permission_classes = [ProfilePermission]
+    allowed_profiles_by_method = {
+        "GET": ["admin", "manager", "operator", "viewer"],
+    }
+    lookup_index = product_lookup_index
+
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -90,7 +91,123 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+# Pool de conexões Redis por processo: tamanho máximo, timeouts (s) do caminho
+# da requisição e intervalo (s) do health check de conexões ociosas
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "1"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+# Circuit breaker: erros seguidos para abrir e segundos aberto antes do comando de teste
+REDIS_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("REDIS_CIRCUIT_FAILURE_THRESHOLD", "5"))
+REDIS_CIRCUIT_RESET_SECONDS = float(os.getenv("REDIS_CIRCUIT_RESET_SECONDS", "10"))
+# Acesso a GET /metrics: IPs (REMOTE_ADDR) liberados e/ou token Bearer do scraper
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "120"))
+# Limite por rota (primeira regra que casar; sem `methods` vale para todos):
+# requisições por minuto por cliente e rajada máxima (`burst`, padrão = per_minute)
+RATE_LIMIT_ROUTES = [
+    {"name": "auth", "prefix": "/api/v1/auth/", "methods": ["POST"], "per_minute": int(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "20"))},
+    {"name": "import", "prefix": "/api/v1/products/import", "methods": ["POST"], "per_minute": int(os.getenv("RATE_LIMIT_IMPORT_PER_MINUTE", "10"))},
+    {"name": "export", "prefix": "/api/v1/orders/export", "per_minute": int(os.getenv("RATE_LIMIT_EXPORT_PER_MINUTE", "10"))},
+    {"name": "api", "prefix": "/api/", "per_minute": RATE_LIMIT_PER_MINUTE},
+]
+# Proxies confiáveis na frente da aplicação (load balancer): o IP do cliente vem
+# do X-Forwarded-For; 0 = usa REMOTE_ADDR
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+# Pré-checagem local: fichas retiradas do Redis de uma vez quando o bucket está
+# folgado, validade (s) das sobras no processo e máximo de clientes em memória
+RATE_LIMIT_LOCAL_BATCH = int(os.getenv("RATE_LIMIT_LOCAL_BATCH", "10"))
+RATE_LIMIT_LOCAL_LEASE_SECONDS = float(os.getenv("RATE_LIMIT_LOCAL_LEASE_SECONDS", "1"))
+RATE_LIMIT_LOCAL_MAX_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "10000"))
+
+# Reserva de estoque na criação de pedidos: "pessimistic" (select_for_update)
+# ou "optimistic" (baixa condicional sem lock prévio). Outro valor impede a subida.
+STOCK_RESERVATION_MODE = os.getenv("STOCK_RESERVATION_MODE", "pessimistic")
+
+# Retry de transações em deadlock / lock wait timeout (OrderService)
+DB_LOCK_RETRY_ATTEMPTS = int(os.getenv("DB_LOCK_RETRY_ATTEMPTS", "3"))
+DB_LOCK_RETRY_BASE_DELAY_MS = int(os.getenv("DB_LOCK_RETRY_BASE_DELAY_MS", "20"))
+
+# Idempotency-Key: retenção da resposta (Redis e tabela), TTL do claim em
+# processamento (renovado enquanto o handler roda) e tempo máximo que uma
+# duplicata concorrente espera pelo resultado
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(60 * 60 * 24)))
+IDEMPOTENCY_LOCK_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_TTL_SECONDS", "30"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+
+# Numeração de pedidos: "sequence" (blocos reservados no banco) ou
+# "snowflake" (tempo + worker id + sequência; worker id vazio = via Redis)
+ORDER_NUMBER_GENERATOR = os.getenv("ORDER_NUMBER_GENERATOR", "sequence")
+ORDER_NUMBER_BLOCK_SIZE = int(os.getenv("ORDER_NUMBER_BLOCK_SIZE", "1000"))
+ORDER_NUMBER_WORKER_ID = int(os.environ["ORDER_NUMBER_WORKER_ID"]) if os.getenv("ORDER_NUMBER_WORKER_ID") else None
+# TTL (s) do arrendamento do worker id no Redis quando ORDER_NUMBER_WORKER_ID está vazio
+ORDER_NUMBER_WORKER_LEASE_SECONDS = int(os.getenv("ORDER_NUMBER_WORKER_LEASE_SECONDS", "30"))
+
+# Cache do detalhe do pedido (GET /orders/<pk>): TTL do payload no Redis
+ORDER_DETAIL_CACHE_TTL_SECONDS = int(os.getenv("ORDER_DETAIL_CACHE_TTL_SECONDS", "300"))
+
+# Snapshot do catálogo de produtos por processo: idade máxima sem revalidar
+# (cobre falhas do pub/sub) e thread de escuta do canal de invalidação
+CATALOG_MAX_STALENESS_SECONDS = float(os.getenv("CATALOG_MAX_STALENESS_SECONDS", "30"))
+CATALOG_INVALIDATION_LISTENER = os.getenv("CATALOG_INVALIDATION_LISTENER", "1") == "1"
+# Releitura completa em segundo plano: cobre linhas que commitam tarde demais
+# para o refresh incremental (atraso máximo de visibilidade nesses casos)
+CATALOG_FULL_RELOAD_SECONDS = float(os.getenv("CATALOG_FULL_RELOAD_SECONDS", "300"))
+
+# Busca de produtos (?search=): "auto" (pelo banco), "mysql" (FULLTEXT),
+# "sqlite" (FTS5) ou "like" (icontains, sem índice)
+PRODUCT_SEARCH_BACKEND = os.getenv("PRODUCT_SEARCH_BACKEND", "auto")
+
+# Índices de autocomplete (/customers/lookup, /products/lookup) por processo:
+# intervalo mínimo entre refreshes incrementais e tamanho do overlay antes de
+# fundir com a base
+LOOKUP_REFRESH_SECONDS = float(os.getenv("LOOKUP_REFRESH_SECONDS", "2"))
+LOOKUP_OVERLAY_MAX = int(os.getenv("LOOKUP_OVERLAY_MAX", "10000"))
+# Releitura completa em segundo plano: cobre registros que commitam tarde demais
+# para o refresh incremental (atraso máximo de visibilidade nesses casos)
+LOOKUP_FULL_RELOAD_SECONDS = float(os.getenv("LOOKUP_FULL_RELOAD_SECONDS", "300"))
+
+# Máximo de pedidos por requisição em POST /api/v1/orders/batch
+ORDER_BATCH_MAX_SIZE = int(os.getenv("ORDER_BATCH_MAX_SIZE", "500"))
+
+# GET /api/v1/orders/export: pedidos por lote (uma query de pedidos + uma de itens por lote)
+ORDER_EXPORT_CHUNK_SIZE = int(os.getenv("ORDER_EXPORT_CHUNK_SIZE", "2000"))
+
+# Agregados de vendas: slots das linhas (dia, status) e (dia, produto) e período
+# máximo de GET /api/v1/reports/sales
+SALES_ROLLUP_STATUS_SLOTS = int(os.getenv("SALES_ROLLUP_STATUS_SLOTS", "8"))
+SALES_ROLLUP_PRODUCT_SLOTS = int(os.getenv("SALES_ROLLUP_PRODUCT_SLOTS", "8"))
+SALES_REPORT_MAX_DAYS = int(os.getenv("SALES_REPORT_MAX_DAYS", "366"))
+
+# manage.py relay_events: eventos do outbox por lote e espera quando não há pendentes
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", "500"))
+OUTBOX_RELAY_IDLE_SECONDS = float(os.getenv("OUTBOX_RELAY_IDLE_SECONDS", "1"))
+
+# Redis Streams de eventos (manage.py consume_events): tamanho aproximado do
+# stream, grupo padrão, mensagens por leitura, bloqueio do XREADGROUP, tempo
+# ocioso para reassumir pendentes, entregas antes do dead letter e por quantos
+# segundos o grupo lembra um `event_id` processado (descarte de duplicatas)
+EVENT_STREAM_MAXLEN = int(os.getenv("EVENT_STREAM_MAXLEN", "1000000"))
+EVENT_CONSUMER_GROUP = os.getenv("EVENT_CONSUMER_GROUP", "erp")
+EVENT_CONSUMER_BATCH_SIZE = int(os.getenv("EVENT_CONSUMER_BATCH_SIZE", "100"))
+EVENT_CONSUMER_BLOCK_MS = int(os.getenv("EVENT_CONSUMER_BLOCK_MS", "5000"))
+EVENT_CONSUMER_CLAIM_IDLE_MS = int(os.getenv("EVENT_CONSUMER_CLAIM_IDLE_MS", "60000"))
+EVENT_CONSUMER_MAX_DELIVERIES = int(os.getenv("EVENT_CONSUMER_MAX_DELIVERIES", "5"))
+EVENT_CONSUMER_DEDUPE_SECONDS = int(os.getenv("EVENT_CONSUMER_DEDUPE_SECONDS", "86400"))
+
+# POST /api/v1/products/stock/bulk: máximo de SKUs por requisição e SKUs por UPDATE
+STOCK_BULK_MAX_SIZE = int(os.getenv("STOCK_BULK_MAX_SIZE", "10000"))
+STOCK_BULK_CHUNK_SIZE = int(os.getenv("STOCK_BULK_CHUNK_SIZE", "500"))
+
+# Importação de produtos (POST /api/v1/products/import): linhas por upsert,
+# diretório dos arquivos de resultado (linhas rejeitadas) e por quantas horas
+# eles ficam disponíveis para download
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "1000"))
+PRODUCT_IMPORT_RESULTS_DIR = Path(
+    os.getenv("PRODUCT_IMPORT_RESULTS_DIR", os.path.join(tempfile.gettempdir(), "erp-product-imports"))
+)
+PRODUCT_IMPORT_RESULTS_RETENTION_HOURS = float(os.getenv("PRODUCT_IMPORT_RESULTS_RETENTION_HOURS", "24"))
 
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.DefaultPagination",
@@ -160,6 +277,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 # Métodos permitidos
@@ -5,10 +5,12 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from drf_spectacular.views import SpectacularRedocView
 
 from apps.common.health import health
+from apps.common.metrics import metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health", health),
+    path("metrics", metrics),
     path("templates/home", TemplateView.as_view(template_name="index.html"), name="home"),
     path("api/schema", SpectacularAPIView.as_view(), name="schema"),
     path("docs", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
@@ -0,0 +1,68 @@
+"""Benchmark: tempo de lock e round trips de `create_order` por quantidade de itens.
+
+Não roda na suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_bench_create_order.py -s
+"""
+import os
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.customers.models import Customer
+from apps.orders.services.order_service import CreateOrderInput, CreateOrderItemInput, OrderService
+from apps.products.models import Product
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks"),
+    pytest.mark.django_db(transaction=True),
+]
+
+ITEM_COUNTS = [1, 10, 40, 100]
+ROUNDS = 5
+
+
+def _locked_section(queries) -> list:
+    """Queries entre o SELECT ... FOR UPDATE e o COMMIT (seção que segura os locks)."""
+    start = next((i for i, q in enumerate(queries) if "FOR UPDATE" in q["sql"].upper()), 0)
+    return queries[start:]
+
+
+def test_bench_create_order_lock_hold_by_item_count():
+    customer = Customer.objects.create(name="Bench", cpf_cnpj="bench-1", email="bench@test.com")
+    products = [
+        Product.objects.create(sku=f"BENCH-{i}", name=f"Bench {i}", price=Decimal("1.00"), stock_qty=10_000)
+        for i in range(max(ITEM_COUNTS))
+    ]
+
+    print()
+    print(f"{'itens':>6} {'queries':>8} {'locked':>7} {'lock_ms':>9} {'total_ms':>9}")
+    for count in ITEM_COUNTS:
+        lock_ms = []
+        total_ms = []
+        locked_queries = 0
+        queries = 0
+        for round_ in range(ROUNDS):
+            data = CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key=f"bench-{count}-{round_}",
+                observations="",
+                items=[CreateOrderItemInput(product_id=p.id, qty=1) for p in products[:count]],
+            )
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                OrderService.create_order(data)
+            total_ms.append((time.perf_counter() - started) * 1000)
+
+            locked = _locked_section(ctx.captured_queries)
+            lock_ms.append(sum(float(q["time"]) for q in locked) * 1000)
+            locked_queries = len(locked)
+            queries = len(ctx.captured_queries)
+
+        print(
+            f"{count:>6} {queries:>8} {locked_queries:>7} "
+            f"{sum(lock_ms) / ROUNDS:>9.2f} {sum(total_ms) / ROUNDS:>9.2f}"
+        )
@@ -0,0 +1,63 @@
+"""Benchmark: latência do autocomplete (`/lookup?q=`) sobre o índice em memória.
+
+Monta o snapshot com 1M de clientes sintéticos (sem banco) e mede 10k consultas
+de prefixo aleatórias. Não roda na suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_bench_lookup.py -s
+"""
+import os
+import random
+import time
+
+import pytest
+
+from apps.common.lookup import LookupSnapshot, PrefixIndex
+from apps.customers.views import _customer_keys
+
+pytestmark = pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks")
+
+CUSTOMERS = 1_000_000
+QUERIES = 10_000
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Élida", "Fábio", "Gustavo", "Helena", "Íris", "João"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Pereira", "Lima", "Gonçalves", "Araújo", "Conceição"]
+
+
+def _rows(count: int):
+    rng = random.Random(42)
+    for pk in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {pk}"
+        document = f"{pk:011d}"
+        yield (pk, True, None, None, name, document, f"cliente{pk}@bench.com")
+
+
+def test_bench_lookup_p99_1m_customers():
+    started = time.perf_counter()
+    labels, pairs = {}, []
+    for row in _rows(CUSTOMERS):
+        labels[row[0]] = f"{row[4]} ({row[5]})"
+        pairs.extend((key, row[0]) for key in set(_customer_keys(row)))
+    snapshot = LookupSnapshot(PrefixIndex(pairs), labels)
+    print(f"\nbuild: {CUSTOMERS} clientes, {len(snapshot.base)} chaves em {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    queries = []
+    for _ in range(QUERIES):
+        kind = rng.random()
+        if kind < 0.5:
+            word = rng.choice(FIRST_NAMES + LAST_NAMES)
+            queries.append(word[: rng.randint(2, len(word))])
+        elif kind < 0.8:
+            queries.append(f"{rng.randint(1, CUSTOMERS):011d}"[: rng.randint(4, 11)])
+        else:
+            queries.append(f"cliente{rng.randint(1, CUSTOMERS)}"[: rng.randint(8, 14)])
+
+    timings = []
+    for q in queries:
+        t0 = time.perf_counter()
+        snapshot.search(q, 20)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[int(len(timings) * 0.99)] * 1000
+    print(f"lookup: p50={p50:.3f}ms p99={p99:.3f}ms ({QUERIES} consultas)")
+    assert p99 < 1.0
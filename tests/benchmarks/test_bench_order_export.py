@@ -0,0 +1,95 @@
+"""Benchmark: exportação de 1M de linhas de itens com teto fixo de memória.
+
+Insere 250k pedidos com 4 itens cada (SQL direto, para a carga não dominar o
+tempo) e consome `GET /orders/export?rows=items` pelo serviço, medindo o pico
+de memória do Python (`tracemalloc`), o tempo até o primeiro pedaço e a vazão.
+Não roda na suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_bench_order_export.py -s
+"""
+import os
+import time
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.customers.models import Customer
+from apps.orders.models import Order
+from apps.orders.services.order_export import export_orders
+from apps.products.models import Product
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks"),
+    pytest.mark.django_db(transaction=True),
+]
+
+ORDERS = int(os.getenv("BENCH_ORDERS", "250000"))
+ITEMS_PER_ORDER = 4
+CHUNK_SIZE = 2000
+INSERT_BATCH = 10_000
+MAX_PEAK_MB = 32
+
+
+def _seed() -> None:
+    customer = Customer.objects.create(name="Bench Export", cpf_cnpj="bench-export", email="bench-export@test.com")
+    products = [
+        Product.objects.create(sku=f"BX-{i}", name=f"Produto {i}", price=Decimal("9.90")) for i in range(ITEMS_PER_ORDER)
+    ]
+    start_at = timezone.now() - timedelta(seconds=ORDERS)
+    # Mesmo formato que o ORM grava (senão a comparação do keyset não bate no SQLite)
+    adapt = connection.ops.adapt_datetimefield_value
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, ORDERS, INSERT_BATCH):
+            cursor.executemany(
+                "INSERT INTO orders (customer_id, number, status, total, observations, idempotency_key, created_at, updated_at)"
+                " VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                [
+                    (customer.id, f"BX{i:010d}", "PENDENTE", "39.60", "", f"bx-{i}", at, at)
+                    for i in range(start, min(start + INSERT_BATCH, ORDERS))
+                    for at in [adapt(start_at + timedelta(seconds=i))]
+                ],
+            )
+        order_ids = list(Order.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(order_ids), INSERT_BATCH // ITEMS_PER_ORDER):
+            cursor.executemany(
+                "INSERT INTO order_items (order_id, product_id, qty, unit_price, subtotal) VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (order_id, product.id, 1, "9.90", "9.90")
+                    for order_id in order_ids[start : start + INSERT_BATCH // ITEMS_PER_ORDER]
+                    for product in products
+                ],
+            )
+
+    # Estatísticas reais para o otimizador (como em produção)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE" if connection.vendor == "sqlite" else "ANALYZE TABLE orders, order_items")
+
+
+def test_bench_export_1m_item_rows_under_memory_ceiling():
+    started = time.perf_counter()
+    _seed()
+    print(f"\ncarga: {ORDERS} pedidos / {ORDERS * ITEMS_PER_ORDER} itens em {time.perf_counter() - started:.1f}s")
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_chunk = None
+    lines = size = 0
+    for chunk in export_orders(Order.objects.all(), "csv", "items", CHUNK_SIZE):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        lines += chunk.count("\n")
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"export: {lines - 1} linhas ({size / 1e6:.0f} MB) em {elapsed:.1f}s, "
+        f"primeiro pedaço em {first_chunk * 1000:.2f}ms, pico {peak / 1e6:.1f} MB"
+    )
+    assert lines - 1 == ORDERS * ITEMS_PER_ORDER
+    assert peak < MAX_PEAK_MB * 1e6
@@ -0,0 +1,56 @@
+"""Benchmark: importação de catálogo (200k SKUs) — vazão e pico de memória.
+
+Gera um CSV sintético em disco e importa pelo serviço (mesmo caminho do
+endpoint e do comando). O pico de memória do Python (`tracemalloc`) deve ficar
+limitado ao lote, não ao arquivo. Não roda na suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_bench_product_import.py -s
+"""
+import csv
+import io
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from apps.products.models import Product
+from apps.products.services.product_import import import_products
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks"),
+    pytest.mark.django_db(transaction=True),
+]
+
+ROWS = 200_000
+CHUNK_SIZE = 1000
+MAX_PEAK_MB = 64
+
+
+def _write_catalog(path, rows: int) -> None:
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["sku", "name", "description", "price", "stock_qty", "is_active"])
+        for i in range(rows):
+            writer.writerow([f"SUP-{i:07d}", f"Produto fornecedor {i}", "Importado do catálogo", f"{i % 997}.90", i % 50, "true"])
+
+
+def test_bench_import_200k_products(tmp_path):
+    source = tmp_path / "catalogo.csv"
+    _write_catalog(source, ROWS)
+    print(f"\narquivo: {source.stat().st_size / 1e6:.1f} MB")
+
+    for label in ("insert", "upsert"):
+        tracemalloc.start()
+        started = time.perf_counter()
+        with source.open("rb") as stream:
+            summary = import_products(stream, "csv", io.StringIO(), CHUNK_SIZE)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{label}: {summary.upserted} linhas em {elapsed:.1f}s ({summary.upserted / elapsed:,.0f}/s), pico {peak / 1e6:.1f} MB")
+        assert summary.upserted == ROWS and summary.failed == 0
+        assert peak < MAX_PEAK_MB * 1e6
+
+    assert Product.objects.count() == ROWS
@@ -0,0 +1,65 @@
+"""Benchmark: cliente Redis novo por requisição vs. pool compartilhado com pipeline.
+
+Simula o rate limiter (INCR + EXPIRE + GET) contra um Redis real. Não roda na
+suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 REDIS_HOST=127.0.0.1 pytest tests/benchmarks/test_bench_redis_pool.py -s
+"""
+import os
+import statistics
+import time
+
+import pytest
+import redis
+from django.conf import settings
+
+from apps.common.redis import get_redis, pipelined, reset_pools
+
+
+def _redis_up() -> bool:
+    try:
+        return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks"),
+]
+
+REQUESTS = 5_000
+
+
+def _percentiles(samples: list) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"p50={cuts[49] * 1000:.3f}ms p99={cuts[98] * 1000:.3f}ms"
+
+
+def test_bench_pooled_pipeline_vs_client_per_request():
+    if not _redis_up():
+        pytest.skip("Redis indisponível")
+    key = "bench:ratelimit"
+
+    per_request = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
+        client.incr(key)
+        client.expire(key, 60)
+        client.get(key)
+        client.close()
+        per_request.append(time.perf_counter() - started)
+
+    reset_pools()
+    pooled = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        with pipelined(get_redis()) as batch:
+            batch.incr(key)
+            batch.expire(key, 60, nx=True)
+            batch.get(key)
+        pooled.append(time.perf_counter() - started)
+
+    get_redis().delete(key)
+    print(f"\ncliente por requisição: {_percentiles(per_request)}")
+    print(f"pool + pipeline:        {_percentiles(pooled)}")
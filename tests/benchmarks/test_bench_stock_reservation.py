@@ -0,0 +1,96 @@
+"""Benchmark: contenção em SKU compartilhado, reserva pessimista vs otimista.
+
+Não roda na suíte padrão. Execute com:
+
+    RUN_BENCHMARKS=1 pytest tests/benchmarks/test_bench_stock_reservation.py -s
+
+Em SQLite o lock de escrita é global; os números só são representativos em MySQL.
+"""
+import os
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+from django.db import close_old_connections
+from django.db.utils import OperationalError
+from django.test import override_settings
+
+from apps.customers.models import Customer
+from apps.orders.services.order_service import (
+    ConflictError,
+    CreateOrderInput,
+    CreateOrderItemInput,
+    OrderService,
+)
+from apps.products.models import Product
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="defina RUN_BENCHMARKS=1 para rodar benchmarks"),
+    pytest.mark.django_db(transaction=True),
+]
+
+WORKERS = 8
+ORDERS_PER_WORKER = 25
+
+
+def _run(mode: str, customer: Customer, hot: Product, others) -> dict:
+    results = {"ok": 0, "conflict": 0, "error": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(WORKERS)
+
+    def worker(worker_id: int):
+        close_old_connections()
+        barrier.wait(timeout=10)
+        for i in range(ORDERS_PER_WORKER):
+            data = CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key=f"bench-{mode}-{worker_id}-{i}",
+                observations="",
+                items=[
+                    CreateOrderItemInput(product_id=hot.id, qty=1),
+                    CreateOrderItemInput(product_id=others[(worker_id + i) % len(others)].id, qty=1),
+                ],
+            )
+            try:
+                OrderService.create_order(data)
+                key = "ok"
+            except ConflictError:
+                key = "conflict"
+            except OperationalError:
+                key = "error"
+            with lock:
+                results[key] += 1
+        close_old_connections()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(WORKERS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results["elapsed_s"] = time.perf_counter() - started
+    return results
+
+
+@pytest.mark.parametrize("mode", ["pessimistic", "optimistic"])
+def test_bench_shared_sku_contention(mode):
+    customer = Customer.objects.create(name="Bench", cpf_cnpj=f"bench-{mode}", email=f"{mode}@bench.com")
+    hot = Product.objects.create(sku=f"HOT-{mode}", name="Hot", price=Decimal("1.00"), stock_qty=1_000_000)
+    others = [
+        Product.objects.create(sku=f"COLD-{mode}-{i}", name=f"Cold {i}", price=Decimal("1.00"), stock_qty=1_000_000)
+        for i in range(WORKERS)
+    ]
+
+    with override_settings(STOCK_RESERVATION_MODE=mode):
+        results = _run(mode, customer, hot, others)
+    total = WORKERS * ORDERS_PER_WORKER
+    print()
+    print(
+        f"mode={mode} workers={WORKERS} orders={total} ok={results['ok']} "
+        f"conflict={results['conflict']} error={results['error']} "
+        f"elapsed={results['elapsed_s']:.2f}s throughput={total / results['elapsed_s']:.1f}/s"
+    )
+
+    hot.refresh_from_db()
+    assert hot.stock_qty == 1_000_000 - results["ok"]
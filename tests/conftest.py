@@ -0,0 +1,243 @@
+import importlib
+import threading
+import time
+
+import pytest
+import redis
+from django.test import override_settings
+
+from apps.common.redis import reset_pools
+from apps.customers.views import customer_lookup_index
+from apps.orders.services.order_cache import reset_pending_invalidations
+from apps.products.services.catalog import reset_catalog
+from apps.products.views import product_lookup_index
+
+
+class FakeRedis:
+    """Redis em memória (subconjunto de strings/contadores e streams) para testes sem servidor."""
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+        self.published = []
+        self.streams = {}
+        self._groups = {}
+        self._last_id = (0, 0)
+
+    def _alive(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def mget(self, *keys):
+        if len(keys) == 1 and isinstance(keys[0], (list, tuple)):
+            keys = keys[0]
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = str(value)
+            self._expires.pop(key, None)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def setex(self, key, seconds, value):
+        return self.set(key, value, ex=seconds)
+
+    def expire(self, key, seconds, nx=False):
+        with self._lock:
+            if not self._alive(key) or (nx and key in self._expires):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self.get(key) or 0) + amount
+            self._data[key] = str(value)
+            return value
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    # ---------- streams (sem bloqueio; tempo ocioso em ms reais) ----------
+
+    @staticmethod
+    def _parse_id(message_id):
+        ms, _, seq = str(message_id).partition("-")
+        return int(ms), int(seq or 0)
+
+    def xadd(self, name, fields, id="*", maxlen=None, approximate=True):
+        with self._lock:
+            ms = int(time.time() * 1000)
+            self._last_id = (ms, 0) if ms > self._last_id[0] else (self._last_id[0], self._last_id[1] + 1)
+            message_id = f"{self._last_id[0]}-{self._last_id[1]}"
+            entries = self.streams.setdefault(name, [])
+            entries.append((message_id, {str(k): str(v) for k, v in fields.items()}))
+            if maxlen is not None and len(entries) > maxlen:
+                del entries[: len(entries) - maxlen]
+            return message_id
+
+    def xlen(self, name):
+        return len(self.streams.get(name, []))
+
+    def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        with self._lock:
+            if (name, groupname) in self._groups:
+                raise redis.ResponseError("BUSYGROUP Consumer Group name already exists")
+            if name not in self.streams:
+                if not mkstream:
+                    raise redis.ResponseError("ERR no such key")
+                self.streams[name] = []
+            last = self.streams[name][-1][0] if id == "$" and self.streams[name] else ("0-0" if id == "$" else id)
+            self._groups[(name, groupname)] = {"last": self._parse_id(last), "pending": {}}
+            return True
+
+    def _entry(self, name, message_id):
+        return next((fields for entry_id, fields in self.streams.get(name, []) if entry_id == message_id), None)
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None, noack=False):
+        with self._lock:
+            response = []
+            for name, start in streams.items():
+                group = self._groups[(name, groupname)]
+                assert start == ">", "apenas leitura de mensagens novas"
+                fresh = [(i, f) for i, f in self.streams.get(name, []) if self._parse_id(i) > group["last"]][:count]
+                for message_id, _ in fresh:
+                    group["pending"][message_id] = [consumername, time.monotonic(), 1]
+                if fresh:
+                    group["last"] = self._parse_id(fresh[-1][0])
+                    response.append([name, fresh])
+            return response
+
+    def xack(self, name, groupname, *ids):
+        with self._lock:
+            pending = self._groups[(name, groupname)]["pending"]
+            return sum(1 for message_id in ids if pending.pop(message_id, None))
+
+    def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None, justid=False):
+        with self._lock:
+            pending = self._groups[(name, groupname)]["pending"]
+            now = time.monotonic()
+            candidates = sorted(
+                (message_id for message_id in pending if self._parse_id(message_id) >= self._parse_id(start_id)),
+                key=self._parse_id,
+            )
+            claimed, cursor = [], "0-0"
+            for message_id in candidates:
+                if count is not None and len(claimed) == count:
+                    cursor = message_id
+                    break
+                entry = pending[message_id]
+                if (now - entry[1]) * 1000 >= min_idle_time:
+                    pending[message_id] = [consumername, now, entry[2] + 1]
+                    claimed.append((message_id, self._entry(name, message_id)))
+            return [cursor, claimed, []]
+
+    def xpending_range(self, name, groupname, min, max, count, consumername=None, idle=None):
+        with self._lock:
+            pending = self._groups[(name, groupname)]["pending"]
+            now = time.monotonic()
+            low, high = self._parse_id(min), self._parse_id(max)
+            return [
+                {
+                    "message_id": message_id,
+                    "consumer": consumer,
+                    "time_since_delivered": int((now - delivered) * 1000),
+                    "times_delivered": times,
+                }
+                for message_id, (consumer, delivered, times) in sorted(pending.items(), key=lambda item: self._parse_id(item[0]))
+                if low <= self._parse_id(message_id) <= high
+            ][:count]
+
+    def xinfo_groups(self, name):
+        with self._lock:
+            return [
+                {
+                    "name": group_name,
+                    "pending": len(group["pending"]),
+                    "lag": sum(1 for i, _ in self.streams.get(name, []) if self._parse_id(i) > group["last"]),
+                }
+                for (stream, group_name), group in self._groups.items()
+                if stream == name
+            ]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def reset(self):
+        self._calls = []
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Substitui `get_redis` / `get_blocking_redis` nos módulos que os importam por um único FakeRedis."""
+    client = FakeRedis()
+
+    def install(*modules):
+        for module in modules:
+            imported = importlib.import_module(module)
+            for name in ("get_redis", "get_blocking_redis"):
+                if hasattr(imported, name):
+                    monkeypatch.setattr(imported, name, lambda: client)
+        return client
+
+    return install
+
+
+def _reset_in_memory_indexes():
+    reset_catalog()
+    customer_lookup_index.reset()
+    product_lookup_index.reset()
+    reset_pending_invalidations()
+    # Circuito do Redis: falhas de conexão de um teste não abrem o circuito do seguinte
+    reset_pools()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_in_memory_indexes():
+    # Índices por processo: ids se repetem entre testes (flush), então cada teste começa do zero
+    _reset_in_memory_indexes()
+    with override_settings(CATALOG_INVALIDATION_LISTENER=False):
+        yield
+    _reset_in_memory_indexes()
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.orders.domain.enums import OrderStatus
+from apps.orders.services.order_service import CreateOrderInput, CreateOrderItemInput, OrderService
+from apps.products.models import Product
+from apps.products.services.stock_service import enable_sharding
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_etag", password="123456"))
+    return api
+
+
+@pytest.fixture
+def customer():
+    return Customer.objects.create(name="Cliente", cpf_cnpj="12345678900", email="c@test.com")
+
+
+@pytest.fixture
+def product():
+    return Product.objects.create(sku="SKU-1", name="Produto", price=Decimal("10.00"), stock_qty=10)
+
+
+def create_order(customer, product, key="idem-etag"):
+    return OrderService.create_order(
+        CreateOrderInput(
+            customer_id=customer.id,
+            idempotency_key=key,
+            observations="",
+            items=[CreateOrderItemInput(product_id=product.id, qty=1)],
+        )
+    )
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+
+def test_product_list_returns_304_until_stock_changes(client, product):
+    first = client.get("/api/v1/products?limit=50")
+    etag = first["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = _revalidate(client, "/api/v1/products?limit=50", etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached["ETag"] == etag
+
+    client.patch(f"/api/v1/products/{product.id}/stock", {"stock_qty": 3}, format="json")
+    assert _revalidate(client, "/api/v1/products?limit=50", etag).status_code == 200
+
+
+def test_product_list_etag_tracks_sharded_reservations(client, customer, product):
+    enable_sharding(product, 2)
+    etag = client.get("/api/v1/products?limit=50")["ETag"]
+
+    create_order(customer, product)
+
+    resp = _revalidate(client, "/api/v1/products?limit=50", etag)
+    assert resp.status_code == 200
+    assert resp.data["results"][0]["stock_qty"] == 9
+
+
+def test_etag_depends_on_query_string(client, product):
+    etag = client.get("/api/v1/products?limit=50")["ETag"]
+    assert _revalidate(client, "/api/v1/products?limit=10", etag).status_code == 200
+
+
+def test_order_list_changes_on_status_and_customer_update(client, customer, product):
+    order = create_order(customer, product)
+    etag = client.get("/api/v1/orders?limit=50")["ETag"]
+    with CaptureQueriesContext(connection) as ctx:
+        assert _revalidate(client, "/api/v1/orders?limit=50", etag).status_code == 304
+    # Impressão digital sem JOIN de clientes sobre os pedidos filtrados
+    assert not [q["sql"] for q in ctx.captured_queries if 'JOIN "customers"' in q["sql"]]
+
+    OrderService.change_status(order_id=order.id, new_status=OrderStatus.CONFIRMADO)
+    resp = _revalidate(client, "/api/v1/orders?limit=50", etag)
+    assert resp.status_code == 200
+
+    etag = resp["ETag"]
+    customer.name = "Novo Nome"
+    customer.save()
+    assert _revalidate(client, "/api/v1/orders?limit=50", etag).status_code == 200
+
+
+def test_customer_list_and_detail(client, customer):
+    etag = client.get("/api/v1/customers?limit=50")["ETag"]
+    assert _revalidate(client, "/api/v1/customers?limit=50", etag).status_code == 304
+
+    detail = client.get(f"/api/v1/customers/{customer.id}")
+    assert detail.status_code == 200
+    assert "Last-Modified" in detail
+    assert _revalidate(client, f"/api/v1/customers/{customer.id}", detail["ETag"]).status_code == 304
+    assert (
+        client.get(f"/api/v1/customers/{customer.id}", HTTP_IF_MODIFIED_SINCE=detail["Last-Modified"]).status_code
+        == 304
+    )
+
+
+def test_order_detail_etag_and_last_modified(client, customer, product):
+    order = create_order(customer, product)
+    detail = client.get(f"/api/v1/orders/{order.id}")
+    assert "Last-Modified" in detail
+    assert _revalidate(client, f"/api/v1/orders/{order.id}", detail["ETag"]).status_code == 304
+
+    OrderService.cancel_order(order_id=order.id)
+    resp = _revalidate(client, f"/api/v1/orders/{order.id}", detail["ETag"])
+    assert resp.status_code == 200
+    assert resp.json()["status"] == OrderStatus.CANCELADO
+
+
+def test_cursor_mode_has_no_etag(client, product):
+    resp = client.get("/api/v1/products?pagination=cursor")
+    assert resp.status_code == 200
+    assert "ETag" not in resp
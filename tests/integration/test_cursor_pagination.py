@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.orders.models import Order
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client():
+    group, _ = Group.objects.get_or_create(name="viewer")
+    user = User.objects.create_user(username="viewer_cursor", password="123456")
+    user.groups.add(group)
+    api = APIClient()
+    api.force_authenticate(user=user)
+    return api
+
+
+@pytest.fixture
+def orders():
+    customer = Customer.objects.create(name="Cliente", cpf_cnpj="12345678901", email="c@test.com")
+    base = timezone.now()
+    created = []
+    for i in range(7):
+        order = Order.objects.create(customer=customer, number=f"N{i:03d}", idempotency_key=f"k{i}", total=Decimal("1"))
+        created.append(order)
+    # Dois pedidos no mesmo instante: o desempate é pelo id
+    for i, order in enumerate(created):
+        Order.objects.filter(pk=order.pk).update(created_at=base - timedelta(minutes=i // 2))
+    return list(Order.objects.order_by("-created_at", "-id"))
+
+
+def _walk(client, url, direction="next"):
+    ids, pages = [], 0
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert "count" not in resp.data
+        ids.extend(row["id"] for row in resp.data["results"])
+        url = resp.data[direction]
+        pages += 1
+    return ids, pages
+
+
+def test_cursor_mode_walks_all_orders_without_count(client, orders):
+    first = client.get("/api/v1/orders?pagination=cursor&limit=3")
+    assert first.data["previous"] is None
+
+    ids, pages = _walk(client, "/api/v1/orders?pagination=cursor&limit=3")
+    assert ids == [o.pk for o in orders]
+    assert pages == 3
+
+
+def test_cursor_previous_link_returns_same_page(client, orders):
+    first = client.get("/api/v1/orders?pagination=cursor&limit=3")
+    second = client.get(first.data["next"])
+    back = client.get(second.data["previous"])
+
+    assert [r["id"] for r in back.data["results"]] == [r["id"] for r in first.data["results"]]
+    assert back.data["previous"] is None
+    assert back.data["next"] is not None
+
+
+def test_cursor_page_runs_single_query_without_count(client, orders):
+    first = client.get("/api/v1/orders?pagination=cursor&limit=3")
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(first.data["next"])
+    sqls = [q["sql"].upper() for q in ctx.captured_queries if "FROM \"ORDERS\"" in q["sql"].upper()]
+    assert len(sqls) == 1
+    assert "COUNT(" not in sqls[0]
+    assert "OFFSET" not in sqls[0]
+
+
+def test_offset_mode_stays_default(client, orders):
+    resp = client.get("/api/v1/orders?limit=3&offset=3")
+    assert resp.data["count"] == 7
+    assert len(resp.data["results"]) == 3
+
+
+def test_invalid_cursor_returns_404(client, orders):
+    assert client.get("/api/v1/orders?cursor=nao-e-cursor").status_code == 404
+
+
+def test_cursor_mode_on_products_and_customers(client):
+    for i in range(5):
+        Product.objects.create(sku=f"SKU-{i}", name=f"P{i}", price=Decimal("1.00"), stock_qty=1)
+        Customer.objects.create(name=f"C{i}", cpf_cnpj=f"0000000000{i}", email=f"c{i}@test.com")
+
+    product_ids, _ = _walk(client, "/api/v1/products?pagination=cursor&limit=2")
+    customer_ids, _ = _walk(client, "/api/v1/customers?pagination=cursor&limit=2")
+
+    assert product_ids == list(Product.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+    assert customer_ids == list(Customer.objects.order_by("-created_at", "-id").values_list("id", flat=True))
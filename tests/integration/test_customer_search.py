@@ -0,0 +1,114 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.customers.services.search import route, search_customers
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_customer_search", password="123456"))
+    return api
+
+
+@pytest.fixture
+def customers():
+    return {
+        "cpf": Customer.objects.create(
+            name="João Silva", cpf_cnpj="123.456.789-09", email="Joao.Silva@Empresa.com", phone="(11) 98765-4321"
+        ),
+        "cnpj": Customer.objects.create(
+            name="Comercial Souza", cpf_cnpj="12.345.678/0001-90", email="compras@souza.com.br", phone="+55 21 3333-1234"
+        ),
+        "other": Customer.objects.create(name="Maria Lima", cpf_cnpj="98765432100", email="maria@lima.com"),
+    }
+
+
+def _search(client, term: str) -> set:
+    resp = client.get("/api/v1/customers", {"search": term})
+    assert resp.status_code == 200
+    return {row["id"] for row in resp.json()["results"]}
+
+
+def test_save_keeps_normalized_columns(customers):
+    customer = customers["cpf"]
+    assert (customer.cpf_cnpj_digits, customer.email_normalized, customer.phone_digits) == (
+        "12345678909",
+        "joao.silva@empresa.com",
+        "11987654321",
+    )
+
+    customer.phone = "(11) 2222-0000"
+    customer.save(update_fields=["phone"])
+    customer.refresh_from_db()
+    assert customer.phone_digits == "1122220000"
+    assert customer.cpf_cnpj_digits == "12345678909"
+
+
+def test_search_routes_by_term_shape(client, customers):
+    cpf, cnpj, other = customers["cpf"].id, customers["cnpj"].id, customers["other"].id
+
+    assert _search(client, "123.456.789-09") == {cpf}
+    assert _search(client, "123.456.789") == {cpf}
+    assert _search(client, "123.456") == {cpf, cnpj}
+    assert _search(client, "12.345.678/0001-90") == {cnpj}
+    # CNPJ digitado pela metade com 11 dígitos: ainda prefixo, não igualdade de CPF
+    assert _search(client, "12.345.678/000") == {cnpj}
+    assert _search(client, "JOAO.SILVA@empresa.com") == {cpf}
+    assert _search(client, "compras@") == {cnpj}
+    assert _search(client, "(11) 9876") == {cpf}
+    assert _search(client, "+55 21") == {cnpj}
+    assert _search(client, "12345") == {cpf, cnpj}
+    assert _search(client, "9876") == {other}
+    assert _search(client, "Silva") == {cpf}
+    assert _search(client, "comercial souza") == {cnpj}
+    assert _search(client, "") == {cpf, cnpj, other}
+
+
+def test_route_kinds():
+    assert route("a@b.com")[0] == "email"
+    assert route("123.456.789-09")[0] == "document"
+    assert route("(11) 9999")[0] == "phone"
+    assert route("99")[0] == "number"
+    assert route("Loja 1")[0] == "name"
+
+
+def test_digit_prefix_is_an_index_range(customers):
+    Customer.objects.bulk_create(
+        [Customer(name=f"C{i}", cpf_cnpj=f"{i:011d}", email=f"c{i}@x.com", cpf_cnpj_digits=f"{i:011d}") for i in range(300)]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    for term, index_column in (("123.456", "cpf_cnpj_digits"), ("(11) 98", "phone_digits")):
+        sql, params = search_customers(Customer.objects.all(), term).query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = " ".join(row[3] for row in cursor.fetchall())
+                assert "USING INDEX" in plan and f"({index_column}>?" in plan
+            else:
+                cursor.execute(f"EXPLAIN {sql}", params)
+                columns = [col[0] for col in cursor.description]
+                step = dict(zip(columns, cursor.fetchone()))
+                assert step["type"] == "range"
+
+
+def test_backfill_command_fills_existing_rows_without_touching_updated_at(customers):
+    Customer.all_objects.update(cpf_cnpj_digits="", email_normalized="", phone_digits="")
+    customers["other"].delete()
+    before = dict(Customer.all_objects.values_list("id", "updated_at"))
+
+    call_command("backfill_customer_search", "--batch-size", "2")
+
+    rows = {row[0]: row[1:] for row in Customer.all_objects.values_list("id", "cpf_cnpj_digits", "phone_digits")}
+    assert rows[customers["cpf"].id] == ("12345678909", "11987654321")
+    assert rows[customers["cnpj"].id] == ("12345678000190", "552133331234")
+    assert rows[customers["other"].id] == ("98765432100", "")
+    assert dict(Customer.all_objects.values_list("id", "updated_at")) == before
@@ -0,0 +1,132 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from apps.common import metrics
+from apps.common.streams import StreamConsumer, dead_letter_stream, handlers_for
+from apps.customers.models import Customer
+from apps.orders.domain.events import ORDER_STATUS_CHANGED, STREAM, relay_pending_events
+from apps.orders.services.order_service import CreateOrderInput, CreateOrderItemInput, OrderService
+from apps.products.models import Product
+
+TEST_STREAM = "test:events"
+
+
+def _add(redis, count, event_type="PING"):
+    return [redis.xadd(TEST_STREAM, {"event_id": i, "event_type": event_type, "payload": json.dumps({"n": i})}) for i in range(count)]
+
+
+def _consumer(redis, name, handlers, **options):
+    consumer = StreamConsumer(redis, TEST_STREAM, "workers", name, handlers, **{"batch_size": 10, "claim_idle_ms": 0, **options})
+    consumer.ensure_group()
+    return consumer
+
+
+def test_consumers_in_same_group_split_the_stream_and_ack_in_bulk(fake_redis):
+    redis = fake_redis()
+    _add(redis, 5)
+    seen = []
+    acks = []
+    original_xack = redis.xack
+    redis.xack = lambda *args: acks.append(len(args) - 2) or original_xack(*args)
+
+    first = _consumer(redis, "a", {"PING": lambda event: seen.append(("a", event.payload["n"]))}, batch_size=3)
+    second = _consumer(redis, "b", {"PING": lambda event: seen.append(("b", event.payload["n"]))}, batch_size=3)
+    second.ensure_group()  # grupo já existente não é erro
+
+    assert first.poll(block=False).processed == 3
+    assert second.poll(block=False).processed == 2
+    assert seen == [("a", 0), ("a", 1), ("a", 2), ("b", 3), ("b", 4)]
+    # Um XACK por lote
+    assert acks == [3, 2]
+    assert first.group_lag() == {"pending": 0, "lag": 0}
+
+
+def test_failed_message_is_reclaimed_then_dead_lettered(fake_redis):
+    redis = fake_redis()
+    _add(redis, 2)
+    _add(redis, 1, event_type="SEM_HANDLER")
+    calls = []
+
+    def flaky(event):
+        calls.append(event.payload["n"])
+        if event.payload["n"] == 1:
+            raise ValueError("falha no handler")
+
+    crashed = _consumer(redis, "crashed", {"PING": flaky}, claim_idle_ms=60000)
+    stats = crashed.poll(block=False)
+    assert (stats.processed, stats.failed, stats.skipped) == (1, 1, 1)
+    assert crashed.group_lag()["pending"] == 1
+
+    # Outro processo reassume a pendente (XAUTOCLAIM) até esgotar as entregas
+    rescuer = _consumer(redis, "rescuer", {"PING": flaky}, max_deliveries=3)
+    assert rescuer.poll(block=False).failed == 1
+    stats = rescuer.poll(block=False)
+    assert (stats.failed, stats.dead) == (1, 1)
+    assert calls == [0, 1, 1, 1]
+    assert rescuer.group_lag()["pending"] == 0
+    dead = [fields for _, fields in redis.streams[dead_letter_stream(TEST_STREAM)]]
+    assert [(fields["event_id"], fields["group"]) for fields in dead] == [("1", "workers")]
+    assert metrics.get("stream_events_dead_lettered_total", stream=TEST_STREAM, group="workers") >= 1
+
+
+def test_reclaimed_message_succeeds_on_another_consumer(fake_redis):
+    redis = fake_redis()
+    _add(redis, 1)
+    _consumer(redis, "crashed", {"PING": lambda event: 1 / 0}, claim_idle_ms=60000).poll(block=False)
+
+    seen = []
+    stats = _consumer(redis, "rescuer", {"PING": lambda event: seen.append(event.payload["n"])}).poll(block=False)
+
+    assert (stats.processed, seen) == (1, [0])
+
+
+def test_republished_event_is_detected_as_duplicate(fake_redis):
+    redis = fake_redis()
+    # Relay que caiu entre o XADD e o commit do lote publica o mesmo event_id de novo
+    first_id = _add(redis, 1)[0]
+    seen = []
+    consumer = _consumer(redis, "a", {"PING": lambda event: seen.append((event.event_id, event.message_id))})
+    assert consumer.poll(block=False).processed == 1
+
+    _add(redis, 1)
+    stats = consumer.poll(block=False)
+
+    assert (stats.processed, stats.duplicates) == (0, 1)
+    assert seen == [("0", first_id)]
+    assert consumer.group_lag()["pending"] == 0
+    assert metrics.get("stream_events_duplicate_total", stream=TEST_STREAM, group="workers") == 1
+
+
+def test_duplicate_in_the_same_batch_is_handled_once(fake_redis):
+    redis = fake_redis()
+    _add(redis, 1)
+    _add(redis, 1)
+    seen = []
+
+    stats = _consumer(redis, "a", {"PING": lambda event: seen.append(event.event_id)}, dedupe_seconds=60).poll(block=False)
+
+    assert (stats.processed, stats.duplicates, seen) == (1, 1, ["0"])
+
+
+@pytest.mark.django_db
+def test_relay_and_consume_events_command(fake_redis):
+    redis = fake_redis("apps.orders.domain.events", "apps.common.management.commands.consume_events")
+    customer = Customer.objects.create(name="Streams", cpf_cnpj="streams-1", email="streams@test.com")
+    product = Product.objects.create(sku="STR-1", name="Produto", price=Decimal("1.00"), stock_qty=10)
+    for i in range(3):
+        order = OrderService.create_order(
+            CreateOrderInput(customer.id, f"streams-{i}", "", [CreateOrderItemInput(product_id=product.id, qty=1)])
+        )
+        OrderService.cancel_order(order.id)
+    assert relay_pending_events(batch_size=10) == 3
+    assert ORDER_STATUS_CHANGED in handlers_for(STREAM)
+
+    out = io.StringIO()
+    call_command("consume_events", "--once", "--consumer", "test-1", stdout=out)
+
+    assert "3 processados, 0 ignorados, 0 duplicados, 0 falhas" in out.getvalue()
+    assert redis.xinfo_groups(STREAM) == [{"name": "erp", "pending": 0, "lag": 0}]
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.http import HttpResponse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.common.idempotency import IdempotencyStore, _fingerprint
+from apps.common.models import IdempotencyRecord
+from apps.customers.models import Customer
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def admin_client(db):
+    user = User.objects.create_superuser(username="idem_admin", password="123456", email="idem@test.com")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.user = user
+    return client
+
+
+def _create_order(client, customer, product, key="idem-layer"):
+    return client.post(
+        "/api/v1/orders",
+        {"customer_id": customer.id, "idempotency_key": key, "items": [{"product_id": product.id, "qty": 1}]},
+        format="json",
+        HTTP_IDEMPOTENCY_KEY=f"hdr-{key}",
+    )
+
+
+def test_create_with_header_replays_first_response(admin_client):
+    customer = Customer.objects.create(name="Idem", cpf_cnpj="321", email="idem-c@test.com")
+    product = Product.objects.create(sku="SKU-IDEM", name="Idem", price="5.00", stock_qty=10)
+
+    first = _create_order(admin_client, customer, product)
+    with CaptureQueriesContext(connection) as ctx:
+        retry = _create_order(admin_client, customer, product)
+
+    assert first.status_code == 201
+    assert retry.status_code == 200
+    assert retry["Idempotent-Replayed"] == "true"
+    assert retry.content == first.content
+    # O replay nunca chega ao ORM de pedidos/produtos
+    assert not [q for q in ctx.captured_queries if '"orders"' in q["sql"] or '"products"' in q["sql"]]
+    product.refresh_from_db()
+    assert product.stock_qty == 9
+
+
+def test_status_patch_retry_returns_stored_response_instead_of_conflict(admin_client):
+    customer = Customer.objects.create(name="Idem", cpf_cnpj="322", email="idem-s@test.com")
+    product = Product.objects.create(sku="SKU-IDEM-2", name="Idem", price="5.00", stock_qty=10)
+    order_id = _create_order(admin_client, customer, product, key="idem-status").json()["id"]
+
+    responses = [
+        admin_client.patch(
+            f"/api/v1/orders/{order_id}/status",
+            {"status": "CONFIRMADO"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="confirm-1",
+        )
+        for _ in range(2)
+    ]
+
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[0].content == responses[1].content
+
+    mismatch = admin_client.patch(
+        f"/api/v1/orders/{order_id}/status",
+        {"status": "CANCELADO"},
+        format="json",
+        HTTP_IDEMPOTENCY_KEY="confirm-1",
+    )
+    assert mismatch.status_code == 422
+
+
+def test_concurrent_duplicate_waits_for_in_flight_result(admin_client):
+    product = Product.objects.create(sku="SKU-IDEM-3", name="Idem", price="5.00", stock_qty=10)
+    path = f"/api/v1/products/{product.id}/stock"
+    payload = {"stock_qty": 3}
+
+    scope = f"{admin_client.user.pk}:PATCH:{path}:stock-1"
+    owner = IdempotencyStore(hashlib.sha256(scope.encode("utf-8")).hexdigest())
+    fake_request = type("R", (), {"data": payload})()
+    assert owner.claim(_fingerprint(fake_request))
+
+    results = {}
+
+    def duplicate():
+        close_old_connections()
+        results["response"] = admin_client.patch(path, payload, format="json", HTTP_IDEMPOTENCY_KEY="stock-1")
+        close_old_connections()
+
+    thread = threading.Thread(target=duplicate)
+    thread.start()
+    thread.join(timeout=0.3)
+    assert thread.is_alive()  # aguardando o dono da chave
+
+    owner.save(_fingerprint(fake_request), HttpResponse(b'{"stock_qty": 3}', status=200, content_type="application/json"))
+    owner.release()
+    thread.join(timeout=5)
+
+    assert results["response"].status_code == 200
+    assert results["response"].content == b'{"stock_qty": 3}'
+    product.refresh_from_db()
+    assert product.stock_qty == 10  # o handler não rodou na duplicata
+
+
+def _stored_record(digest, age_seconds):
+    record = IdempotencyRecord.objects.create(
+        key=digest, request_fingerprint=_fingerprint(type("R", (), {"data": {}})()), status_code=200, body=b"{}"
+    )
+    IdempotencyRecord.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(seconds=age_seconds))
+    return record
+
+
+@override_settings(IDEMPOTENCY_TTL_SECONDS=60)
+def test_expired_db_record_is_not_replayed_and_can_be_reclaimed():
+    store = IdempotencyStore("expired-digest")
+    _stored_record("expired-digest", age_seconds=120)
+
+    assert store.stored() is None
+    assert store.claim("novo")
+    record = IdempotencyRecord.objects.get(key="expired-digest")
+    assert (record.status_code, record.request_fingerprint) == (None, "novo")
+    store.release()
+
+
+@override_settings(IDEMPOTENCY_TTL_SECONDS=60)
+def test_purge_command_deletes_only_expired_records():
+    _stored_record("old-digest", age_seconds=120)
+    _stored_record("fresh-digest", age_seconds=10)
+
+    call_command("purge_idempotency_records", "--batch-size", "1", stdout=io.StringIO())
+
+    assert list(IdempotencyRecord.objects.values_list("key", flat=True)) == ["fresh-digest"]
+
+
+@override_settings(IDEMPOTENCY_LOCK_TTL_SECONDS=1)
+def test_claim_is_renewed_while_the_handler_runs(fake_redis):
+    redis = fake_redis("apps.common.idempotency")
+    store = IdempotencyStore("slow-digest")
+    assert store.claim("fp")
+
+    store.keep_alive()
+    time.sleep(1.5)  # mais que o TTL do claim
+
+    assert redis.get(store.lock_key) == store.token
+    assert not IdempotencyStore("slow-digest").claim("fp")
+    store.release()
+    assert redis.get(store.lock_key) is None
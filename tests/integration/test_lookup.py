@@ -0,0 +1,139 @@
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.customers.views import customer_lookup_index
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_lookup", password="123456"))
+    return api
+
+
+@pytest.fixture
+def customers():
+    return [
+        Customer.objects.create(name="João da Silva", cpf_cnpj="123.456.789-00", email="Joao@Empresa.com"),
+        Customer.objects.create(name="Maria Souza", cpf_cnpj="98.765.432/0001-10", email="maria@x.com"),
+        Customer.objects.create(name="Inativo", cpf_cnpj="111", email="i@x.com", is_active=False),
+    ]
+
+
+def _ids(resp) -> list:
+    assert resp.status_code == 200
+    return [row["id"] for row in resp.json()]
+
+
+def test_customer_lookup_by_name_word_document_and_email(client, customers):
+    joao, maria, _ = customers
+
+    resp = client.get("/api/v1/customers/lookup?q=joa")
+    assert resp.json() == [{"id": joao.id, "label": "João da Silva (123.456.789-00)"}]
+    assert _ids(client.get("/api/v1/customers/lookup?q=silva")) == [joao.id]
+    assert _ids(client.get("/api/v1/customers/lookup?q=98.765")) == [maria.id]
+    assert _ids(client.get("/api/v1/customers/lookup?q=98765432")) == [maria.id]
+    assert _ids(client.get("/api/v1/customers/lookup?q=JOAO@emp")) == [joao.id]
+    assert _ids(client.get("/api/v1/customers/lookup?q=inativo")) == []
+
+
+def test_lookup_respects_limit_and_requires_q(client):
+    Product.objects.bulk_create(
+        [Product(sku=f"CAB-{i:03d}", name=f"Cabo {i}", price=Decimal("1.00")) for i in range(30)]
+    )
+    assert len(_ids(client.get("/api/v1/products/lookup?q=cab&limit=5"))) == 5
+    assert len(_ids(client.get("/api/v1/products/lookup?q=cab"))) == 20
+    assert client.get("/api/v1/products/lookup").status_code == 400
+    assert client.get("/api/v1/products/lookup?q=cab&limit=500").status_code == 400
+
+
+def test_product_lookup_by_sku_and_name(client):
+    product = Product.objects.create(sku="PAR-10", name="Parafuso Sextavado", price=Decimal("1.00"))
+
+    resp = client.get("/api/v1/products/lookup?q=par-1")
+    assert resp.json() == [{"id": product.id, "label": "PAR-10 - Parafuso Sextavado"}]
+    assert _ids(client.get("/api/v1/products/lookup?q=sext")) == [product.id]
+
+
+def test_incremental_refresh_applies_changes_without_reload(client, customers):
+    joao, maria, inactive = customers
+    client.get("/api/v1/customers/lookup?q=x")  # carga inicial
+
+    joao.name = "Joana Prado"
+    joao.save()
+    maria.delete()
+    inactive.is_active = True
+    inactive.save()
+
+    with CaptureQueriesContext(connection) as ctx:
+        customer_lookup_index.refresh()
+    assert len(ctx.captured_queries) == 1  # só o delta, sem recarregar
+
+    assert _ids(client.get("/api/v1/customers/lookup?q=prado")) == [joao.id]
+
+    assert _ids(client.get("/api/v1/customers/lookup?q=silva")) == []
+    assert _ids(client.get("/api/v1/customers/lookup?q=maria")) == []
+    assert _ids(client.get("/api/v1/customers/lookup?q=inat")) == [inactive.id]
+
+
+@override_settings(LOOKUP_OVERLAY_MAX=1)
+def test_overlay_is_merged_into_base(client, customers):
+    joao, maria, _ = customers
+    client.get("/api/v1/customers/lookup?q=x")
+
+    joao.name = "Joana Prado"
+    joao.save()
+    maria.name = "Mariana Souza"
+    maria.save()
+    customer_lookup_index.refresh()
+
+    assert _ids(client.get("/api/v1/customers/lookup?q=mariana")) == [maria.id]
+    snapshot = customer_lookup_index.snapshot()
+    assert not snapshot.replaced and len(snapshot.overlay) == 0
+    assert _ids(client.get("/api/v1/customers/lookup?q=joana")) == [joao.id]
+
+
+@override_settings(LOOKUP_REFRESH_SECONDS=0)
+def test_stale_index_refreshes_in_background_without_blocking_the_request(client, customers):
+    joao, _, _ = customers
+    client.get("/api/v1/customers/lookup?q=x")
+    joao.name = "Joana Prado"
+    joao.save()
+
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/api/v1/customers/lookup?q=prado")
+    assert not [q for q in ctx.captured_queries if '"customers"' in q["sql"]]
+
+    _wait_for_refresh()
+    assert _ids(client.get("/api/v1/customers/lookup?q=prado")) == [joao.id]
+
+
+def test_full_reload_picks_up_rows_committed_late(client, customers):
+    joao, _, _ = customers
+    client.get("/api/v1/customers/lookup?q=x")
+
+    # Commit chega muito depois do `updated_at` gravado: fica atrás da marca do delta
+    Customer.objects.filter(pk=joao.pk).update(name="Joana Prado", updated_at=joao.updated_at.replace(year=2000))
+    customer_lookup_index.refresh()
+    assert _ids(client.get("/api/v1/customers/lookup?q=prado")) == []
+
+    with override_settings(LOOKUP_FULL_RELOAD_SECONDS=0):
+        customer_lookup_index.refresh()
+    assert _ids(client.get("/api/v1/customers/lookup?q=prado")) == [joao.id]
+
+
+def _wait_for_refresh():
+    deadline = time.monotonic() + 5
+    while customer_lookup_index._refresh_lock.locked() and time.monotonic() < deadline:
+        time.sleep(0.01)
@@ -0,0 +1,18 @@
+from django.test import override_settings
+
+from apps.common import metrics
+
+
+@override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"], METRICS_TOKEN="")
+def test_metrics_only_for_allowed_ips(client):
+    metrics.increment("test_metrics_access_total")
+
+    assert client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code == 200
+    assert client.get("/metrics", REMOTE_ADDR="8.8.8.8").status_code == 403
+
+
+@override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="s3cret")
+def test_metrics_accepts_bearer_token(client):
+    assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code == 200
+    assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer errado").status_code == 403
+    assert client.get("/metrics").status_code == 403
@@ -0,0 +1,130 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.common import metrics
+from apps.customers.models import Customer
+from apps.orders.domain.enums import OrderStatus
+from apps.orders.services import order_cache
+from apps.orders.services.order_service import CreateOrderInput, CreateOrderItemInput, OrderService
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def redis(fake_redis):
+    metrics.reset()
+    return fake_redis("apps.orders.services.order_cache")
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_cache", password="123456"))
+    return api
+
+
+@pytest.fixture
+def order():
+    customer = Customer.objects.create(name="Cliente", cpf_cnpj="12345678900", email="c@test.com")
+    product = Product.objects.create(sku="SKU-1", name="Produto", price=Decimal("10.00"), stock_qty=10)
+    return OrderService.create_order(
+        CreateOrderInput(
+            customer_id=customer.id,
+            idempotency_key="idem-cache",
+            observations="",
+            items=[CreateOrderItemInput(product_id=product.id, qty=1)],
+        )
+    )
+
+
+def test_cache_hit_runs_zero_queries(redis, client, order):
+    first = client.get(f"/api/v1/orders/{order.id}")
+    assert first.status_code == 200
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = client.get(f"/api/v1/orders/{order.id}")
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert len(ctx.captured_queries) == 0
+    assert metrics.get("order_detail_cache_misses_total") == 1
+    assert metrics.get("order_detail_cache_hits_total") == 1
+
+
+@pytest.mark.parametrize("write", ["change_status", "cancel_order"])
+def test_committed_write_is_never_served_stale(redis, client, order, write):
+    client.get(f"/api/v1/orders/{order.id}")
+    if write == "change_status":
+        OrderService.change_status(order_id=order.id, new_status=OrderStatus.CONFIRMADO)
+        expected = OrderStatus.CONFIRMADO
+    else:
+        OrderService.cancel_order(order_id=order.id)
+        expected = OrderStatus.CANCELADO
+
+    resp = client.get(f"/api/v1/orders/{order.id}")
+    assert resp.json()["status"] == expected
+    assert len(resp.json()["status_history"]) == 2
+    assert metrics.get("order_detail_cache_misses_total") == 2
+
+
+def test_payload_built_before_commit_is_not_served_after(redis, client, order):
+    # Leitura concorrente monta o payload com a versão antiga enquanto a escrita commita
+    def load_then_commit():
+        payload = {"id": order.id, "status": OrderStatus.PENDENTE}
+        OrderService.change_status(order_id=order.id, new_status=OrderStatus.CONFIRMADO)
+        return payload, order.updated_at
+
+    order_cache.get_order_detail(order.id, load_then_commit)
+
+    resp = client.get(f"/api/v1/orders/{order.id}")
+    assert resp.json()["status"] == OrderStatus.CONFIRMADO
+
+
+def test_redis_down_falls_back_to_database(client, order):
+    metrics.reset()
+    resp = client.get(f"/api/v1/orders/{order.id}")
+    assert resp.status_code == 200
+    assert resp.json()["id"] == order.id
+    assert metrics.get("order_detail_cache_hits_total") == 0
+
+
+def test_missing_order_is_404_and_not_cached(redis, client):
+    assert client.get("/api/v1/orders/999999").status_code == 404
+    assert redis.get("order:detail:999999") is None
+
+
+def test_bump_deletes_the_cached_payload(redis, client, order):
+    client.get(f"/api/v1/orders/{order.id}")
+    assert redis.get(f"order:detail:{order.id}") is not None
+
+    order_cache.bump_order_detail_versions([order.id])
+
+    assert redis.get(f"order:detail:{order.id}") is None
+
+
+def test_failed_bump_bypasses_cache_until_it_is_reapplied(redis, client, order):
+    client.get(f"/api/v1/orders/{order.id}")
+
+    def broken_pipeline(*args, **kwargs):
+        raise ConnectionError("redis fora do ar")
+
+    redis.pipeline = broken_pipeline
+    OrderService.change_status(order_id=order.id, new_status=OrderStatus.CONFIRMADO)
+    assert metrics.get("order_detail_cache_invalidation_failures_total") == 1
+
+    # Payload antigo ainda está no Redis, mas este processo não o lê
+    assert redis.get(f"order:detail:{order.id}") is not None
+    assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == OrderStatus.CONFIRMADO
+    assert metrics.get("order_detail_cache_hits_total") == 0
+
+    # Redis de volta: a próxima leitura reaplica o bump e o cache volta a valer
+    del redis.pipeline
+    assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == OrderStatus.CONFIRMADO
+    assert client.get(f"/api/v1/orders/{order.id}").json()["status"] == OrderStatus.CONFIRMADO
+    assert metrics.get("order_detail_cache_hits_total") == 1
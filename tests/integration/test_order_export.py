@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.orders.models import Order, OrderItem
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_export", password="123456"))
+    return api
+
+
+@pytest.fixture
+def orders():
+    customer = Customer.objects.create(name="Financeiro, Ltda", cpf_cnpj="export-1", email="export@test.com")
+    products = [
+        Product.objects.create(sku=f"EXP-{i}", name=f"Produto {i}", price=Decimal("2.50")) for i in range(3)
+    ]
+    now = timezone.now()
+    created = []
+    for i, status in enumerate(["PENDENTE", "CONFIRMADO", "PENDENTE", "CANCELADO"]):
+        order = Order.objects.create(
+            customer=customer, number=f"EXP-{i}", status=status, total=Decimal("5.00") * (i + 1), idempotency_key=f"exp-{i}"
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(days=10 - i))
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, product=product, qty=2, unit_price=Decimal("2.50"), subtotal=Decimal("5.00"))
+                for product in products[: i % 3]
+            ]
+        )
+        created.append(order)
+    return created
+
+
+def _body(resp) -> str:
+    assert resp.status_code == 200
+    return b"".join(resp.streaming_content).decode()
+
+
+def test_csv_export_one_row_per_order(client, orders):
+    resp = client.get("/api/v1/orders/export", {"format": "csv"})
+
+    assert resp["Content-Type"] == "text/csv; charset=utf-8"
+    assert resp["Content-Disposition"].startswith('attachment; filename="orders-')
+    rows = list(csv.DictReader(io.StringIO(_body(resp))))
+    assert [row["number"] for row in rows] == ["EXP-0", "EXP-1", "EXP-2", "EXP-3"]
+    assert [row["items_count"] for row in rows] == ["0", "1", "2", "0"]
+    assert rows[1]["customer_name"] == "Financeiro, Ltda"
+    assert rows[1]["total"] == "10.00"
+
+
+def test_ndjson_export_includes_items_and_filters(client, orders):
+    start = Order.objects.get(pk=orders[1].pk).created_at
+    resp = client.get(
+        "/api/v1/orders/export",
+        {"format": "ndjson", "status": "PENDENTE", "from": start.isoformat()},
+    )
+
+    assert resp["Content-Type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in _body(resp).splitlines()]
+    assert [record["number"] for record in records] == ["EXP-2"]
+    assert [item["sku"] for item in records[0]["items"]] == ["EXP-0", "EXP-1"]
+    assert records[0]["items"][0] == {
+        "product_id": Product.objects.get(sku="EXP-0").id,
+        "sku": "EXP-0",
+        "product_name": "Produto 0",
+        "qty": 2,
+        "unit_price": "2.50",
+        "subtotal": "5.00",
+    }
+
+
+def test_export_one_row_per_item(client, orders):
+    csv_rows = list(csv.DictReader(io.StringIO(_body(client.get("/api/v1/orders/export", {"rows": "items"})))))
+    assert [(row["number"], row["sku"]) for row in csv_rows] == [("EXP-1", "EXP-0"), ("EXP-2", "EXP-0"), ("EXP-2", "EXP-1")]
+    assert csv_rows[0]["order_id"] == str(orders[1].id)
+
+    lines = _body(client.get("/api/v1/orders/export", {"rows": "items", "format": "ndjson"})).splitlines()
+    assert [json.loads(line)["order_id"] for line in lines] == [orders[1].id, orders[2].id, orders[2].id]
+
+
+@override_settings(ORDER_EXPORT_CHUNK_SIZE=2)
+def test_export_reads_in_keyset_chunks(client, orders):
+    resp = client.get("/api/v1/orders/export", {"format": "ndjson"})
+
+    with CaptureQueriesContext(connection) as ctx:
+        records = [json.loads(line) for line in _body(resp).splitlines()]
+
+    assert [record["number"] for record in records] == ["EXP-0", "EXP-1", "EXP-2", "EXP-3"]
+    order_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "orders"' in q["sql"]]
+    item_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "order_items"' in q["sql"]]
+    # 2 lotes + a consulta vazia que encerra; nenhuma com OFFSET ou COUNT
+    assert len(order_queries) == 3 and len(item_queries) == 2
+    assert not any("OFFSET" in sql or "COUNT(" in sql for sql in order_queries)
+
+
+def test_export_validates_params_as_json(client, orders):
+    resp = client.get("/api/v1/orders/export", {"format": "xlsx"})
+    assert resp.status_code == 400
+    assert "format" in resp.json()
+    assert client.get("/api/v1/orders/export", {"from": "ontem"}).status_code == 400
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.customers.models import Customer
+from apps.orders.domain.enums import OrderStatus
+from apps.orders.models import Order
+from apps.orders.views import OrderListCreateView
+
+pytestmark = pytest.mark.django_db
+
+STATUSES = [choice for choice, _ in OrderStatus.choices]
+
+
+@pytest.fixture
+def client():
+    group, _ = Group.objects.get_or_create(name="viewer")
+    user = User.objects.create_user(username="viewer_filters", password="123456")
+    user.groups.add(group)
+    api = APIClient()
+    api.force_authenticate(user=user)
+    return api
+
+
+@pytest.fixture
+def orders():
+    customers = [
+        Customer.objects.create(name=f"C{i}", cpf_cnpj=f"{i:011d}", email=f"c{i}@test.com") for i in range(20)
+    ]
+    Order.objects.bulk_create(
+        [
+            Order(
+                customer=customers[i % 20],
+                number=f"{i:012d}",
+                status=STATUSES[i % len(STATUSES)],
+                total=Decimal(i % 500),
+                idempotency_key=f"k{i}",
+            )
+            for i in range(2000)
+        ]
+    )
+    # Estatísticas reais para o otimizador (sem elas o SQLite escolhe índice por heurística)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return customers
+
+
+def _queryset(query: str):
+    view = OrderListCreateView()
+    view.request = Request(APIRequestFactory().get(f"/api/v1/orders?{query}"))
+    view.format_kwarg = None
+    return view.get_queryset()
+
+
+def _orders_plan(queryset) -> list:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[3] for row in cursor.fetchall() if " orders " in f"{row[3]} "]
+        cursor.execute(f"EXPLAIN {sql}", params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall() if dict(zip(columns, row))["table"] == "orders"]
+
+
+def _uses_index(plan: list) -> bool:
+    if connection.vendor == "sqlite":
+        return bool(plan) and all(step.startswith("SEARCH orders USING") for step in plan)
+    return bool(plan) and all(step["type"] != "ALL" and step["key"] for step in plan)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "status=CONFIRMADO",
+        "customer_id={customer}",
+        "created_from={since}",
+        "created_from={since}&created_to={until}",
+        "total_min=10&total_max=20",
+        "number=0000000012",
+        "status=PENDENTE&created_from={since}",
+        "customer_id={customer}&status=PENDENTE",
+        "customer_id={customer}&created_from={since}",
+    ],
+)
+def test_filters_use_index(orders, query):
+    now = timezone.now()
+    query = query.format(
+        customer=orders[3].id,
+        since=(now - timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        until=(now - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    )
+    plan = _orders_plan(_queryset(query))
+    assert _uses_index(plan), plan
+
+
+def test_filters_narrow_results(client, orders):
+    resp = client.get("/api/v1/orders?status=CANCELADO&total_min=100&total_max=200&limit=100")
+    assert resp.status_code == 200
+    expected = Order.objects.filter(status="CANCELADO", total__gte=100, total__lte=200).count()
+    assert resp.data["count"] == expected
+    assert all(row["status"] == "CANCELADO" for row in resp.data["results"])
+
+    resp = client.get("/api/v1/orders?number=00000000001")
+    assert sorted(row["number"] for row in resp.data["results"]) == [f"{i:012d}" for i in range(10, 20)]
+
+    resp = client.get(f"/api/v1/orders?customer_id={orders[0].id}&limit=1")
+    assert resp.data["count"] == 100
+
+
+def test_invalid_filter_returns_400(client, orders):
+    assert client.get("/api/v1/orders?status=INEXISTENTE").status_code == 400
+    assert client.get("/api/v1/orders?total_min=abc").status_code == 400
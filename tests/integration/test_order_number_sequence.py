@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection, transaction
+from django.test import override_settings
+
+from apps.orders.models import OrderNumberSequence
+from apps.orders.services.order_numbers import SequenceBlockNumberGenerator, next_order_numbers
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_sequence_blocks_are_unique_across_threads():
+    generator = SequenceBlockNumberGenerator(block_size=1_000)
+    per_thread, chunk = 50_000, 500
+    results = []
+
+    def worker():
+        try:
+            numbers = []
+            for _ in range(per_thread // chunk):
+                numbers.extend(generator.next_numbers(chunk))
+            results.append(numbers)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = sum(len(numbers) for numbers in results)
+    assert total == 400_000
+    assert len(set().union(*results)) == total
+    assert OrderNumberSequence.objects.get(name="orders").next_value == 400_001
+
+
+def test_sequence_generators_in_different_processes_never_overlap():
+    # Cada instância simula um processo com o próprio bloco em memória
+    generators = [SequenceBlockNumberGenerator(block_size=100) for _ in range(4)]
+    numbers = []
+    for _ in range(250):
+        for generator in generators:
+            numbers.extend(generator.next_numbers(7))
+
+    assert len(numbers) == len(set(numbers)) == 7_000
+    assert all(len(n) == 12 and n.isdigit() for n in numbers)
+
+
+def test_two_generator_instances_allocating_concurrently_never_share_a_block():
+    # Instâncias distintas (como dois processos) competindo pela mesma linha, cada uma em várias threads
+    generators = [SequenceBlockNumberGenerator(block_size=10) for _ in range(2)]
+    results = []
+
+    def worker(generator):
+        try:
+            numbers = []
+            while len(numbers) < 600:
+                try:
+                    numbers.extend(generator.next_numbers(3))
+                except OperationalError:
+                    # SQLite em memória dos testes trava a tabela inteira em vez de esperar
+                    time.sleep(0.001)
+            results.append(numbers)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(g,)) for g in generators for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = sum(len(numbers) for numbers in results)
+    assert total == 3_600
+    assert len(set().union(*results)) == total
+
+
+def test_block_reserved_in_rolled_back_transaction_is_not_reused():
+    first, second = SequenceBlockNumberGenerator(block_size=100), SequenceBlockNumberGenerator(block_size=100)
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        first.next_numbers(2)
+        raise RuntimeError("pedido desfeito")
+
+    # A linha voltou ao valor anterior: o primeiro gerador não pode seguir com números em memória
+    numbers = first.next_numbers(5) + second.next_numbers(5)
+    assert len(set(numbers)) == 10
+
+
+@override_settings(ORDER_NUMBER_GENERATOR="snowflake", ORDER_NUMBER_WORKER_ID=3)
+def test_generator_mode_comes_from_settings():
+    first, second = next_order_numbers(2)
+    assert int(second) > int(first)
+    assert not OrderNumberSequence.objects.exists()
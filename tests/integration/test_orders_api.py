@@ -4,10 +4,12 @@ import pytest
 from django.contrib.auth.models import Group, User
 from django.db import connection
 from django.db.utils import OperationalError
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 from apps.customers.models import Customer
 from apps.orders.models import Order
+from apps.orders.services.order_numbers import next_order_numbers
 from apps.products.models import Product
 
 
@@ -72,6 +74,12 @@ def _authenticated_client(user: User) -> APIClient:
     return client
 
 
+def _data_queries(ctx) -> list:
+    """Queries de dados da requisição (sem controle de transação)."""
+    control = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+    return [q["sql"] for q in ctx.captured_queries if not q["sql"].upper().startswith(control)]
+
+
 @pytest.mark.django_db(transaction=True)
 def test_order_idempotency_three_retries(operator_user):
     customer = Customer.objects.create(name="A", cpf_cnpj="123", email="a@test.com")
@@ -273,3 +281,106 @@ def test_viewer_cannot_create_order(viewer_user):
     }, format="json")
     
     assert response.status_code == 403
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_create_reports_result_per_order(operator_user):
+    customer = Customer.objects.create(name="Batch", cpf_cnpj="555", email="batch@test.com")
+    p1 = Product.objects.create(sku="SKU-B1", name="B1", price="10.00", stock_qty=5)
+    p2 = Product.objects.create(sku="SKU-B2", name="B2", price="4.00", stock_qty=1)
+
+    client = _authenticated_client(operator_user)
+    client.post(
+        "/api/v1/orders",
+        {"customer_id": customer.id, "idempotency_key": "batch-existing", "items": [{"product_id": p1.id, "qty": 1}]},
+        format="json",
+    )
+
+    payload = [
+        {"customer_id": customer.id, "idempotency_key": "batch-1", "items": [{"product_id": p1.id, "qty": 2}]},
+        {"customer_id": customer.id, "idempotency_key": "batch-existing", "items": [{"product_id": p1.id, "qty": 1}]},
+        {"customer_id": customer.id, "idempotency_key": "batch-2", "items": [{"product_id": p2.id, "qty": 2}]},
+        {"customer_id": customer.id, "idempotency_key": "batch-3", "items": []},
+        {"customer_id": customer.id, "idempotency_key": "batch-1", "items": [{"product_id": p1.id, "qty": 2}]},
+        {
+            "customer_id": customer.id,
+            "idempotency_key": "batch-4",
+            "items": [{"product_id": p1.id, "qty": 2}, {"product_id": p2.id, "qty": 1}],
+        },
+    ]
+    response = client.post("/api/v1/orders/batch", payload, format="json")
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["created", "replayed", "failed", "failed", "replayed", "created"]
+    assert results[2]["status_code"] == 409
+    assert results[3]["status_code"] == 400
+    assert results[4]["order"]["id"] == results[0]["order"]["id"]
+    assert results[5]["order"]["total"] == "24.00"
+
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+    assert (p1.stock_qty, p2.stock_qty) == (0, 0)
+    assert Order.objects.count() == 3
+
+    retry = client.post("/api/v1/orders/batch", payload[:1], format="json")
+    assert retry.json()["results"][0]["status"] == "replayed"
+    assert Order.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_batch_create_rejects_non_list_payload(operator_user):
+    client = _authenticated_client(operator_user)
+
+    response = client.post("/api/v1/orders/batch", {"customer_id": 1}, format="json")
+
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_endpoints_build_response_without_requerying(admin_user):
+    customer = Customer.objects.create(name="Queries", cpf_cnpj="444", email="queries@test.com")
+    products = [Product.objects.create(sku=f"SKU-Q{i}", name=f"Q{i}", price="1.00", stock_qty=10) for i in range(3)]
+    client = _authenticated_client(admin_user)
+    next_order_numbers(1)  # bloco de números já reservado
+
+    with CaptureQueriesContext(connection) as ctx:
+        created = client.post(
+            "/api/v1/orders",
+            {
+                "customer_id": customer.id,
+                "idempotency_key": "queries",
+                "items": [{"product_id": p.id, "qty": 1} for p in products],
+            },
+            format="json",
+        )
+    assert created.status_code == 201
+    assert len(created.json()["items"]) == 3
+    # customer, idempotência, lock produtos, insert pedido, insert itens, update estoque, histórico,
+    # agregados de vendas (insert + update por tabela: produto, cliente, status)
+    assert len(_data_queries(ctx)) == 13
+
+    order_id = created.json()["id"]
+    with CaptureQueriesContext(connection) as ctx:
+        patched = client.patch(f"/api/v1/orders/{order_id}/status", {"status": "CONFIRMADO"}, format="json")
+    assert patched.status_code == 200
+    assert [h["to_status"] for h in patched.json()["status_history"]] == ["PENDENTE", "CONFIRMADO"]
+    # lock pedido, update status, itens, histórico, insert histórico, agregado por status (insert + update),
+    # insert do evento no outbox
+    assert len(_data_queries(ctx)) == 8
+
+    with CaptureQueriesContext(connection) as ctx:
+        cancelled = client.delete(f"/api/v1/orders/{order_id}")
+    assert cancelled.status_code == 200
+    assert cancelled.json()["items"][0]["product_name"] == "Q0"
+    # lock pedido, itens, histórico, lock produtos, update estoque, update status, insert histórico,
+    # agregados de vendas (insert + update por tabela), insert do evento no outbox
+    assert len(_data_queries(ctx)) == 14
+
+
+@pytest.mark.django_db
+def test_write_endpoints_return_404_for_unknown_order(admin_user):
+    client = _authenticated_client(admin_user)
+
+    assert client.patch("/api/v1/orders/999/status", {"status": "CONFIRMADO"}, format="json").status_code == 404
+    assert client.delete("/api/v1/orders/999").status_code == 404
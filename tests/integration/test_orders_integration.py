@@ -4,11 +4,14 @@ from decimal import Decimal
 import pytest
 from django.db import close_old_connections, connection
 from django.db.utils import OperationalError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from apps.customers.models import Customer
 from apps.products.models import Product
 from apps.orders.domain.enums import OrderStatus
 from apps.orders.models import Order
+from apps.orders.services.order_numbers import next_order_numbers
 from apps.orders.services.order_service import (
     OrderService,
     CreateOrderInput,
@@ -171,3 +174,142 @@ def test_concurrency_two_orders_competing_for_same_stock_one_must_fail():
         assert results["ok"] == 1
         assert results["conflict"] == 1
         assert product.stock_qty == 0
+
+
+def _create_order_queries(customer: Customer, products, idem_key: str) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        OrderService.create_order(
+            CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key=idem_key,
+                observations="",
+                items=[CreateOrderItemInput(product_id=p.id, qty=1) for p in products],
+            )
+        )
+    return len(ctx.captured_queries)
+
+
+def test_create_order_round_trips_do_not_grow_with_item_count():
+    customer = make_customer()
+    products = [
+        Product.objects.create(sku=f"SKU-BULK-{i}", name=f"P{i}", price=Decimal("2.00"), stock_qty=5)
+        for i in range(20)
+    ]
+    next_order_numbers(1)  # bloco de números já reservado
+
+    single = _create_order_queries(customer, products[:1], "idem-bulk-1")
+    many = _create_order_queries(customer, products[1:], "idem-bulk-19")
+
+    assert single == many
+    assert Order.objects.get(idempotency_key="idem-bulk-19").total == Decimal("38.00")
+    assert set(Product.objects.values_list("stock_qty", flat=True)) == {4}
+
+
+def test_create_order_does_not_touch_the_catalog_snapshot(monkeypatch):
+    customer = make_customer()
+    product = make_product(stock=2)
+
+    def cold_catalog():
+        raise AssertionError("snapshot do catálogo no caminho de escrita")
+
+    monkeypatch.setattr("apps.orders.services.order_service.get_catalog", cold_catalog)
+    order = OrderService.create_order(
+        CreateOrderInput(customer.id, "idem-no-catalog", "", [CreateOrderItemInput(product_id=product.id, qty=1)])
+    )
+
+    assert order.total == Decimal("10.50")
+
+
+def test_create_order_with_repeated_sku_checks_aggregated_stock():
+    customer = make_customer()
+    product = make_product(stock=10, price="1.00")
+
+    with pytest.raises(ConflictError):
+        OrderService.create_order(
+            CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key="idem-repeat",
+                observations="",
+                items=[
+                    CreateOrderItemInput(product_id=product.id, qty=6),
+                    CreateOrderItemInput(product_id=product.id, qty=6),
+                ],
+            )
+        )
+
+    product.refresh_from_db()
+    assert product.stock_qty == 10
+    assert Order.objects.count() == 0
+
+
+@override_settings(STOCK_RESERVATION_MODE="optimistic")
+def test_optimistic_reservation_decrements_stock_without_lock():
+    customer = make_customer()
+    product = make_product(stock=10, price="3.00")
+
+    order = OrderService.create_order(
+        CreateOrderInput(
+            customer_id=customer.id,
+            idempotency_key="idem-optimistic",
+            observations="",
+            items=[CreateOrderItemInput(product_id=product.id, qty=4)],
+        )
+    )
+
+    product.refresh_from_db()
+    assert order.total == Decimal("12.00")
+    assert product.stock_qty == 6
+
+
+@override_settings(STOCK_RESERVATION_MODE="optimistic")
+def test_optimistic_reservation_rolls_back_all_lines_when_one_loses_the_race(monkeypatch):
+    customer = make_customer()
+    p1 = Product.objects.create(sku="SKU-OPT-1", name="P1", price=Decimal("1.00"), stock_qty=5)
+    p2 = Product.objects.create(sku="SKU-OPT-2", name="P2", price=Decimal("1.00"), stock_qty=1)
+
+    # Simula leitura obsoleta: o snapshot sem lock ainda enxerga saldo em p2.
+    def stale_products(product_ids, lock=True):
+        products = list(Product.objects.filter(id__in=product_ids))
+        for product in products:
+            product.stock_qty = 5
+        return products
+
+    monkeypatch.setattr("apps.orders.services.order_service.load_products", stale_products)
+
+    with pytest.raises(ConflictError, match="estoque insuficiente para SKU SKU-OPT-2"):
+        OrderService.create_order(
+            CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key="idem-optimistic-race",
+                observations="",
+                items=[
+                    CreateOrderItemInput(product_id=p1.id, qty=2),
+                    CreateOrderItemInput(product_id=p2.id, qty=2),
+                ],
+            )
+        )
+
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+    assert (p1.stock_qty, p2.stock_qty) == (5, 1)
+    assert Order.objects.count() == 0
+
+
+def test_cancel_order_with_several_products_restores_all_stock():
+    customer = make_customer()
+    products = [
+        Product.objects.create(sku=f"SKU-CANCEL-{i}", name=f"P{i}", price=Decimal("1.00"), stock_qty=5)
+        for i in range(3)
+    ]
+    order = OrderService.create_order(
+        CreateOrderInput(
+            customer_id=customer.id,
+            idempotency_key="idem-cancel-many",
+            observations="",
+            items=[CreateOrderItemInput(product_id=p.id, qty=i + 1) for i, p in enumerate(reversed(products))],
+        )
+    )
+
+    OrderService.cancel_order(order_id=order.id)
+
+    assert set(Product.objects.values_list("stock_qty", flat=True)) == {5}
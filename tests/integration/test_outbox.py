@@ -0,0 +1,98 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.customers.models import Customer
+from apps.orders.domain.enums import OrderStatus
+from apps.orders.domain.events import STREAM, relay_pending_events
+from apps.orders.models import OrderDomainEvent
+from apps.orders.services.order_service import CreateOrderInput, CreateOrderItemInput, OrderService
+from apps.products.models import Product
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def orders():
+    customer = Customer.objects.create(name="Outbox", cpf_cnpj="outbox-1", email="outbox@test.com")
+    product = Product.objects.create(sku="OUT-1", name="Produto", price=Decimal("1.00"), stock_qty=100)
+    return [
+        OrderService.create_order(
+            CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key=f"outbox-{i}",
+                observations="",
+                items=[CreateOrderItemInput(product_id=product.id, qty=1)],
+            )
+        )
+        for i in range(3)
+    ]
+
+
+def test_status_change_writes_event_in_same_transaction_without_redis(orders, fake_redis):
+    redis = fake_redis("apps.orders.domain.events")
+
+    OrderService.change_status(orders[0].id, OrderStatus.CONFIRMADO, note="ok")
+    with pytest.raises(RuntimeError), transaction.atomic():
+        OrderService.cancel_order(orders[1].id)
+        raise RuntimeError("desfaz a transação")
+
+    events = list(OrderDomainEvent.objects.values("order_id", "payload", "sent_at"))
+    assert events == [
+        {
+            "order_id": orders[0].id,
+            "payload": {
+                "order_id": orders[0].id,
+                "number": orders[0].number,
+                "from_status": "PENDENTE",
+                "to_status": "CONFIRMADO",
+                "note": "ok",
+            },
+            "sent_at": None,
+        }
+    ]
+    # Nada vai para o Redis no caminho da requisição
+    assert redis.streams == {}
+
+
+def test_relay_publishes_pending_batches_and_marks_them_sent(orders, fake_redis):
+    redis = fake_redis("apps.orders.domain.events")
+    for order in orders:
+        OrderService.cancel_order(order.id)
+    ids = list(OrderDomainEvent.objects.order_by("id").values_list("id", flat=True))
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert relay_pending_events(batch_size=2) == 2
+    data_queries = [q for q in ctx.captured_queries if "order_domain_events" in q["sql"]]
+    # SELECT do lote + UPDATE de sent_at
+    assert len(data_queries) == 2
+
+    out = io.StringIO()
+    call_command("relay_events", "--once", "--batch-size", "2", stdout=out)
+    assert "1 eventos publicados" in out.getvalue()
+
+    entries = [fields for _, fields in redis.streams[STREAM]]
+    assert [int(fields["event_id"]) for fields in entries] == ids
+    assert {fields["event_type"] for fields in entries} == {"ORDER_STATUS_CHANGED"}
+    assert [json.loads(fields["payload"])["order_id"] for fields in entries] == [order.id for order in orders]
+    assert not OrderDomainEvent.objects.filter(sent_at__isnull=True).exists()
+    assert relay_pending_events(batch_size=10) == 0
+
+
+def test_relay_keeps_events_pending_when_redis_fails(orders, monkeypatch):
+    class DownRedis:
+        def pipeline(self, transaction=True):
+            raise ConnectionError("redis fora do ar")
+
+    monkeypatch.setattr("apps.orders.domain.events.get_redis", DownRedis)
+    OrderService.cancel_order(orders[0].id)
+
+    with pytest.raises(ConnectionError):
+        relay_pending_events(batch_size=10)
+
+    assert OrderDomainEvent.objects.filter(sent_at__isnull=True).count() == 1
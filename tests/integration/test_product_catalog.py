@@ -0,0 +1,145 @@
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.orders.services.order_service import (
+    ConflictError,
+    CreateOrderInput,
+    CreateOrderItemInput,
+    OrderService,
+)
+from apps.products.models import Product
+from apps.products.services import catalog as catalog_module
+from apps.products.services.catalog import INVALIDATION_CHANNEL, get_catalog
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_catalog", password="123456"))
+    return api
+
+
+def make_product(sku: str, price: str = "10.00", **kwargs) -> Product:
+    return Product.objects.create(sku=sku, name=f"Produto {sku}", price=Decimal(price), stock_qty=5, **kwargs)
+
+
+def test_snapshot_loads_lazily_and_indexes_by_id_and_sku():
+    a = make_product("A", "1.50")
+    b = make_product("B", "2.00", is_active=False)
+
+    with CaptureQueriesContext(connection) as ctx:
+        catalog = get_catalog()
+        get_catalog()
+    assert len(ctx.captured_queries) == 1
+
+    assert len(catalog) == 2
+    assert catalog.get(a.id).sku == "A"
+    assert catalog.get_by_sku("B").id == b.id
+    assert catalog.price(a.id) == Decimal("1.50")
+    assert catalog.is_active(a.id) and not catalog.is_active(b.id)
+    assert catalog.get(999999) is None
+
+
+def test_writes_through_api_invalidate_and_publish(client, fake_redis):
+    redis = fake_redis("apps.products.services.catalog")
+    get_catalog()
+
+    created = client.post("/api/v1/products", {"sku": "NEW", "name": "Novo", "price": "3.00"}, format="json")
+    assert created.status_code == 201
+    assert get_catalog().get_by_sku("NEW").price == Decimal("3.00")
+
+    client.patch(f"/api/v1/products/{created.json()['id']}/stock", {"stock_qty": 7}, format="json")
+    assert [channel for channel, _ in redis.published] == [INVALIDATION_CHANNEL, INVALIDATION_CHANNEL]
+
+
+def test_incremental_refresh_applies_only_changed_rows():
+    product = make_product("A")
+    gone = make_product("B")
+    get_catalog()
+
+    Product.objects.filter(id=product.id).update(price=Decimal("9.99"), updated_at=product.updated_at.replace(year=2099))
+    gone.delete()  # soft delete: só `deleted_at` muda
+
+    catalog_module._catalog.invalidate()
+    with CaptureQueriesContext(connection) as ctx:
+        snapshot = get_catalog()
+    assert len(ctx.captured_queries) == 1
+    assert "WHERE" in ctx.captured_queries[0]["sql"].upper()
+    assert snapshot.price(product.id) == Decimal("9.99")
+    assert snapshot.get(gone.id) is None
+
+
+def test_full_reload_in_background_picks_up_rows_committed_late():
+    product = make_product("A")
+    get_catalog()
+
+    # Commit chega muito depois do `updated_at` gravado: fica atrás da marca do incremental
+    Product.objects.filter(id=product.id).update(is_active=False, updated_at=product.updated_at.replace(year=2000))
+    catalog_module._catalog.invalidate()
+    assert get_catalog().is_active(product.id) is True
+
+    with override_settings(CATALOG_FULL_RELOAD_SECONDS=0):
+        get_catalog()  # dispara a releitura sem esperar por ela
+        deadline = time.monotonic() + 5
+        while catalog_module._catalog._reloading and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert get_catalog().is_active(product.id) is False
+
+
+@override_settings(CATALOG_MAX_STALENESS_SECONDS=0)
+def test_stale_snapshot_revalidates_without_invalidation():
+    product = make_product("A")
+    get_catalog()
+    product.is_active = False
+    product.save()
+
+    assert get_catalog().is_active(product.id) is False
+
+
+def test_create_order_rejects_inactive_product_under_lock():
+    customer = Customer.objects.create(name="Cliente", cpf_cnpj="12345678900", email="c@test.com")
+    product = make_product("A", is_active=False)
+
+    # Sem snapshot do catálogo no caminho de escrita: a recusa vem da leitura travada
+    with pytest.raises(ConflictError, match=f"produto {product.id} inativo"):
+        OrderService.create_order(
+            CreateOrderInput(
+                customer_id=customer.id,
+                idempotency_key="idem-inactive",
+                observations="",
+                items=[CreateOrderItemInput(product_id=product.id, qty=1)],
+            )
+        )
+
+
+def test_preview_uses_catalog_prices(client):
+    a = make_product("A", "1.25")
+    b = make_product("B", "4.00")
+    inactive = make_product("C", is_active=False)
+    get_catalog()
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.post(
+            "/api/v1/orders/preview",
+            {"items": [{"product_id": a.id, "qty": 2}, {"product_id": b.id, "qty": 1}]},
+            format="json",
+        )
+    assert resp.status_code == 200
+    assert resp.json()["total"] == "6.50"
+    assert [line["subtotal"] for line in resp.json()["items"]] == ["2.50", "4.00"]
+    assert len(ctx.captured_queries) == 0
+
+    for product_id, expected in ((inactive.id, 409), (999999, 404)):
+        payload = {"items": [{"product_id": product_id, "qty": 1}]}
+        assert client.post("/api/v1/orders/preview", payload, format="json").status_code == expected
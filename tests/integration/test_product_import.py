@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+import os
+import time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from apps.products.services.product_import import import_products, purge_import_results
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client(tmp_path, settings):
+    settings.PRODUCT_IMPORT_RESULTS_DIR = tmp_path / "results"
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_import", password="123456"))
+    return api
+
+
+def _upload(client, name: str, content: bytes, **extra):
+    return client.post(
+        "/api/v1/products/import", {"file": SimpleUploadedFile(name, content), **extra}, format="multipart"
+    )
+
+
+def test_csv_import_upserts_by_sku_and_reports_rejected_rows(client):
+    existing = Product.objects.create(sku="OLD-1", name="Antigo", price=Decimal("1.00"), stock_qty=9)
+    content = (
+        "sku,name,description,price,stock_qty,is_active\n"
+        "NEW-1,Parafuso,Aço,0.35,100,true\n"
+        "OLD-1,Antigo renomeado,,2.50,500,\n"
+        ",Sem SKU,,1.00,,\n"
+        "BAD-1,Preço ruim,,1.234,-1,talvez\n"
+    ).encode("utf-8")
+
+    resp = _upload(client, "catalogo.csv", content)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["rows"], body["upserted"], body["failed"]) == (4, 2, 2)
+
+    created = Product.objects.get(sku="NEW-1")
+    assert (created.name, created.description, created.price, created.stock_qty) == ("Parafuso", "Aço", Decimal("0.35"), 100)
+    existing.refresh_from_db()
+    # Saldo de produto existente não muda pela importação
+    assert (existing.name, existing.price, existing.stock_qty) == ("Antigo renomeado", Decimal("2.50"), 9)
+    assert existing.updated_at > existing.created_at
+
+    errors = client.get(body["errors_url"])
+    assert errors.status_code == 200
+    rows = list(csv.reader(io.StringIO(b"".join(errors.streaming_content).decode())))
+    assert rows[0] == ["line", "sku", "errors"]
+    assert rows[1] == ["4", "", "sku: obrigatório"]
+    assert rows[2][:2] == ["5", "BAD-1"]
+    assert [part.split(":")[0] for part in rows[2][2].split("; ")] == ["price", "stock_qty", "is_active"]
+
+
+def test_import_without_errors_has_no_result_file(client):
+    resp = _upload(client, "ok.ndjson", b'{"sku": "N-1", "name": "Um", "price": "1.00"}\n')
+    assert resp.json() == {"rows": 1, "upserted": 1, "failed": 0, "errors_url": None}
+
+
+def test_import_rejects_unknown_format_and_bad_encoding(client):
+    assert _upload(client, "dados.txt", b"sku,name,price\n").status_code == 400
+    resp = _upload(client, "latin1.csv", "sku,name,price\nA,Ação,1\n".encode("latin-1"))
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "arquivo deve estar em UTF-8"
+
+
+def test_import_chunks_upserts_and_last_duplicate_wins():
+    rows = [{"sku": f"C-{i % 4}", "name": f"Nome {i}", "price": "1.00"} for i in range(6)]
+    stream = io.BytesIO("\n".join(json.dumps(row) for row in rows).encode())
+
+    with CaptureQueriesContext(connection) as ctx:
+        summary = import_products(stream, "ndjson", io.StringIO(), chunk_size=2)
+
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "products"')]
+    assert len(inserts) == 3
+    assert (summary.rows, summary.upserted, summary.failed) == (6, 6, 0)
+    assert dict(Product.objects.values_list("sku", "name")) == {
+        "C-0": "Nome 4",
+        "C-1": "Nome 5",
+        "C-2": "Nome 2",
+        "C-3": "Nome 3",
+    }
+
+
+def test_import_counts_repeated_sku_in_a_chunk_once():
+    stream = io.BytesIO(b"sku,name,price\nR-1,Primeiro,1.00\nR-1,Segundo,2.00\nR-2,Outro,3.00\n")
+
+    summary = import_products(stream, "csv", io.StringIO(), chunk_size=100)
+
+    assert (summary.rows, summary.upserted, summary.failed) == (3, 2, 0)
+    assert Product.objects.get(sku="R-1").name == "Segundo"
+
+
+def test_purge_removes_only_expired_import_results(tmp_path):
+    old, fresh = tmp_path / "old.csv", tmp_path / "fresh.csv"
+    old.write_text("line,sku,errors\n")
+    fresh.write_text("line,sku,errors\n")
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+
+    with override_settings(PRODUCT_IMPORT_RESULTS_DIR=tmp_path):
+        call_command("purge_import_results", "--hours", "1", stdout=io.StringIO())
+
+    assert not old.exists() and fresh.exists()
+    assert purge_import_results(tmp_path / "ausente", 0) == 0
+
+
+def test_import_revives_soft_deleted_sku_and_updates_search_index(client):
+    Product.objects.create(sku="DEL-1", name="Removido", price=Decimal("1.00")).delete()
+    stream = io.BytesIO(b'{"sku": "DEL-1", "name": "Arruela lisa", "price": "3.00"}\nnot json\n[1]\n')
+    result = io.StringIO()
+
+    summary = import_products(stream, "ndjson", result, chunk_size=100)
+
+    assert (summary.upserted, summary.failed) == (1, 2)
+    assert result.getvalue().splitlines()[1:] == ["2,,row: JSON inválido", "3,,row: registro inválido (esperado objeto JSON)"]
+    assert Product.objects.get(sku="DEL-1").name == "Arruela lisa"
+    found = client.get("/api/v1/products", {"search": "arruela"}).json()["results"]
+    assert [p["sku"] for p in found] == ["DEL-1"]
+
+
+@override_settings(PRODUCT_IMPORT_CHUNK_SIZE=1)
+def test_import_products_command(tmp_path):
+    source = tmp_path / "catalogo.csv"
+    source.write_text("sku,name,price\nCMD-1,Um,1.00\nCMD-2,,2.00\n", encoding="utf-8")
+    out = io.StringIO()
+
+    call_command("import_products", str(source), stdout=out)
+
+    assert "2 linhas: 1 importadas, 1 rejeitadas" in out.getvalue()
+    assert Product.objects.filter(sku="CMD-1").exists()
+    errors = (tmp_path / "catalogo.csv.errors.csv").read_text(encoding="utf-8").splitlines()
+    assert errors == ["line,sku,errors", "3,CMD-2,name: obrigatório"]
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from apps.products.models import Product
+from apps.products.services.search import search_products
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_search", password="123456"))
+    return api
+
+
+def make_product(sku: str, name: str, description: str = "") -> Product:
+    return Product.objects.create(sku=sku, name=name, description=description, price=Decimal("1.00"), stock_qty=1)
+
+
+def _skus(resp) -> list:
+    return [row["sku"] for row in resp.json()["results"]]
+
+
+def test_search_matches_sku_name_and_description_by_prefix(client):
+    make_product("PAR-001", "Parafuso sextavado")
+    make_product("POR-002", "Porca", "serve no parafuso sextavado")
+    make_product("ARR-003", "Arruela lisa")
+
+    assert set(_skus(client.get("/api/v1/products?search=parafuso"))) == {"PAR-001", "POR-002"}
+    assert _skus(client.get("/api/v1/products?search=arru")) == ["ARR-003"]
+    assert _skus(client.get("/api/v1/products?search=POR-002")) == ["POR-002"]
+    assert _skus(client.get("/api/v1/products?search=parafuso lisa")) == []
+
+
+def test_search_ranks_by_relevance_unless_ordering_is_given(client):
+    make_product("B-1", "Cabo", "cabo de cobre")
+    make_product("A-2", "Cabo cabo flexível", "cabo cabo cabo")
+
+    assert _skus(client.get("/api/v1/products?search=cabo")) == ["A-2", "B-1"]
+    assert _skus(client.get("/api/v1/products?search=cabo&ordering=name")) == ["B-1", "A-2"]
+
+
+def test_index_follows_updates_and_deletes(client):
+    product = make_product("OLD-1", "Martelo")
+    product.name = "Serrote"
+    product.save()
+
+    assert _skus(client.get("/api/v1/products?search=martelo")) == []
+    assert _skus(client.get("/api/v1/products?search=serrote")) == ["OLD-1"]
+
+    Product.all_objects.filter(id=product.id).delete()
+    assert _skus(client.get("/api/v1/products?search=serrote")) == []
+
+
+def test_stock_updates_do_not_touch_the_search_index():
+    if connection.vendor != "sqlite":
+        pytest.skip("triggers FTS5 só existem no SQLite")
+    product = make_product("STK-1", "Chave")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM products_fts_docsize")
+        before = cursor.fetchone()[0]
+        Product.objects.filter(id=product.id).update(stock_qty=99)
+        cursor.execute("SELECT COUNT(*) FROM products_fts_docsize")
+        assert cursor.fetchone()[0] == before
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'products_fts_au'")
+        assert "UPDATE OF sku, name, description" in cursor.fetchone()[0]
+
+
+def test_punctuation_only_term_returns_everything(client):
+    make_product("X-1", "Qualquer")
+    assert _skus(client.get("/api/v1/products?search=%22%2A")) == ["X-1"]
+
+
+@override_settings(PRODUCT_SEARCH_BACKEND="like")
+def test_like_backend_is_available_as_fallback():
+    make_product("LIKE-1", "Alicate")
+    assert [p.sku for p in search_products(Product.objects.all(), "alic")] == ["LIKE-1"]
@@ -0,0 +1,32 @@
+import pytest
+
+from apps.common.rate_limit import limiter
+
+pytestmark = pytest.mark.django_db
+
+
+def test_rejects_with_retry_after_when_bucket_is_empty(client, monkeypatch):
+    seen = []
+
+    def acquire(key, capacity, refill_per_second, batch):
+        seen.append(key)
+        return 0, 0, 1500
+
+    monkeypatch.setattr(limiter, "acquire", acquire)
+
+    response = client.post("/api/v1/auth/jwt/login", {}, REMOTE_ADDR="9.9.9.9")
+
+    assert response.status_code == 429
+    assert response["Retry-After"] == "2"
+    assert seen == ["rate_limit:auth:ip:9.9.9.9"]
+    # Fora de /api/ não há limite
+    assert client.get("/health").status_code != 429
+
+
+def test_fails_open_when_redis_is_unavailable(client, monkeypatch):
+    def acquire(*args):
+        raise ConnectionError("redis fora do ar")
+
+    monkeypatch.setattr(limiter, "acquire", acquire)
+
+    assert client.get("/api/v1/customers").status_code == 403
@@ -0,0 +1,57 @@
+import socket
+import time
+
+import pytest
+import redis
+from django.test import override_settings
+
+from apps.common.redis import RedisUnavailable, get_circuit_breaker, get_redis, reset_pools
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def redis_down():
+    with override_settings(
+        REDIS_HOST="127.0.0.1",
+        REDIS_PORT=_closed_port(),
+        REDIS_CIRCUIT_FAILURE_THRESHOLD=2,
+        REDIS_CIRCUIT_RESET_SECONDS=60,
+    ):
+        reset_pools()
+        yield
+    reset_pools()
+
+
+def test_client_and_pipeline_fail_fast_once_circuit_opens(redis_down, monkeypatch):
+    client = get_redis()
+    for _ in range(2):
+        with pytest.raises(redis.ConnectionError) as exc:
+            client.get("k")
+        assert not isinstance(exc.value, RedisUnavailable)
+    assert get_circuit_breaker().state == "open"
+
+    def no_connect(*args, **kwargs):
+        raise AssertionError("circuito aberto não deve conectar")
+
+    monkeypatch.setattr(client.connection_pool, "get_connection", no_connect)
+    started = time.monotonic()
+    with pytest.raises(RedisUnavailable):
+        client.incr("k")
+    pipe = client.pipeline(transaction=False)
+    pipe.incr("k")
+    with pytest.raises(RedisUnavailable):
+        pipe.execute()
+    assert time.monotonic() - started < 0.1
+
+
+@pytest.mark.django_db
+def test_health_reports_redis_circuit_state(redis_down, client):
+    for _ in range(2):
+        response = client.get("/health")
+    assert response.status_code == 500
+    assert response.json() == {"status": "fail", "database": True, "redis": False, "redis_circuit": "open"}
@@ -0,0 +1,185 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.dateparse import parse_datetime
+from rest_framework.test import APIClient
+
+from apps.products.models import Product, ProductStockShard
+from apps.products.services.stock_service import enable_sharding
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client():
+    api = APIClient()
+    api.force_authenticate(user=User.objects.create_superuser(username="admin_stock_bulk", password="123456"))
+    return api
+
+
+def _product(sku: str, stock: int) -> Product:
+    return Product.objects.create(sku=sku, name=sku, price=Decimal("1.00"), stock_qty=stock)
+
+
+def _product_updates(ctx) -> list:
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "products"')]
+
+
+def test_stock_patch_delta_is_a_single_relative_update(client):
+    product = _product("DELTA-1", 10)
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.patch(f"/api/v1/products/{product.id}/stock", {"delta": -3}, format="json")
+    assert resp.status_code == 200
+    assert resp.json()["stock_qty"] == 7
+    updates = _product_updates(ctx)
+    assert len(updates) == 1 and '"stock_qty" + ' in updates[0]
+
+    assert client.patch(f"/api/v1/products/{product.id}/stock", {"delta": 5}, format="json").json()["stock_qty"] == 12
+
+    resp = client.patch(f"/api/v1/products/{product.id}/stock", {"delta": -13}, format="json")
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "estoque insuficiente para SKU DELTA-1"
+    product.refresh_from_db()
+    assert product.stock_qty == 12
+
+
+def test_stock_patch_absolute_is_a_single_update(client):
+    product = _product("ABS-1", 10)
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.patch(f"/api/v1/products/{product.id}/stock", {"stock_qty": 4}, format="json")
+
+    assert resp.status_code == 200
+    assert resp.json()["stock_qty"] == 4
+    assert len(_product_updates(ctx)) == 1
+    product.refresh_from_db()
+    assert product.stock_qty == 4
+
+
+@pytest.mark.parametrize("payload", [{}, {"stock_qty": 1, "delta": 1}, {"stock_qty": -1}])
+def test_stock_patch_requires_exactly_one_of_stock_qty_or_delta(client, payload):
+    product = _product("DELTA-2", 1)
+    assert client.patch(f"/api/v1/products/{product.id}/stock", payload, format="json").status_code == 400
+
+
+def test_stock_patch_delta_on_sharded_product(client):
+    product = _product("HOT-DELTA", 8)
+    enable_sharding(product, 2)
+
+    resp = client.patch(f"/api/v1/products/{product.id}/stock", {"delta": -5}, format="json")
+    assert resp.status_code == 200
+    assert resp.json()["stock_qty"] == 3
+    assert sum(ProductStockShard.objects.filter(product=product).values_list("qty", flat=True)) == 3
+
+
+def test_stock_patch_absolute_on_sharded_product_returns_fresh_row(client):
+    product = _product("HOT-ABS", 8)
+    enable_sharding(product, 2)
+    product.refresh_from_db()
+    before = product.updated_at
+
+    resp = client.patch(f"/api/v1/products/{product.id}/stock", {"stock_qty": 5}, format="json")
+
+    assert resp.status_code == 200
+    assert resp.json()["stock_qty"] == 5
+    product.refresh_from_db()
+    assert product.updated_at > before
+    assert parse_datetime(resp.json()["updated_at"]) == product.updated_at
+
+
+def test_bulk_stock_applies_absolute_and_delta_with_per_sku_results(client):
+    _product("A", 10)
+    _product("B", 10)
+    _product("C", 2)
+    _product("D", 0).delete()
+
+    resp = client.post(
+        "/api/v1/products/stock/bulk",
+        [
+            {"sku": "A", "stock_qty": 50},
+            {"sku": "B", "delta": -4},
+            {"sku": "C", "delta": -3},
+            {"sku": "D", "stock_qty": 1},
+            {"sku": "X", "delta": 1},
+            {"sku": "A", "delta": 1},
+            {"sku": "B"},
+        ],
+        format="json",
+    )
+
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [(r["index"], r["sku"], r["status"], r["stock_qty"]) for r in results] == [
+        (0, "A", "updated", 50),
+        (1, "B", "updated", 6),
+        (2, "C", "failed", 2),
+        (3, "D", "not_found", None),
+        (4, "X", "not_found", None),
+        (5, "A", "failed", None),
+        (6, "B", "failed", None),
+    ]
+    assert results[2]["detail"] == "estoque insuficiente para SKU C"
+    assert results[5]["detail"] == "SKU repetido no lote"
+    assert dict(Product.objects.values_list("sku", "stock_qty")) == {"A": 50, "B": 6, "C": 2}
+
+
+@override_settings(STOCK_BULK_CHUNK_SIZE=2)
+def test_bulk_stock_updates_in_set_based_chunks(client):
+    for i in range(5):
+        _product(f"S{i}", 10)
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.post(
+            "/api/v1/products/stock/bulk", [{"sku": f"S{i}", "delta": i} for i in range(5)], format="json"
+        )
+
+    assert resp.status_code == 200
+    assert len(_product_updates(ctx)) == 3
+    assert dict(Product.objects.values_list("sku", "stock_qty")) == {f"S{i}": 10 + i for i in range(5)}
+
+
+def test_bulk_stock_handles_sharded_products(client):
+    product = _product("HOT-BULK", 6)
+    enable_sharding(product, 3)
+
+    resp = client.post(
+        "/api/v1/products/stock/bulk", [{"sku": "HOT-BULK", "delta": -2}], format="json"
+    )
+    assert resp.json()["results"][0]["stock_qty"] == 4
+
+    resp = client.post(
+        "/api/v1/products/stock/bulk", [{"sku": "HOT-BULK", "stock_qty": 9}], format="json"
+    )
+    assert resp.json()["results"][0]["stock_qty"] == 9
+    assert sorted(ProductStockShard.objects.filter(product=product).values_list("qty", flat=True)) == [3, 3, 3]
+
+
+@override_settings(STOCK_BULK_MAX_SIZE=2)
+def test_bulk_stock_rejects_oversized_or_empty_payload(client):
+    assert client.post("/api/v1/products/stock/bulk", [], format="json").status_code == 400
+    payload = [{"sku": f"S{i}", "delta": 1} for i in range(3)]
+    assert client.post("/api/v1/products/stock/bulk", payload, format="json").status_code == 400
+
+
+def test_bulk_stock_rolls_back_chunk_when_a_sharded_sku_errors(client, monkeypatch):
+    _product("PLAIN-1", 5)
+    enable_sharding(_product("HOT-ERR", 6), 2)
+
+    def boom(product, total):
+        raise RuntimeError("falha no banco")
+
+    monkeypatch.setattr("apps.products.services.stock_service.set_sharded_stock", boom)
+    client.raise_request_exception = False
+    resp = client.post(
+        "/api/v1/products/stock/bulk",
+        [{"sku": "PLAIN-1", "stock_qty": 1}, {"sku": "HOT-ERR", "stock_qty": 1}],
+        format="json",
+    )
+
+    assert resp.status_code == 500
+    assert Product.objects.get(sku="PLAIN-1").stock_qty == 5
@@ -0,0 +1,119 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.customers.models import Customer
+from apps.orders.services.order_service import (
+    ConflictError,
+    CreateOrderInput,
+    CreateOrderItemInput,
+    OrderService,
+)
+from apps.products.models import Product, ProductStockShard
+from apps.products.services.stock_service import enable_sharding, reserve_from_shards
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def make_sharded_product(stock: int, slots: int = 4) -> Product:
+    product = Product.objects.create(sku="HOT-1", name="Hot", price=Decimal("2.00"), stock_qty=stock)
+    enable_sharding(product, slots)
+    product.refresh_from_db()
+    return product
+
+
+def shard_quantities(product: Product) -> list:
+    return list(ProductStockShard.objects.filter(product=product).order_by("slot").values_list("qty", flat=True))
+
+
+def create_order(customer: Customer, product: Product, qty: int, key: str):
+    return OrderService.create_order(
+        CreateOrderInput(
+            customer_id=customer.id,
+            idempotency_key=key,
+            observations="",
+            items=[CreateOrderItemInput(product_id=product.id, qty=qty)],
+        )
+    )
+
+
+def test_enable_sharding_moves_stock_into_slots():
+    product = make_sharded_product(stock=10, slots=4)
+
+    assert product.stock_qty == 0
+    assert shard_quantities(product) == [3, 3, 2, 2]
+    assert product.available_stock == 10
+
+
+def test_reserve_picks_a_random_slot_among_those_that_cover(monkeypatch):
+    product = make_sharded_product(stock=10, slots=4)  # [3, 3, 2, 2]
+    offered = []
+    monkeypatch.setattr(
+        "apps.products.services.stock_service.random.choice", lambda slots: offered.append(list(slots)) or slots[-1]
+    )
+
+    assert reserve_from_shards(product, 3)
+    assert offered == [[0, 1]]
+    assert shard_quantities(product) == [3, 0, 2, 2]
+
+
+def test_reserve_without_candidate_goes_straight_to_ordered_path():
+    product = make_sharded_product(stock=10, slots=4)  # [3, 3, 2, 2]
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert reserve_from_shards(product, 5)
+
+    # Nenhum UPDATE com guard por slot antes de travar todos os slots
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    assert len(updates) == 1 and '"qty" >=' not in updates[0]
+    assert shard_quantities(product) == [0, 1, 2, 2]
+
+
+def test_order_reserves_across_slots_and_cancel_returns_stock():
+    customer = Customer.objects.create(name="C", cpf_cnpj="shard-1", email="shard@test.com")
+    product = make_sharded_product(stock=10, slots=4)
+
+    # 5 não cabe em nenhum slot isolado: consolida entre slots
+    order = create_order(customer, product, qty=5, key="shard-a")
+    assert sum(shard_quantities(product)) == 5
+
+    with pytest.raises(ConflictError, match="estoque insuficiente para SKU HOT-1"):
+        create_order(customer, product, qty=6, key="shard-b")
+    assert sum(shard_quantities(product)) == 5
+
+    OrderService.cancel_order(order_id=order.id)
+    assert sum(shard_quantities(product)) == 10
+
+
+def test_serializers_and_stock_patch_use_slot_sum():
+    product = make_sharded_product(stock=9, slots=3)
+    client = APIClient()
+    client.force_authenticate(User.objects.create_superuser(username="shard_admin", password="x", email="s@test.com"))
+
+    listed = client.get("/api/v1/products").json()["results"][0]
+    assert listed["stock_qty"] == 9
+
+    response = client.patch(f"/api/v1/products/{product.id}/stock", {"stock_qty": 7}, format="json")
+    assert response.status_code == 200
+    assert response.json()["stock_qty"] == 7
+    assert shard_quantities(product) == [3, 2, 2]
+
+
+def test_stock_shards_command_rebalances_and_merges():
+    product = make_sharded_product(stock=8, slots=2)
+    ProductStockShard.objects.filter(product=product, slot=0).update(qty=8)
+    ProductStockShard.objects.filter(product=product, slot=1).update(qty=0)
+
+    call_command("stock_shards", "rebalance", "--sku", "HOT-1")
+    assert shard_quantities(product) == [4, 4]
+
+    call_command("stock_shards", "merge", "--all")
+    product.refresh_from_db()
+    assert product.stock_shard_count == 0
+    assert product.stock_qty == 8
+    assert shard_quantities(product) == []
@@ -0,0 +1,84 @@
+import pytest
+
+from apps.common import metrics
+from apps.common.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Down(Exception):
+    pass
+
+
+def _fail():
+    raise Down("fora")
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("dep", failure_threshold=3, reset_seconds=10, failure_types=(Down,), clock=clock)
+
+
+def test_opens_after_consecutive_failures_and_fails_fast(breaker):
+    calls = []
+    for _ in range(2):
+        with pytest.raises(Down):
+            breaker.call(_fail)
+    breaker.call(calls.append, "ok")  # sucesso zera a contagem
+    for _ in range(3):
+        with pytest.raises(Down):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, "não chega")
+    assert calls == ["ok"]
+    assert metrics.get("circuit_breaker_rejected_total", breaker="dep") == 1
+    assert metrics.get("circuit_breaker_transitions_total", breaker="dep", state=OPEN) == 1
+
+
+def test_half_open_lets_one_probe_through(breaker, clock):
+    for _ in range(3):
+        with pytest.raises(Down):
+            breaker.call(_fail)
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+
+    # Enquanto o teste está em andamento, as demais chamadas continuam rejeitadas
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 19
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: None)
+    clock.now = 20
+    assert breaker.call(lambda: "pong") == "pong"
+    assert breaker.state == CLOSED
+    assert metrics.get("circuit_breaker_transitions_total", breaker="dep", state=CLOSED) == 1
+
+
+def test_errors_outside_failure_types_do_not_count(breaker):
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            breaker.call(int, "x")
+    assert breaker.state == CLOSED
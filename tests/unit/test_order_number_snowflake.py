@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.orders.services.order_numbers import SnowflakeNumberGenerator, WorkerIdLease, WorkerIdLeaseLost
+
+
+def test_snowflake_numbers_are_unique_across_threads_and_workers():
+    # 2 "processos" (worker ids) x 4 threads x 250k = 2M números
+    generators = [SnowflakeNumberGenerator(worker_id=1), SnowflakeNumberGenerator(worker_id=2)]
+    per_thread, chunk = 250_000, 1_000
+    results = []
+
+    def worker(generator):
+        numbers = []
+        for _ in range(per_thread // chunk):
+            numbers.extend(generator.next_numbers(chunk))
+        results.append(numbers)
+
+    threads = [threading.Thread(target=worker, args=(g,)) for g in generators for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    total = sum(len(numbers) for numbers in results)
+    assert total == 2_000_000
+    assert len(set().union(*results)) == total
+
+
+def test_snowflake_numbers_increase_within_worker():
+    generator = SnowflakeNumberGenerator(worker_id=7)
+    numbers = [int(n) for n in generator.next_numbers(10_000)]
+    assert numbers == sorted(numbers)
+    assert all((n >> SnowflakeNumberGenerator.SEQUENCE_BITS) & SnowflakeNumberGenerator.MAX_WORKER_ID == 7 for n in numbers)
+
+
+def test_snowflake_rejects_out_of_range_worker_id():
+    with pytest.raises(ImproperlyConfigured):
+        SnowflakeNumberGenerator(worker_id=SnowflakeNumberGenerator.MAX_WORKER_ID + 1)
+
+
+def test_worker_id_lease_skips_ids_held_by_live_workers(fake_redis):
+    redis = fake_redis("apps.orders.services.order_numbers")
+    redis.set("order_numbers:worker_cursor", SnowflakeNumberGenerator.MAX_WORKER_ID)
+    redis.set(WorkerIdLease.KEY.format(0), "outro-processo", ex=30)
+
+    first = WorkerIdLease.acquire(ttl=30)
+    second = WorkerIdLease.acquire(ttl=30)
+
+    # Cursor 1024 -> id 0 já arrendado; passa para o 1, e o próximo para o 2
+    assert (first.worker_id, second.worker_id) == (1, 2)
+    assert redis.get(WorkerIdLease.KEY.format(1)) == first.token
+    assert first.renew() is True
+
+
+def test_worker_id_lease_fails_closed(fake_redis, monkeypatch):
+    fake_redis("apps.orders.services.order_numbers")
+    lease = WorkerIdLease.acquire(ttl=30)
+    generator = SnowflakeNumberGenerator(lease.worker_id, lease=lease)
+    assert generator.next_numbers(1)
+
+    # Passada metade do TTL sem renovar, a chave pode ter expirado e o id ter outro dono
+    lease.valid_until = 0
+    assert lease.renew() is False
+    with pytest.raises(WorkerIdLeaseLost):
+        generator.next_numbers(1)
+
+    def down():
+        raise ConnectionError("redis fora do ar")
+
+    monkeypatch.setattr("apps.orders.services.order_numbers.get_redis", down)
+    with pytest.raises(ConnectionError):
+        WorkerIdLease.acquire(ttl=30)
@@ -0,0 +1,99 @@
+import pytest
+import redis
+from django.conf import settings
+from django.test import RequestFactory, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common import metrics
+from apps.common.rate_limit import TokenBucketLimiter, client_identity, client_ip, load_rules, match_rule
+
+RULES = load_rules(
+    [
+        {"name": "auth", "prefix": "/api/v1/auth/", "methods": ["post"], "per_minute": 20},
+        {"name": "api", "prefix": "/api/", "per_minute": 600, "burst": 100},
+    ]
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _redis_up() -> bool:
+    try:
+        return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, socket_connect_timeout=0.2).ping()
+    except redis.RedisError:
+        return False
+
+
+def test_first_matching_rule_wins():
+    assert match_rule(RULES, "/api/v1/auth/jwt/login", "POST").name == "auth"
+    assert match_rule(RULES, "/api/v1/auth/me", "GET").name == "api"
+    assert match_rule(RULES, "/health", "GET") is None
+    assert RULES[0].burst == 20
+    assert RULES[1].refill_per_second == 10
+
+
+def test_client_ip_uses_forwarded_for_only_behind_trusted_proxies():
+    request = RequestFactory().get("/api/", HTTP_X_FORWARDED_FOR="6.6.6.6, 10.0.0.7", REMOTE_ADDR="10.0.0.1")
+
+    assert client_ip(request) == "10.0.0.1"
+    with override_settings(RATE_LIMIT_TRUSTED_PROXIES=1):
+        # A primeira entrada é do cliente e pode ser forjada; a última foi anexada pelo load balancer
+        assert client_ip(request) == "10.0.0.7"
+    with override_settings(RATE_LIMIT_TRUSTED_PROXIES=3):
+        assert client_ip(request) == "10.0.0.1"
+
+
+def test_client_identity_prefers_jwt_user_over_ip():
+    token = AccessToken()
+    token["user_id"] = 42
+    factory = RequestFactory()
+
+    assert client_identity(factory.get("/api/", HTTP_AUTHORIZATION=f"Bearer {token}")) == "user:42"
+    assert client_identity(factory.get("/api/", HTTP_AUTHORIZATION="Bearer invalido", REMOTE_ADDR="1.2.3.4")) == "ip:1.2.3.4"
+
+
+@override_settings(RATE_LIMIT_LOCAL_BATCH=5, RATE_LIMIT_LOCAL_LEASE_SECONDS=60)
+def test_local_lease_skips_redis_until_spent():
+    limiter = TokenBucketLimiter()
+    grants = [5, 1, 0]
+    calls = []
+
+    def acquire(key, capacity, refill_per_second, batch):
+        calls.append((key, capacity, batch))
+        return grants.pop(0), 0, 2500
+
+    limiter.acquire = acquire
+    api = RULES[1]
+
+    decisions = [limiter.hit(api, "ip:1.2.3.4") for _ in range(7)]
+
+    assert [d.allowed for d in decisions] == [True] * 6 + [False]
+    assert decisions[-1].retry_after_seconds == 3
+    assert calls == [("rate_limit:api:ip:1.2.3.4", 100, 5)] * 3
+    assert metrics.get("rate_limit_checks_total", source="local") == 4
+    assert metrics.get("rate_limit_rejected_total", rule="api") == 1
+
+
+def test_small_limits_take_one_token_per_request():
+    limiter = TokenBucketLimiter()
+    batches = []
+    limiter.acquire = lambda key, capacity, rate, batch: batches.append(batch) or (1, 5, 0)
+
+    limiter.hit(RULES[0], "ip:1.2.3.4")
+
+    assert batches == [2]  # 10% de 20
+
+
+@pytest.mark.skipif(not _redis_up(), reason="Redis indisponível")
+def test_lua_token_bucket_against_real_redis():
+    limiter = TokenBucketLimiter()
+    rule = load_rules([{"name": "t", "prefix": "/", "per_minute": 1, "burst": 3}])[0]
+    key = "rate_limit:t:test-lua"
+    redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT).delete(key)
+
+    assert [limiter.acquire(key, rule.burst, rule.refill_per_second, 1)[0] for _ in range(4)] == [1, 1, 1, 0]
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from django.test import override_settings
+
+from apps.common import redis as redis_module
+from apps.common.redis import get_blocking_redis, get_pool, get_redis, pipelined, reset_pools
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pools():
+    reset_pools()
+    yield
+    reset_pools()
+
+
+@override_settings(REDIS_MAX_CONNECTIONS=7, REDIS_SOCKET_TIMEOUT=0.25, REDIS_CONNECT_TIMEOUT=0.1, REDIS_HEALTH_CHECK_INTERVAL=15)
+def test_clients_share_one_configured_pool_per_process():
+    first, second = get_redis(), get_redis()
+
+    assert first.connection_pool is second.connection_pool is get_pool()
+    pool = get_pool()
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 0.25
+    assert pool.connection_kwargs["socket_connect_timeout"] == 0.1
+    assert pool.connection_kwargs["health_check_interval"] == 15
+
+    # Leituras bloqueantes ficam em outro pool, sem timeout de leitura
+    blocking = get_blocking_redis().connection_pool
+    assert blocking is not pool
+    assert blocking.connection_kwargs["socket_timeout"] is None
+    assert get_blocking_redis().connection_pool is blocking
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requer os.fork")
+def test_child_process_gets_its_own_pool_after_fork():
+    parent_pool = get_pool()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # filho
+        try:
+            fresh = redis_module._pool is None and get_pool() is not parent_pool
+            os.write(write_end, b"1" if fresh else b"0")
+        finally:
+            os._exit(0)
+
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b"1"
+    os.close(read_end)
+    assert get_pool() is parent_pool
+
+
+def test_pipelined_sends_batch_once_and_discards_on_error(fake_redis):
+    client = fake_redis()
+
+    with pipelined(client) as batch:
+        batch.incr("hits")
+        batch.expire("hits", 60, nx=True)
+        batch.incr("hits")
+    assert batch.results == [1, True, 2]
+
+    with pytest.raises(RuntimeError), pipelined(client) as batch:
+        batch.incr("hits")
+        raise RuntimeError("nada é enviado")
+    assert client.get("hits") == "2"
@@ -0,0 +1,52 @@
+import pytest
+from django.db import OperationalError
+from django.test import override_settings
+
+from apps.common import metrics
+from apps.common.retry import retry_on_lock_conflict
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries():
+    metrics.reset()
+    with override_settings(DB_LOCK_RETRY_ATTEMPTS=3, DB_LOCK_RETRY_BASE_DELAY_MS=0):
+        yield
+
+
+def _flaky(errors):
+    calls = {"n": 0}
+
+    @retry_on_lock_conflict
+    def op():
+        calls["n"] += 1
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return op, calls
+
+
+def test_retries_deadlock_and_counts_metric():
+    op, calls = _flaky([OperationalError(1213, "Deadlock found"), OperationalError(1205, "Lock wait timeout")])
+
+    assert op() == "ok"
+    assert calls["n"] == 3
+    assert metrics.get("db_lock_retries_total", operation="op") == 2
+
+
+def test_gives_up_after_max_attempts():
+    op, calls = _flaky([OperationalError(1213, "Deadlock found") for _ in range(5)])
+
+    with pytest.raises(OperationalError):
+        op()
+    assert calls["n"] == 3
+    assert metrics.get("db_lock_retry_exhausted_total", operation="op") == 1
+
+
+def test_other_operational_errors_are_not_retried():
+    op, calls = _flaky([OperationalError(2006, "MySQL server has gone away")])
+
+    with pytest.raises(OperationalError):
+        op()
+    assert calls["n"] == 1
+    assert metrics.get("db_lock_retries_total", operation="op") == 0
@@ -0,0 +1,18 @@
+import pytest
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from apps.products.services.stock_service import RESERVATION_MODES
+
+
+@pytest.mark.parametrize("mode", RESERVATION_MODES)
+def test_known_modes_start(mode):
+    with override_settings(STOCK_RESERVATION_MODE=mode):
+        apps.get_app_config("products").ready()
+
+
+def test_typo_in_reservation_mode_fails_at_startup():
+    with override_settings(STOCK_RESERVATION_MODE="optimistc"):
+        with pytest.raises(ImproperlyConfigured, match="STOCK_RESERVATION_MODE inválido: 'optimistc'"):
+            apps.get_app_config("products").ready()